@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Employee, Workstation, Room, Island
+from .models import Employee, Workstation, Room, Island, SequenceCounter, SeatChange, FloorSnapshot, LayoutTemplate
+from .layouts import room_template_islands
+from .services import delete_employees
 
 @admin.register(Employee)
 class EmployeeAdmin(admin.ModelAdmin):
@@ -8,14 +10,37 @@ class EmployeeAdmin(admin.ModelAdmin):
     list_filter = ('sector', 'created_at')
     readonly_fields = ('sector',)  # Torna o campo sector apenas leitura
 
+    # Libera as PAs com histórico antes do SET_NULL (ver services.delete_employees)
+    def delete_model(self, request, obj):
+        delete_employees(Employee.objects.filter(pk=obj.pk), user=request.user)
+
+    def delete_queryset(self, request, queryset):
+        delete_employees(queryset, user=request.user)
+
 @admin.register(Room)
 class RoomAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'created_at')
+    list_display = ('id', 'name', 'occupied_count', 'vacant_count', 'maintenance_count', 'total_count', 'created_at')
+    search_fields = ('name',)
+    actions = ['save_as_layout_template']
+
+    @admin.action(description="Salvar layout como modelo")
+    def save_as_layout_template(self, request, queryset):
+        for room in queryset:
+            islands = room_template_islands(room.pk)
+            if not islands:
+                self.message_user(request, f"A sala {room.name} não tem PAs para virar modelo.", level='warning')
+                continue
+            template, created = LayoutTemplate.objects.update_or_create(name=room.name, defaults={'islands': islands})
+            self.message_user(request, f"Modelo {template} {'criado' if created else 'atualizado'}.")
+
+@admin.register(LayoutTemplate)
+class LayoutTemplateAdmin(admin.ModelAdmin):
+    list_display = ('name', 'workstation_count', 'updated_at')
     search_fields = ('name',)
 
 @admin.register(Island)
 class IslandAdmin(admin.ModelAdmin):
-    list_display = ('id', 'room', 'island_number', 'created_at')
+    list_display = ('id', 'room', 'island_number', 'occupied_count', 'vacant_count', 'maintenance_count', 'total_count', 'created_at')
     list_filter = ('room',)
     search_fields = ('room__name',)
     list_select_related = ('room',) # Optimize query
@@ -27,3 +52,36 @@ class WorkstationAdmin(admin.ModelAdmin):
     search_fields = ('employee__name', 'island__room__name') # Search by room name too
     raw_id_fields = ('employee', 'island',) # Add island to raw_id_fields for better UI with many islands
     list_select_related = ('employee', 'island', 'island__room') # Optimize queries
+
+@admin.register(SequenceCounter)
+class SequenceCounterAdmin(admin.ModelAdmin):
+    list_display = ('category', 'last_value')
+    readonly_fields = ('category', 'last_value') # Só o alocador deve avançar os contadores
+
+@admin.register(SeatChange)
+class SeatChangeAdmin(admin.ModelAdmin):
+    list_display = ('id', 'created_at', 'workstation_id', 'old_employee_id', 'new_employee_id', 'old_status', 'new_status', 'user_id', 'source')
+    list_filter = ('source',)
+    search_fields = ('=workstation_id',)
+    show_full_result_count = False # Evita o COUNT(*) em tabelas com milhões de linhas
+
+    # Histórico somente de inserção: nada é criado, editado ou apagado pelo admin
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(FloorSnapshot)
+class FloorSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('id', 'created_at', 'last_change_id', 'workstation_count')
+    exclude = ('data',) # JSON grande; a foto é vista pela reconstrução do escritório
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,156 @@
+"""Alocação automática de funcionários sem PA em PAs vagas.
+
+Cada funcionário sem workstation vai para uma PA vaga (UNOCCUPIED, sem
+funcionário, com monitor, teclado e mouse) cuja categoria é igual ao seu
+setor. PAs sem algum equipamento ficam de fora: ocupadas, o refresh_status
+as marcaria como MAINTENANCE, não OCCUPIED. As PAs são preenchidas
+ilha a ilha, na ordem de sequence. Ilhas que já têm alguém sentado vêm
+primeiro, para completar equipes antes de abrir ilhas novas.
+
+O plano (plan_allocation) custa duas consultas e não grava nada; serve de
+prévia. apply_allocation grava o plano em uma transação. Antes disso, confere
+de novo quais PAs continuam vagas e quais funcionários continuam sem PA.
+A escrita é um único UPDATE parametrizado executado com executemany. O
+bulk_update do ORM montaria um CASE por linha e levaria segundos para 10 mil
+PAs. Como nada disso dispara signals, os contadores, o cache de fragmentos,
+o push SSE e o histórico são tratados aqui, como em services.py.
+"""
+from collections import Counter, defaultdict, namedtuple
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .audit import SOURCE_ALLOCATION, record_seat_changes
+from .cache import bump_island_versions_on_commit
+from .counters import apply_status_deltas, status_change_deltas
+from .events import publish_seat_changes_on_commit
+from .models import Employee, Workstation
+
+Assignment = namedtuple('Assignment', ['workstation_id', 'island_id', 'employee_id', 'employee_name', 'sector'])
+Unplaced = namedtuple('Unplaced', ['employee_id', 'name', 'sector'])
+
+
+class AllocationPlan:
+    def __init__(self, assignments, unplaced, vacant_left):
+        self.assignments = assignments
+        self.unplaced = unplaced
+        self.vacant_left = vacant_left # {categoria: PAs que continuam vagas}
+
+    @property
+    def islands(self):
+        return len({assignment.island_id for assignment in self.assignments})
+
+    def by_sector(self):
+        """[{sector, label, placed, unplaced, vacant_left}] na ordem de SECTOR_CHOICES."""
+        placed = Counter(assignment.sector for assignment in self.assignments)
+        unplaced = Counter(employee.sector for employee in self.unplaced)
+        return [
+            {'sector': sector, 'label': label, 'placed': placed[sector],
+             'unplaced': unplaced[sector], 'vacant_left': self.vacant_left.get(sector, 0)}
+            for sector, label in Employee.SECTOR_CHOICES
+            if placed[sector] or unplaced[sector] or self.vacant_left.get(sector)
+        ]
+
+    def summary(self):
+        return (f"{len(self.assignments)} funcionário(s) alocado(s) em {self.islands} ilha(s), "
+                f"{len(self.unplaced)} sem PA compatível.")
+
+
+def _vacant_seats(sectors=None):
+    """{categoria: [(pk, ilha)]} das PAs vagas e completas, com a próxima a preencher no fim da lista."""
+    seats = Workstation.objects.filter(
+        status='UNOCCUPIED', employee__isnull=True, island__isnull=False,
+        monitor=True, keyboard=True, mouse=True,
+    )
+    if sectors is not None:
+        seats = seats.filter(category__in=sectors)
+    rows = seats.order_by().values_list(
+        'pk', 'island_id', 'category', 'island__occupied_count',
+        'island__room__name', 'island__island_number', 'sequence',
+    )
+    # Ilhas com gente primeiro; depois sala, ilha e sequence (PAs contíguas)
+    rows = sorted(rows, key=lambda row: (row[3] == 0, row[4], row[5], row[6]), reverse=True)
+    by_category = defaultdict(list)
+    for pk, island_id, category, *_ in rows:
+        by_category[category].append((pk, island_id))
+    return by_category
+
+
+def _unseated_employees(sectors=None):
+    """(pk, nome, setor) dos funcionários sem PA, na ordem de cadastro."""
+    employees = Employee.objects.filter(workstation__isnull=True)
+    if sectors is not None:
+        employees = employees.filter(sector__in=sectors)
+    return employees.order_by('pk').values_list('pk', 'name', 'sector')
+
+
+def plan_allocation(sectors=None):
+    """Monta o plano de alocação, sem gravar. `sectors` limita a alguns setores."""
+    seats = _vacant_seats(sectors)
+    assignments, unplaced = [], []
+    for employee_id, name, sector in _unseated_employees(sectors):
+        available = seats.get(sector)
+        if not available:
+            unplaced.append(Unplaced(employee_id, name, sector))
+            continue
+        workstation_id, island_id = available.pop()
+        assignments.append(Assignment(workstation_id, island_id, employee_id, name, sector))
+    vacant_left = {category: len(left) for category, left in seats.items() if left}
+    return AllocationPlan(assignments, unplaced, vacant_left)
+
+
+def _write_seats(workstations):
+    # UPDATE ... SET employee_id, status, updated_at WHERE id, uma linha de parâmetros por PA
+    meta = Workstation._meta
+    quote = connection.ops.quote_name
+    columns = [meta.get_field(name).column for name in ('employee', 'status', 'updated_at')]
+    sql = 'UPDATE {} SET {} WHERE {} = %s'.format(
+        quote(meta.db_table),
+        ', '.join(f'{quote(column)} = %s' for column in columns),
+        quote(meta.pk.column),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, [
+            (ws.employee_id, ws.status, connection.ops.adapt_datetimefield_value(ws.updated_at), ws.pk)
+            for ws in workstations
+        ])
+
+
+def apply_allocation(plan, user=None):
+    """Grava o plano em uma transação. Retorna (PAs ocupadas, alocações descartadas).
+
+    Uma alocação é descartada se, desde a prévia, a PA deixou de estar vaga
+    ou o funcionário ganhou uma PA (ou foi removido). `user` é quem confirmou
+    a alocação, gravado no histórico.
+    """
+    with transaction.atomic():
+        sectors = {assignment.sector for assignment in plan.assignments}
+        vacant = {pk for category in _vacant_seats(sectors).values() for pk, _ in category}
+        unseated = {employee_id for employee_id, _, _ in _unseated_employees(sectors)}
+
+        now = timezone.now()
+        seated, skipped = [], []
+        for assignment in plan.assignments:
+            if assignment.workstation_id not in vacant or assignment.employee_id not in unseated:
+                skipped.append(assignment)
+                continue
+            workstation = Workstation(
+                pk=assignment.workstation_id,
+                island_id=assignment.island_id,
+                status='OCCUPIED',
+                updated_at=now, # O UPDATE direto não aplica o auto_now
+            )
+            # Só o nome é usado nos eventos SSE; evita buscar os funcionários de novo
+            workstation.employee = Employee(pk=assignment.employee_id, name=assignment.employee_name)
+            seated.append(workstation)
+
+        if seated:
+            _write_seats(seated)
+            apply_status_deltas(status_change_deltas((ws.island_id, 'UNOCCUPIED', 'OCCUPIED') for ws in seated))
+            bump_island_versions_on_commit(ws.island_id for ws in seated)
+            publish_seat_changes_on_commit(seated)
+            record_seat_changes(
+                [(ws.pk, None, ws.employee_id, 'UNOCCUPIED', 'OCCUPIED') for ws in seated],
+                user=user, source=SOURCE_ALLOCATION, at=now,
+            )
+    return seated, skipped
@@ -0,0 +1,187 @@
+"""Histórico das trocas de funcionário e status das PAs (modelo SeatChange).
+
+Cada alteração vira uma linha com a PA, o funcionário e o status antes e
+depois, o usuário, a origem e a data. As linhas são inseridas com um único
+bulk_create, na mesma transação da escrita das PAs, e nunca são editadas.
+A única exceção é a compactação do comando seat_history.
+
+A leitura é paginada por keyset (id decrescente): cada página é uma busca no
+índice a partir do último id visto, com o mesmo custo na primeira página e
+na milésima. A retenção apaga, em lotes, o que é mais antigo que o prazo. A
+compactação junta as trocas antigas de cada PA no mesmo dia em uma só linha,
+com o estado do início e do fim do dia.
+"""
+from collections import namedtuple
+
+from django.db import transaction
+from django.utils import timezone
+
+SOURCE_ADMIN = 1
+SOURCE_ALLOCATION = 2
+SOURCE_EDIT = 3
+
+STATUS_CODES = {'OCCUPIED': 1, 'UNOCCUPIED': 2, 'MAINTENANCE': 3}
+STATUS_KEYS = {code: key for key, code in STATUS_CODES.items()}
+
+HISTORY_PAGE_SIZE = 50
+MAINTENANCE_BATCH_SIZE = 5000
+
+HistoryPage = namedtuple('HistoryPage', ['entries', 'next_before'])
+
+
+def record_seat_changes(changes, user=None, source=SOURCE_ADMIN, at=None):
+    """Grava (pa, funcionário antigo, funcionário novo, status antigo, status novo) em lote.
+
+    Deve rodar na transação da escrita das PAs, para que o histórico e as
+    PAs sejam gravados (ou desfeitos) juntos.
+    """
+    from .models import SeatChange
+
+    at = at or timezone.now()
+    user_id = user.pk if user is not None and user.is_authenticated else None
+    entries = [
+        SeatChange(
+            created_at=at,
+            workstation_id=workstation_id,
+            old_employee_id=old_employee_id,
+            new_employee_id=new_employee_id,
+            old_status=STATUS_CODES[old_status],
+            new_status=STATUS_CODES[new_status],
+            user_id=user_id,
+            source=source,
+        )
+        for workstation_id, old_employee_id, new_employee_id, old_status, new_status in changes
+    ]
+    if entries:
+        SeatChange.objects.bulk_create(entries, batch_size=MAINTENANCE_BATCH_SIZE)
+    return entries
+
+
+def history_page(before=None, workstation_id=None, limit=HISTORY_PAGE_SIZE):
+    """Uma página do histórico, do mais recente para o mais antigo.
+
+    `before` é o cursor (id) devolvido em next_before pela página anterior.
+    """
+    from .models import SeatChange
+
+    entries = SeatChange.objects.order_by('-id')
+    if workstation_id is not None:
+        entries = entries.filter(workstation_id=workstation_id)
+    if before is not None:
+        entries = entries.filter(id__lt=before)
+    entries = list(entries[:limit + 1])
+    next_before = entries[limit - 1].id if len(entries) > limit else None
+    return HistoryPage(entries[:limit], next_before)
+
+
+def describe_entries(entries):
+    """Nomes de PAs, funcionários e usuários das linhas de uma página (três consultas)."""
+    from django.contrib.auth import get_user_model
+
+    from .models import Employee, Workstation
+
+    workstations = Workstation.objects.select_related('island__room').in_bulk({entry.workstation_id for entry in entries})
+    employee_ids = {entry.old_employee_id for entry in entries} | {entry.new_employee_id for entry in entries}
+    employees = dict(Employee.objects.filter(pk__in=employee_ids - {None}).values_list('pk', 'name'))
+    users = dict(get_user_model().objects.filter(pk__in={entry.user_id for entry in entries} - {None}).values_list('pk', 'username'))
+
+    def employee_name(employee_id):
+        if employee_id is None:
+            return None
+        return employees.get(employee_id, f"Funcionário removido (ID {employee_id})")
+
+    rows = []
+    for entry in entries:
+        workstation = workstations.get(entry.workstation_id)
+        if workstation is None:
+            location = f"PA removida (ID {entry.workstation_id})"
+        elif workstation.island_id:
+            location = f"{workstation.island.room.name} · Ilha {workstation.island.island_number} · {workstation.category} {workstation.sequence}"
+        else:
+            location = f"{workstation.category} {workstation.sequence}"
+        rows.append({
+            'entry': entry,
+            'location': location,
+            'old_employee': employee_name(entry.old_employee_id),
+            'new_employee': employee_name(entry.new_employee_id),
+            'user': users.get(entry.user_id, f"ID {entry.user_id}") if entry.user_id else None,
+        })
+    return rows
+
+
+def _delete_ids(ids):
+    from .models import SeatChange
+
+    # Sem relações nem signals, o delete() vira um único DELETE ... WHERE id IN
+    return SeatChange.objects.filter(pk__in=ids).delete()[0]
+
+
+def purge_history(before, batch_size=MAINTENANCE_BATCH_SIZE):
+    """Apaga as linhas anteriores a `before`, em lotes curtos. Retorna quantas apagou."""
+    from .models import SeatChange
+
+    deleted = 0
+    while True:
+        ids = list(SeatChange.objects.filter(created_at__lt=before).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            deleted += _delete_ids(ids)
+
+
+def _compact_groups(entries):
+    # entries ordenadas por (pa, id); devolve (ids a apagar, linhas a reescrever)
+    to_delete, to_rewrite = [], []
+    groups = {}
+    for entry in entries:
+        groups.setdefault((entry[1], timezone.localdate(entry[2])), []).append(entry)
+    for group in groups.values():
+        if len(group) < 2:
+            continue
+        first, last = group[0], group[-1]
+        if (first[3], first[4]) == (last[5], last[6]):
+            to_delete.extend(entry[0] for entry in group) # O dia terminou como começou
+        else:
+            to_delete.extend(entry[0] for entry in group[:-1])
+            to_rewrite.append((last[0], first[3], first[4]))
+    return to_delete, to_rewrite
+
+
+def compact_history(before, workstations_per_batch=200):
+    """Junta as trocas de cada PA no mesmo dia (anteriores a `before`) em uma só linha.
+
+    A linha mantida é a última do dia, com o funcionário e o status do início
+    do dia como 'anteriores'. Se o dia termina como começou, todas as linhas
+    são apagadas. Percorre as PAs em faixas de id, uma transação por faixa.
+    Retorna (linhas apagadas, linhas reescritas).
+    """
+    from .models import SeatChange
+
+    old = SeatChange.objects.filter(created_at__lt=before)
+    deleted = rewritten = 0
+    last_workstation = -1
+    while True:
+        workstation_ids = list(
+            old.filter(workstation_id__gt=last_workstation).order_by('workstation_id')
+            .values_list('workstation_id', flat=True).distinct()[:workstations_per_batch]
+        )
+        if not workstation_ids:
+            return deleted, rewritten
+        last_workstation = workstation_ids[-1]
+
+        entries = (
+            old.filter(workstation_id__gte=workstation_ids[0], workstation_id__lte=last_workstation)
+            .order_by('workstation_id', 'id')
+            .values_list('id', 'workstation_id', 'created_at', 'old_employee_id', 'old_status', 'new_employee_id', 'new_status')
+        )
+        to_delete, to_rewrite = _compact_groups(entries)
+        with transaction.atomic():
+            for start in range(0, len(to_delete), MAINTENANCE_BATCH_SIZE):
+                deleted += _delete_ids(to_delete[start:start + MAINTENANCE_BATCH_SIZE])
+            if to_rewrite:
+                SeatChange.objects.bulk_update(
+                    [SeatChange(id=pk, old_employee_id=employee_id, old_status=status) for pk, employee_id, status in to_rewrite],
+                    ['old_employee_id', 'old_status'],
+                    batch_size=MAINTENANCE_BATCH_SIZE,
+                )
+                rewritten += len(to_rewrite)
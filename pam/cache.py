@@ -0,0 +1,163 @@
+"""Cache de fragmentos renderizados do office_view e versão global do layout.
+
+Cada ilha tem uma "versão" guardada no cache (um token aleatório, prefixado
+pelo momento em que foi criado). Qualquer
+alteração em uma Workstation, Employee ou Island daquela ilha troca o token,
+e o fragmento HTML da ilha é cacheado sob a chave (ilha, versão). Assim, um
+refresh depois de mudar uma PA só re-renderiza a ilha afetada.
+
+Usa apenas get_many/set_many, então funciona com o LocMemCache e com
+qualquer outro backend. Em produção com vários processos, use um backend
+compartilhado (Redis, Memcached, banco), senão cada processo vê só as
+próprias invalidações.
+"""
+import datetime
+import hashlib
+import math
+import time
+import uuid
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, router, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+ISLAND_VERSION_KEY = 'pam:island-version:{}'
+ISLAND_FRAGMENT_KEY = 'pam:island-fragment:{}:{}'
+
+
+def fragment_timeout():
+    return getattr(settings, 'PAM_FRAGMENT_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def _new_token():
+    # Começa pelo momento da criação (ver version_age)
+    return f'{time.time():.0f}-{uuid.uuid4().hex}'
+
+
+def version_age(version):
+    """Segundos desde a criação da versão (infinito para tokens sem data)."""
+    created, _, _ = version.partition('-')
+    try:
+        return time.time() - int(created)
+    except ValueError:
+        return math.inf
+
+
+def get_island_versions(island_ids):
+    """Retorna {island_id: versão}, criando versões para ilhas ainda sem uma."""
+    island_ids = list(island_ids)
+    keys = {ISLAND_VERSION_KEY.format(island_id): island_id for island_id in island_ids}
+    found = cache.get_many(keys.keys())
+    versions = {keys[key]: token for key, token in found.items()}
+
+    missing = {ISLAND_VERSION_KEY.format(island_id): _new_token() for island_id in island_ids if island_id not in versions}
+    if missing:
+        # Versões nunca expiram sozinhas; se o backend as descartar, um token
+        # novo simplesmente invalida os fragmentos antigos
+        cache.set_many(missing, timeout=None)
+        versions.update({keys[key]: token for key, token in missing.items()})
+    return versions
+
+
+def bump_island_versions(island_ids):
+    """Invalida os fragmentos das ilhas, trocando suas versões."""
+    island_ids = {island_id for island_id in island_ids if island_id is not None}
+    if island_ids:
+        cache.set_many({ISLAND_VERSION_KEY.format(island_id): _new_token() for island_id in island_ids}, timeout=None)
+
+
+def bump_island_versions_on_commit(island_ids):
+    """Agenda a invalidação para depois do commit da transação atual.
+
+    Invalidar antes do commit permitiria que outra requisição lesse a versão
+    nova junto com os dados antigos e cacheasse o fragmento desatualizado.
+    """
+    island_ids = {island_id for island_id in island_ids if island_id is not None}
+    if island_ids:
+        transaction.on_commit(lambda: bump_island_versions(island_ids))
+
+
+def get_island_fragments(versions):
+    """Retorna {island_id: html} para os fragmentos presentes no cache."""
+    keys = {ISLAND_FRAGMENT_KEY.format(island_id, version): island_id for island_id, version in versions.items()}
+    return {keys[key]: html for key, html in cache.get_many(keys.keys()).items()}
+
+
+def set_island_fragments(fragments, versions, min_age=0):
+    """Guarda {island_id: html} sob as versões usadas na renderização.
+
+    Com min_age, só guarda os fragmentos de versões criadas há mais de
+    min_age segundos: renderizados a partir da réplica, os de versões mais
+    novas podem ainda mostrar os dados anteriores à troca (ver pam/routers.py).
+    """
+    if min_age:
+        fragments = {island_id: html for island_id, html in fragments.items() if version_age(versions[island_id]) > min_age}
+    if fragments:
+        cache.set_many(
+            {ISLAND_FRAGMENT_KEY.format(island_id, versions[island_id]): html for island_id, html in fragments.items()},
+            timeout=fragment_timeout(),
+        )
+
+
+# --- Versão global do layout (ETag / Last-Modified) ---
+
+LayoutVersion = namedtuple('LayoutVersion', ['etag', 'last_modified'])
+
+
+def _as_datetime(value):
+    # O SQLite devolve texto nas subconsultas cruas; o PostgreSQL, datetime
+    if isinstance(value, str):
+        value = parse_datetime(value)
+    if value is not None and settings.USE_TZ and timezone.is_naive(value):
+        value = timezone.make_aware(value, datetime.timezone.utc)
+    return value
+
+
+def get_layout_version(request=None):
+    """Versão barata de tudo que aparece no office_view, em uma única consulta.
+
+    Combina o maior updated_at e a contagem de linhas de Room, Island,
+    Workstation e Employee: o updated_at pega edições e inserções, a contagem
+    pega remoções. O resultado é memorizado no request, para que o ETag e o
+    Last-Modified da mesma requisição não consultem o banco duas vezes. A
+    consulta vai para o mesmo banco das leituras da view (réplica ou principal).
+    Roda em toda requisição do quadro, inclusive nas 304: os MAX(updated_at)
+    de Workstation e Employee usam os índices de updated_at dessas tabelas.
+    """
+    if request is not None and hasattr(request, '_pam_layout_version'):
+        return request._pam_layout_version
+
+    from .models import Employee, Island, Room, Workstation
+
+    tables = [model._meta.db_table for model in (Room, Island, Workstation, Employee)]
+    connection = connections[router.db_for_read(Room)]
+    quote = connection.ops.quote_name
+    columns = []
+    for table in tables:
+        columns.append(f"(SELECT MAX({quote('updated_at')}) FROM {quote(table)})")
+        columns.append(f"(SELECT COUNT(*) FROM {quote(table)})")
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT {', '.join(columns)}")
+        row = cursor.fetchone()
+
+    timestamps = [_as_datetime(value) for value in row[0::2]]
+    last_modified = max((value for value in timestamps if value is not None), default=None)
+    digest = hashlib.md5(repr((timestamps, row[1::2])).encode(), usedforsecurity=False).hexdigest()
+    version = LayoutVersion(etag=digest, last_modified=last_modified)
+
+    if request is not None:
+        request._pam_layout_version = version
+    return version
+
+
+def layout_etag(request, *args, **kwargs):
+    """etag_func para o decorator django.views.decorators.http.condition."""
+    return get_layout_version(request).etag
+
+
+def layout_last_modified(request, *args, **kwargs):
+    """last_modified_func para o decorator condition."""
+    return get_layout_version(request).last_modified
@@ -0,0 +1,125 @@
+"""Contadores de ocupação materializados em Island e Room.
+
+Cada ilha e cada sala guardam quantas PAs estão ocupadas, vagas e em
+manutenção, e o total. Os resumos leem esses campos, sem contar as
+workstations. As escritas mantêm os contadores na mesma transação:
+- Workstation.save e a exclusão de uma PA;
+- o save em lote de services.py;
+- build_room, que já cria ilhas e sala com os valores certos.
+
+Cada lote de alterações vira um conjunto de deltas {(ilha, status): n},
+aplicado com UPDATEs de incremento (F() + CASE). Assim, escritas
+concorrentes não se sobrescrevem. O comando occupancy_counters recalcula e
+confere tudo a partir das workstations.
+"""
+from collections import Counter, defaultdict
+
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+STATUS_FIELDS = {
+    'OCCUPIED': 'occupied_count',
+    'UNOCCUPIED': 'vacant_count',
+    'MAINTENANCE': 'maintenance_count',
+}
+COUNTER_FIELDS = [*STATUS_FIELDS.values(), 'total_count']
+
+
+def counter_values(workstations, status):
+    """Valores iniciais dos contadores para `workstations` PAs no mesmo status."""
+    values = dict.fromkeys(COUNTER_FIELDS, 0)
+    values[STATUS_FIELDS[status]] = values['total_count'] = workstations
+    return values
+
+
+def status_change_deltas(changes):
+    """Deltas para uma lista de (ilha, status antigo, status novo).
+
+    Use status antigo None para PAs novas e status novo None para PAs removidas.
+    """
+    deltas = Counter()
+    for island_id, old_status, new_status in changes:
+        if old_status == new_status:
+            continue
+        if old_status is not None:
+            deltas[(island_id, old_status)] -= 1
+        if new_status is not None:
+            deltas[(island_id, new_status)] += 1
+    return deltas
+
+
+def _increments(per_key):
+    # {campo: F(campo) + CASE pk WHEN ... THEN delta END}, só para os campos que mudam
+    updates = {}
+    for field in COUNTER_FIELDS:
+        whens = [When(pk=pk, then=Value(deltas[field])) for pk, deltas in per_key.items() if deltas[field]]
+        if whens:
+            updates[field] = F(field) + Case(*whens, default=Value(0), output_field=IntegerField())
+    return updates
+
+
+def apply_status_deltas(deltas):
+    """Soma deltas {(island_id, status): n} às ilhas e às suas salas.
+
+    Custa três consultas (salas das ilhas, UPDATE das ilhas, UPDATE das
+    salas), independente de quantas PAs mudaram. Deve rodar na mesma
+    transação da escrita das workstations.
+    """
+    from .models import Island, Room
+
+    per_island = defaultdict(Counter)
+    for (island_id, status), amount in deltas.items():
+        if island_id is None or not amount:
+            continue
+        per_island[island_id][STATUS_FIELDS[status]] += amount
+        per_island[island_id]['total_count'] += amount
+    per_island = {island_id: counts for island_id, counts in per_island.items() if any(counts.values())}
+    if not per_island:
+        return
+
+    per_room = defaultdict(Counter)
+    for island_id, room_id in Island.objects.filter(pk__in=per_island).values_list('pk', 'room_id'):
+        per_room[room_id].update(per_island[island_id])
+
+    Island.objects.filter(pk__in=per_island).update(**_increments(per_island))
+    if per_room:
+        Room.objects.filter(pk__in=per_room).update(**_increments(per_room))
+
+
+def refresh_island_counters(island_ids=None):
+    """Recalcula os contadores das ilhas (todas, se island_ids for None) a partir das workstations."""
+    from .models import Island, Workstation
+
+    def count(**filters):
+        workstations = Workstation.objects.filter(island=OuterRef('pk'), **filters).order_by().values('island')
+        return Coalesce(Subquery(workstations.annotate(total=Count('pk')).values('total')), 0)
+
+    values = {field: count(status=status) for status, field in STATUS_FIELDS.items()}
+    values['total_count'] = count()
+    islands = Island.objects.all() if island_ids is None else Island.objects.filter(pk__in=island_ids)
+    islands.update(**values)
+
+
+def refresh_room_counters(room_ids=None):
+    """Recalcula os contadores das salas (todas, se room_ids for None) somando os das ilhas."""
+    from .models import Island, Room
+
+    def total(field):
+        islands = Island.objects.filter(room=OuterRef('pk')).order_by().values('room')
+        return Coalesce(Subquery(islands.annotate(total=Sum(field)).values('total')), 0)
+
+    rooms = Room.objects.all() if room_ids is None else Room.objects.filter(pk__in=room_ids)
+    rooms.update(**{field: total(field) for field in COUNTER_FIELDS})
+
+
+def expected_island_counters():
+    """{island_id: {campo: valor}} calculado das workstations em um único GROUP BY."""
+    from .models import Workstation
+
+    expected = defaultdict(lambda: dict.fromkeys(COUNTER_FIELDS, 0))
+    rows = Workstation.objects.filter(island__isnull=False).order_by().values('island_id', 'status').annotate(total=Count('pk'))
+    for row in rows:
+        counts = expected[row['island_id']]
+        counts[STATUS_FIELDS[row['status']]] += row['total']
+        counts['total_count'] += row['total']
+    return expected
@@ -0,0 +1,119 @@
+"""Painel de ocupação e equipamentos, calculado no banco.
+
+Um único GROUP BY sobre Workstation (sala, ilha, categoria, status) traz as
+contagens de PAs e de equipamentos faltando, e uma segunda consulta conta os
+funcionários sem PA por setor. O resultado é cacheado sob a versão do layout
+(ver cache.get_layout_version), então consultar o painel repetidamente custa
+só a consulta da versão enquanto nada mudar.
+"""
+from django.core.cache import cache
+from django.db.models import Count, Exists, OuterRef, Q
+
+from .cache import fragment_timeout, get_layout_version
+from .models import Employee, Workstation
+
+DASHBOARD_KEY = 'pam:occupancy-dashboard:{}'
+
+STATUSES = [key for key, _ in Workstation.STATUS_CHOICES]
+EQUIPMENT = ['monitor', 'keyboard', 'mouse', 'mousepad', 'headset']
+
+
+def _counter():
+    counts = dict.fromkeys(STATUSES, 0)
+    counts['total'] = 0
+    return counts
+
+
+def _add(counts, status, total):
+    counts[status] += total
+    counts['total'] += total
+
+
+def occupancy_rows():
+    """Contagens por (sala, ilha, categoria, status), com os equipamentos faltando."""
+    missing = {f'missing_{item}': Count('pk', filter=Q(**{item: False})) for item in EQUIPMENT}
+    return (
+        Workstation.objects
+        .values('island__room_id', 'island__room__name', 'island_id', 'island__island_number', 'category', 'status')
+        .annotate(total=Count('pk'), **missing)
+        .order_by('island__room__name', 'island__island_number', 'category', 'status')
+    )
+
+
+def unseated_by_sector():
+    """{setor: funcionários sem nenhuma PA}, para todos os setores."""
+    seated = Workstation.objects.filter(employee=OuterRef('pk'))
+    counts = dict.fromkeys((key for key, _ in Employee.SECTOR_CHOICES), 0)
+    for row in Employee.objects.filter(~Exists(seated)).order_by().values('sector').annotate(total=Count('pk')):
+        counts[row['sector']] = row['total']
+    return counts
+
+
+def build_dashboard():
+    """Monta o painel a partir das consultas agregadas (sem cache)."""
+    rooms = {}
+    totals = _counter()
+    missing_totals = dict.fromkeys(EQUIPMENT, 0)
+    by_category = {}
+
+    for row in occupancy_rows():
+        room = rooms.get(row['island__room_id'])
+        if room is None:
+            room = rooms[row['island__room_id']] = {
+                'id': row['island__room_id'],
+                'name': row['island__room__name'] or 'Sem sala',
+                'counts': _counter(),
+                'by_category': {},
+                'missing': dict.fromkeys(EQUIPMENT, 0),
+                'islands': {},
+            }
+        island = room['islands'].get(row['island_id'])
+        if island is None:
+            island = room['islands'][row['island_id']] = {
+                'id': row['island_id'],
+                'number': row['island__island_number'],
+                'counts': _counter(),
+                'missing': dict.fromkeys(EQUIPMENT, 0),
+            }
+
+        status, total = row['status'], row['total']
+        for counts in (totals, room['counts'], island['counts'],
+                       room['by_category'].setdefault(row['category'], _counter()),
+                       by_category.setdefault(row['category'], _counter())):
+            _add(counts, status, total)
+        for item in EQUIPMENT:
+            for missing in (missing_totals, room['missing'], island['missing']):
+                missing[item] += row[f'missing_{item}']
+
+    for room in rooms.values():
+        room['islands'] = list(room['islands'].values())
+        room['by_category'] = _category_list(room['by_category'])
+    sector_labels = dict(Employee.SECTOR_CHOICES)
+    return {
+        'totals': totals,
+        'by_category': _category_list(by_category),
+        'missing': missing_totals,
+        'unseated_by_sector': [
+            {'sector': sector, 'label': sector_labels[sector], 'total': total}
+            for sector, total in unseated_by_sector().items()
+        ],
+        'rooms': list(rooms.values()),
+    }
+
+
+def _category_list(by_category):
+    # Lista na ordem de CATEGORY_CHOICES, com o rótulo para o template
+    return [
+        {'category': key, 'label': label, 'counts': by_category[key]}
+        for key, label in Workstation.CATEGORY_CHOICES if key in by_category
+    ]
+
+
+def get_dashboard(request=None):
+    """Painel cacheado sob a versão atual do layout."""
+    key = DASHBOARD_KEY.format(get_layout_version(request).etag)
+    dashboard = cache.get(key)
+    if dashboard is None:
+        dashboard = build_dashboard()
+        cache.set(key, dashboard, fragment_timeout())
+    return dashboard
@@ -0,0 +1,124 @@
+"""Pub/sub em processo para o push de status das PAs (Server-Sent Events).
+
+Cada quadro aberto no office_view mantém uma conexão SSE ociosa, servida pela
+view assíncrona seat_events_view. Quando uma Workstation é salva (ou uma
+atualização em lote é confirmada), um pequeno delta JSON é publicado aqui
+depois do commit e entregue a todos os inscritos, sem broker externo.
+
+O broker vive na memória do processo: rode um único processo ASGI (ex.:
+``uvicorn sistema_pas.asgi:application``) ou os quadros conectados a um
+processo não verão as alterações feitas em outro.
+"""
+import asyncio
+import logging
+import threading
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Eventos acumulados por inscrito lento antes de pedirmos um recarregamento completo
+SUBSCRIBER_QUEUE_SIZE = 256
+
+RESYNC_EVENT = {'type': 'layout'}
+
+
+class Subscription:
+    """Fila de eventos de uma conexão SSE, presa ao event loop que a criou."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def put(self, event):
+        # Sempre executado dentro do loop do inscrito (via call_soon_threadsafe)
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Cliente não está consumindo: descarta o atraso e manda recarregar
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_EVENT)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class SeatEventBroker:
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        subscription = Subscription(asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def publish(self, event):
+        """Entrega o evento a todos os inscritos; pode ser chamado de qualquer thread."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:
+                # Loop já encerrado; a conexão será removida no finally da view
+                logger.debug("Descartando evento para inscrito com loop encerrado.")
+
+
+broker = SeatEventBroker()
+
+
+def seat_event(workstation, employee_name=None):
+    """Delta enviado aos quadros: id da PA, status e nome do funcionário."""
+    return {
+        'type': 'seat',
+        'id': workstation.pk,
+        'status': workstation.status,
+        'employee_id': workstation.employee_id,
+        'employee_name': employee_name if workstation.employee_id else None,
+    }
+
+
+def _employee_names(workstations):
+    # Funcionários já carregados (select_related ou atribuídos) não custam
+    # consulta; os demais nomes vêm em uma só
+    names, missing = {}, set()
+    for ws in workstations:
+        if not ws.employee_id:
+            continue
+        field = ws._meta.get_field('employee')
+        if field.is_cached(ws):
+            names[ws.employee_id] = field.get_cached_value(ws).name
+        else:
+            missing.add(ws.employee_id)
+    if missing:
+        employees = workstations[0]._meta.get_field('employee').related_model.objects
+        names.update(employees.filter(pk__in=missing).values_list('pk', 'name'))
+    return names
+
+
+def publish_seat_changes_on_commit(workstations):
+    """Publica os deltas das PAs depois do commit da transação atual."""
+    if not broker.subscriber_count:
+        return  # Ninguém conectado neste processo; evita montar os eventos
+    workstations = list(workstations)
+    names = _employee_names(workstations)
+    events = [seat_event(ws, names.get(ws.employee_id)) for ws in workstations]
+    if events:
+        transaction.on_commit(lambda: [broker.publish(event) for event in events])
+
+
+def publish_layout_change_on_commit():
+    """Avisa os quadros que a estrutura (salas/ilhas) mudou e a página deve recarregar."""
+    if broker.subscriber_count:
+        transaction.on_commit(lambda: broker.publish(RESYNC_EVENT))
@@ -0,0 +1,95 @@
+"""Exportação das PAs (ocupação e inventário) em CSV ou JSON Lines, em streaming.
+
+Uma única consulta values_list, com join em island__room e employee, é
+percorrida com .iterator(chunk_size=...). As linhas saem em blocos de texto
+à medida que são lidas, então a memória não cresce com o número de PAs e o
+download começa na hora. Usado por export_workstations_view e pelo comando
+export_workstations.
+"""
+import csv
+import io
+import json
+
+from asgiref.sync import sync_to_async
+
+from .models import Workstation
+
+# (coluna no arquivo, lookup no values_list)
+EXPORT_COLUMNS = [
+    ('room', 'island__room__name'),
+    ('island', 'island__island_number'),
+    ('sequence', 'sequence'),
+    ('category', 'category'),
+    ('status', 'status'),
+    ('employee', 'employee__name'),
+    ('monitor', 'monitor'),
+    ('keyboard', 'keyboard'),
+    ('mouse', 'mouse'),
+    ('mousepad', 'mousepad'),
+    ('headset', 'headset'),
+]
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+CHUNK_SIZE = 2000 # Linhas por fetch do cursor
+ROWS_PER_WRITE = 500 # Linhas por bloco de texto enviado
+
+
+def export_rows(chunk_size=CHUNK_SIZE):
+    return (
+        Workstation.objects
+        .order_by('island__room__name', 'island__island_number', 'category', 'sequence')
+        .values_list(*(lookup for _, lookup in EXPORT_COLUMNS))
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def iter_export(fmt, chunk_size=CHUNK_SIZE, rows_per_write=ROWS_PER_WRITE):
+    """Gera o arquivo de exportação em blocos de texto ('csv' ou 'jsonl')."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato de exportação desconhecido: {fmt}")
+    names = [name for name, _ in EXPORT_COLUMNS]
+    buffer = io.StringIO()
+    if fmt == 'csv':
+        writer = csv.writer(buffer)
+        writer.writerow(names)
+        write = writer.writerow
+    else:
+        def write(row):
+            buffer.write(json.dumps(dict(zip(names, row)), ensure_ascii=False))
+            buffer.write('\n')
+
+    pending = 0
+    for row in export_rows(chunk_size):
+        write(row)
+        pending += 1
+        if pending >= rows_per_write:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+async def aiter_export(fmt, **kwargs):
+    """Versão assíncrona de iter_export para o ASGI.
+
+    O StreamingHttpResponse consome iteradores síncronos inteiros antes de
+    enviar quando roda sob ASGI; aqui cada bloco é lido na thread do banco
+    (thread_sensitive) e enviado assim que fica pronto.
+    """
+    iterator = iter_export(fmt, **kwargs)
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            chunk = await next_chunk(iterator, None)
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        # Fecha o cursor na mesma thread que o abriu (também se o cliente desconectar)
+        await sync_to_async(iterator.close, thread_sensitive=True)()
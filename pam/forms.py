@@ -1,47 +1,83 @@
+import bisect
+
 from django import forms
-from .models import Workstation, Employee, Room # Import Room
+from .models import Workstation, Employee, Room, only_digits # Import Room
+
+class EmployeeChoiceProvider:
+    """Monta as opções de funcionário uma única vez por requisição.
+
+    Carrega os funcionários (agrupados por setor) e o mapa de ocupação com um
+    número fixo de consultas, e depois serve as escolhas de cada
+    WorkstationForm sem voltar ao banco.
+    """
+
+    def __init__(self):
+        # funcionário -> ID da workstation que ele ocupa (no máximo uma, ver
+        # a constraint workstation_one_seat_per_employee)
+        self.seat = dict(Workstation.objects.filter(employee__isnull=False).order_by().values_list('employee_id', 'id'))
+
+        # Posição global (ordem por nome) de cada funcionário, usada para
+        # inserir o funcionário atual de outro setor no lugar certo
+        self.names = {}
+        self.rank = {}
+        self.by_sector = {}
+        self.sector_ranks = {}
+        employees = Employee.objects.order_by('name').values_list('id', 'name', 'sector')
+        for position, (emp_id, name, sector) in enumerate(employees):
+            self.names[emp_id] = name
+            self.rank[emp_id] = position
+            self.by_sector.setdefault(sector, []).append((emp_id, self.label(emp_id)))
+            self.sector_ranks.setdefault(sector, []).append(position)
+
+    def label(self, employee_id, workstation_id=None):
+        """Nome do funcionário, com '(Ocupado)' se estiver em *outra* PA."""
+        name = self.names[employee_id]
+        seat = self.seat.get(employee_id)
+        return f"{name} (Ocupado)" if seat is not None and seat != workstation_id else name
+
+    def choices_for(self, workstation):
+        """Opções do <select> de funcionário para uma workstation."""
+        sector = workstation.category or None
+        sector_choices = self.by_sector.get(sector, [])
+        choices = [('', '---------')] + sector_choices
+        current_id = workstation.employee_id
+        if current_id is None or current_id not in self.names:
+            return choices
+
+        # O funcionário atual não deve aparecer como ocupado pela própria PA
+        current_choice = (current_id, self.label(current_id, workstation.pk))
+        position = 1 + bisect.bisect_left(self.sector_ranks.get(sector, []), self.rank[current_id])
+        if position < len(choices) and choices[position][0] == current_id:
+            choices[position] = current_choice
+        else:
+            choices.insert(position, current_choice)
+        return choices
+
+
+class CurrentEmployeeChoiceProvider:
+    """Só a opção vazia e o funcionário atual da PA, sem nenhuma consulta.
+
+    Usado no admin_office_view: as demais opções vêm da busca
+    (employee_search_ajax_view), em vez de repetir o setor inteiro em cada <select>.
+    """
+
+    def choices_for(self, workstation):
+        choices = [('', '---------')]
+        if workstation.employee_id:
+            choices.append((workstation.employee_id, workstation.employee.name))
+        return choices
+
 
 class WorkstationForm(forms.ModelForm):
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, choice_provider=None, **kwargs):
         super().__init__(*args, **kwargs)
-        
-        # Personalizar as opções do campo 'employee'
-        current_instance = self.instance
-        current_employee_id = current_instance.employee.id if current_instance and current_instance.employee else None
-        workstation_category = current_instance.category if current_instance and current_instance.category else None
-
-        # Obter IDs de todos os funcionários atualmente alocados em *outras* workstations
-        occupied_employee_ids = set(
-            Workstation.objects.filter(employee__isnull=False)
-                             .exclude(pk=current_instance.pk if current_instance else None) # Exclui a workstation atual
-                             .values_list('employee_id', flat=True)
-        )
-
-        choices = [('', '---------')] # Começa com a opção vazia
-        
-        # Busca todos os funcionários ordenados por nome
-        all_employees = Employee.objects.order_by('name') 
-
-        for emp in all_employees:
-            # --- NOVA LÓGICA DE FILTRO ---
-            # Verifica se o funcionário pertence ao setor da workstation OU se é o funcionário atual
-            include_employee = False
-            if workstation_category and emp.sector == workstation_category:
-                include_employee = True
-            elif emp.id == current_employee_id:
-                include_employee = True
-            # --- FIM DA NOVA LÓGICA DE FILTRO ---
-
-            if include_employee:
-                label = emp.name
-                # Adiciona '(Ocupado)' se o funcionário estiver em outra PA
-                if emp.id in occupied_employee_ids:
-                     label = f"{emp.name} (Ocupado)"
-                
-                choices.append((emp.id, label))
-            
-        self.fields['employee'].choices = choices
+
+        # Views que renderizam muitos forms devem compartilhar um único provider;
+        # sem ele, o form monta o seu próprio (comportamento antigo)
+        if choice_provider is None:
+            choice_provider = EmployeeChoiceProvider()
+        self.fields['employee'].choices = choice_provider.choices_for(self.instance)
 
     class Meta:
         model = Workstation
@@ -79,6 +115,23 @@ class RoomForm(forms.ModelForm):
 # class IslandForm(forms.Form):
 #     number_of_workstations = forms.IntegerField(min_value=1, label="Número de Workstations")
 
+# Validação de CPF e telefone compartilhada pelo EmployeeForm e pela importação CSV
+def clean_cpf_value(cpf):
+    # Remover caracteres não numéricos para validação/armazenamento
+    if len(only_digits(cpf)) != 11:
+        raise forms.ValidationError("CPF deve conter 11 dígitos.")
+    # Adicionar aqui validação de CPF (algoritmo) se desejado
+    return cpf # Ou retorna os dígitos se quiser salvar só números
+
+
+def clean_phone_value(phone):
+    if phone:
+        if not (10 <= len(only_digits(phone)) <= 11):
+            raise forms.ValidationError("Telefone deve ter 10 ou 11 dígitos (com DDD).")
+        # Adicionar formatação aqui se desejar
+    return phone # Ou retorna formatado
+
+
 class EmployeeForm(forms.ModelForm):
     class Meta:
         model = Employee
@@ -93,19 +146,12 @@ class EmployeeForm(forms.ModelForm):
 
     # Opcional: Adicionar validação customizada para CPF, telefone, etc.
     def clean_cpf(self):
-        cpf = self.cleaned_data.get('cpf')
-        # Remover caracteres não numéricos para validação/armazenamento
-        cpf_digits = ''.join(filter(str.isdigit, cpf or ''))
-        if len(cpf_digits) != 11:
-            raise forms.ValidationError("CPF deve conter 11 dígitos.")
-        # Adicionar aqui validação de CPF (algoritmo) se desejado
-        return cpf # Ou retorna cpf_digits se quiser salvar só números
+        return clean_cpf_value(self.cleaned_data.get('cpf'))
 
     def clean_phone(self):
-        phone = self.cleaned_data.get('phone')
-        if phone:
-            phone_digits = ''.join(filter(str.isdigit, phone or ''))
-            if not (10 <= len(phone_digits) <= 11):
-                 raise forms.ValidationError("Telefone deve ter 10 ou 11 dígitos (com DDD).")
-            # Adicionar formatação aqui se desejar
-        return phone # Ou retorna formatado
\ No newline at end of file
+        return clean_phone_value(self.cleaned_data.get('phone'))
+
+
+class EmployeeImportForm(forms.Form):
+    file = forms.FileField(label="Arquivo CSV", widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv'}))
+    dry_run = forms.BooleanField(label="Apenas simular (não grava)", required=False)
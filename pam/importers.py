@@ -0,0 +1,217 @@
+"""Importação de funcionários a partir de CSV, em streaming e em lotes.
+
+O arquivo é lido linha a linha por um gerador, então a memória não depende do
+tamanho da planilha. As linhas válidas são agrupadas em lotes. Cada lote
+custa uma consulta de CPFs, uma de emails, um bulk_create e um bulk_update.
+O CPF é a chave do upsert: uma linha cujo CPF já existe atualiza o
+funcionário, senão o cria.
+A validação de CPF e telefone é a mesma do EmployeeForm.
+"""
+import csv
+import io
+import itertools
+from collections import namedtuple
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import bump_island_versions_on_commit
+from .forms import clean_cpf_value, clean_phone_value, only_digits
+from .models import Employee, Workstation, normalize_search_text
+
+DEFAULT_BATCH_SIZE = 500
+
+# Erros guardados no relatório; os demais só entram na contagem
+MAX_REPORTED_ERRORS = 1000
+
+# Cabeçalhos aceitos (normalizados: minúsculas e sem acento) -> campo do Employee
+HEADER_ALIASES = {
+    'nome': 'name', 'name': 'name',
+    'cpf': 'cpf',
+    'email': 'email', 'e-mail': 'email',
+    'telefone': 'phone', 'celular': 'phone', 'phone': 'phone',
+    'setor': 'sector', 'sector': 'sector',
+}
+REQUIRED_COLUMNS = ('name', 'cpf', 'phone', 'sector')
+COMPARED_FIELDS = ('name', 'email', 'phone', 'sector')
+UPDATED_FIELDS = ['name', 'search_name', 'email', 'phone', 'sector', 'updated_at']
+
+# Setor pela chave ('SIAPE_LEO') ou pelo rótulo ('SIAPE Leo'), sem diferenciar acento/caixa
+SECTOR_LOOKUP = {}
+for _key, _label in Employee.SECTOR_CHOICES:
+    SECTOR_LOOKUP[normalize_search_text(_key)] = _key
+    SECTOR_LOOKUP[normalize_search_text(_label)] = _key
+
+RowError = namedtuple('RowError', ['line', 'cpf', 'message'])
+
+
+class EmployeeImportError(Exception):
+    """Arquivo que não pode ser importado (ex.: faltam colunas obrigatórias)."""
+
+
+class ImportReport:
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.duplicates = 0 # Linhas repetidas no mesmo lote (vale a última)
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, line, cpf, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(RowError(line, cpf, message))
+
+    @property
+    def rows(self):
+        return self.created + self.updated + self.unchanged + self.duplicates + self.error_count
+
+    def summary(self):
+        prefix = "Simulação: " if self.dry_run else ""
+        return (f"{prefix}{self.rows} linhas lidas, {self.created} funcionário(s) criado(s), "
+                f"{self.updated} atualizado(s), {self.unchanged} sem alteração, {self.error_count} com erro.")
+
+
+def iter_csv_rows(stream, delimiter=None):
+    """Gera (número da linha, {campo: valor}) a partir de um arquivo CSV.
+
+    Aceita arquivo binário (upload) ou de texto. Sem `delimiter`, escolhe
+    entre ',' e ';' pelo cabeçalho (planilhas em pt-BR costumam usar ';').
+    """
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    header = stream.readline()
+    if not header.strip():
+        raise EmployeeImportError("Arquivo vazio.")
+    if delimiter is None:
+        delimiter = ';' if header.count(';') > header.count(',') else ','
+
+    reader = csv.reader(itertools.chain([header], stream), delimiter=delimiter)
+    columns = [HEADER_ALIASES.get(normalize_search_text(name)) for name in next(reader)]
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise EmployeeImportError(f"Colunas obrigatórias ausentes: {', '.join(missing)}.")
+
+    for values in reader:
+        if not any(value.strip() for value in values):
+            continue
+        yield reader.line_num, {column: value.strip() for column, value in zip(columns, values) if column}
+
+
+def clean_row(row):
+    """Valida e normaliza uma linha. Levanta ValidationError com as mensagens."""
+    errors = []
+    data = {'name': row.get('name', ''), 'email': row.get('email') or None}
+
+    if not data['name']:
+        errors.append("Nome obrigatório.")
+
+    try:
+        data['cpf'] = clean_cpf_value(row.get('cpf', ''))
+    except ValidationError as e:
+        errors.extend(e.messages)
+
+    if not row.get('phone'):
+        errors.append("Telefone obrigatório.")
+    else:
+        try:
+            data['phone'] = clean_phone_value(row['phone'])
+        except ValidationError as e:
+            errors.extend(e.messages)
+
+    if data['email']:
+        try:
+            validate_email(data['email'])
+        except ValidationError:
+            errors.append(f"Email '{data['email']}' inválido.")
+
+    data['sector'] = SECTOR_LOOKUP.get(normalize_search_text(row.get('sector', '')))
+    if data['sector'] is None:
+        errors.append(f"Setor '{row.get('sector', '')}' inválido.")
+
+    # CPF e telefone são conferidos pelos dígitos e gravados como digitados:
+    # o tamanho da coluna vale para todos os campos (no PostgreSQL, um valor
+    # maior derrubaria o lote com DataError)
+    for name, value in data.items():
+        field = Employee._meta.get_field(name)
+        if value and field.max_length and len(value) > field.max_length:
+            errors.append(f"{field.verbose_name} muito longo (máximo de {field.max_length} caracteres).")
+
+    if errors:
+        raise ValidationError(errors)
+    return data
+
+
+def _import_batch(rows, report, dry_run):
+    latest = {}
+    for line, data in rows:
+        digits = only_digits(data['cpf'])
+        if digits in latest:
+            report.duplicates += 1
+        latest[digits] = (line, data)
+
+    # O CPF é gravado como digitado; cpf_digits casa qualquer formato
+    existing = {employee.cpf_digits: employee for employee in Employee.objects.filter(cpf_digits__in=latest)}
+    emails = {data['email'] for _, data in latest.values() if data['email']}
+    email_owners = dict(Employee.objects.filter(email__in=emails).values_list('email', 'cpf_digits'))
+
+    now = timezone.now()
+    to_create, to_update = [], []
+    for digits, (line, data) in latest.items():
+        email = data['email']
+        if email:
+            owner = email_owners.setdefault(email, digits)
+            if owner != digits:
+                report.add_error(line, data['cpf'], f"Email '{email}' já pertence a outro CPF.")
+                continue
+
+        employee = existing.get(digits)
+        if employee is None:
+            to_create.append(Employee(search_name=normalize_search_text(data['name']), cpf_digits=digits, **data))
+        elif any(getattr(employee, field) != data[field] for field in COMPARED_FIELDS):
+            for field in COMPARED_FIELDS:
+                setattr(employee, field, data[field])
+            employee.search_name = normalize_search_text(employee.name) # bulk_update não passa pelo save()
+            employee.updated_at = now
+            to_update.append(employee)
+        else:
+            report.unchanged += 1
+
+    if not dry_run and (to_create or to_update):
+        with transaction.atomic():
+            Employee.objects.bulk_create(to_create)
+            if to_update:
+                Employee.objects.bulk_update(to_update, UPDATED_FIELDS)
+                # Nomes aparecem nos fragmentos do office_view
+                bump_island_versions_on_commit(
+                    Workstation.objects.filter(employee__in=to_update).values_list('island_id', flat=True).distinct()
+                )
+    report.created += len(to_create)
+    report.updated += len(to_update)
+
+
+def import_employees(stream, dry_run=False, batch_size=DEFAULT_BATCH_SIZE, delimiter=None):
+    """Importa funcionários de um CSV (cabeçalho: nome, cpf, email, telefone, setor).
+
+    Cada lote é gravado em sua própria transação; com `dry_run` nada é
+    gravado, mas o relatório mostra o que seria criado e atualizado. Retorna
+    um ImportReport. Levanta EmployeeImportError se o cabeçalho for inválido.
+    """
+    report = ImportReport(dry_run=dry_run)
+    batch = []
+    for line, row in iter_csv_rows(stream, delimiter):
+        try:
+            batch.append((line, clean_row(row)))
+        except ValidationError as e:
+            report.add_error(line, row.get('cpf', ''), ' '.join(e.messages))
+            continue
+        if len(batch) >= batch_size:
+            _import_batch(batch, report, dry_run)
+            batch = []
+    if batch:
+        _import_batch(batch, report, dry_run)
+    return report
@@ -0,0 +1,225 @@
+"""Criação, cópia e remoção de salas em lote (ilhas + workstations).
+
+Valida a requisição inteira antes de tocar no banco e depois cria a sala com
+um bulk_create para as ilhas e outro para as workstations, com as sequências
+de cada categoria reservadas em bloco no SequenceCounter. O custo deixa de
+crescer em consultas por PA, e o lock de escrita do SQLite fica preso por bem
+menos tempo. O mesmo caminho cria salas a partir de um LayoutTemplate (ilhas
+salvas com número de PAs e categoria) e copia o layout de uma sala existente
+(clone_room), sempre com sequências novas e todas as PAs vagas.
+
+A remoção também não passa pelo Collector do Django (que carrega cada ilha e
+PA para o CASCADE e dispara os sinais de uma em uma): são DELETEs por
+conjunto, PAs, ilhas e sala, em uma transação.
+"""
+from collections import Counter, namedtuple
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+
+from .cache import bump_island_versions_on_commit
+from .counters import counter_values
+from .events import publish_layout_change_on_commit
+from .models import Island, Room, SequenceCounter, Workstation
+
+IslandSpec = namedtuple('IslandSpec', ['workstations', 'category'])
+
+BULK_BATCH_SIZE = 500
+
+
+def max_islands():
+    return getattr(settings, 'PAM_MAX_ISLANDS_PER_ROOM', 100)
+
+
+def max_workstations():
+    return getattr(settings, 'PAM_MAX_WORKSTATIONS_PER_ISLAND', 200)
+
+
+def resolve_category(value):
+    """Aceita a chave ('SIAPE_DION') ou o rótulo ('SIAPE Dion') de uma categoria.
+
+    Retorna a chave, o padrão do campo se vazio, ou None se não reconhecida.
+    """
+    value = (value or '').strip()
+    if not value:
+        return Workstation._meta.get_field('category').default
+    for key, label in Workstation.CATEGORY_CHOICES:
+        if value.casefold() in (key.casefold(), label.casefold()):
+            return key
+    return None
+
+
+def parse_island_specs(data):
+    """Lê num_islands e island_N_workstations/island_N_category de um POST.
+
+    Levanta ValidationError com as chaves de erro usadas pelo modal ('counts').
+    """
+    try:
+        num_islands = int(data.get('num_islands', '0'))
+    except ValueError:
+        raise ValidationError({'counts': ['Número de ilhas inválido.']})
+    if num_islands <= 0:
+        raise ValidationError({'counts': ['Número de ilhas deve ser positivo.']})
+    if num_islands > max_islands():
+        raise ValidationError({'counts': [f'Uma sala pode ter no máximo {max_islands()} ilhas.']})
+
+    specs = []
+    for number in range(1, num_islands + 1):
+        try:
+            count = int(data.get(f'island_{number}_workstations', '0'))
+        except ValueError:
+            raise ValidationError({'counts': ['Número inválido de workstations por ilha fornecido.']})
+        if count <= 0:
+            raise ValidationError({'counts': ['Número de workstations por ilha deve ser positivo.']})
+        if count > max_workstations():
+            raise ValidationError({'counts': [f'Uma ilha pode ter no máximo {max_workstations()} workstations.']})
+
+        category = resolve_category(data.get(f'island_{number}_category', ''))
+        if category is None:
+            raise ValidationError({'counts': [f'Categoria inválida para a ilha {number}.']})
+        specs.append(IslandSpec(workstations=count, category=category))
+    return specs
+
+
+def template_specs(islands):
+    """IslandSpecs de um LayoutTemplate.islands ([{"workstations": 10, "category": "INSS"}, ...]).
+
+    Levanta ValidationError na chave 'islands'.
+    """
+    if not isinstance(islands, list) or not islands:
+        raise ValidationError({'islands': ['Informe ao menos uma ilha.']})
+    if len(islands) > max_islands():
+        raise ValidationError({'islands': [f'Uma sala pode ter no máximo {max_islands()} ilhas.']})
+    specs = []
+    for number, island in enumerate(islands, start=1):
+        try:
+            count = int(island['workstations'])
+            category = resolve_category(island.get('category'))
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError({'islands': [f'Ilha {number}: use {{"workstations": N, "category": "..."}}.']})
+        if count <= 0:
+            raise ValidationError({'islands': [f'Ilha {number}: o número de workstations deve ser positivo.']})
+        if count > max_workstations():
+            raise ValidationError({'islands': [f'Ilha {number}: no máximo {max_workstations()} workstations.']})
+        if category is None:
+            raise ValidationError({'islands': [f'Ilha {number}: categoria inválida.']})
+        specs.append(IslandSpec(workstations=count, category=category))
+    return specs
+
+
+def template_islands(island_specs):
+    """Formato de LayoutTemplate.islands para uma lista de IslandSpec."""
+    return [{'workstations': spec.workstations, 'category': spec.category} for spec in island_specs]
+
+
+def _create_room(name, islands):
+    # islands: [(categoria da ilha, [categoria de cada PA, em ordem])]. Roda na
+    # transação de quem chama. Todas as PAs nascem vagas: os contadores de
+    # ocupação já saem prontos
+    total = sum(len(categories) for _, categories in islands)
+    room = Room.objects.create(name=name, **counter_values(total, 'UNOCCUPIED'))
+    created = Island.objects.bulk_create([
+        Island(room=room, island_number=number, category=category, **counter_values(len(categories), 'UNOCCUPIED'))
+        for number, (category, categories) in enumerate(islands, start=1)
+    ])
+    if any(island.pk is None for island in created):
+        # Backend sem RETURNING no bulk_create: recarrega as ilhas
+        created = list(room.islands.order_by('island_number'))
+
+    demand = Counter(category for _, categories in islands for category in categories)
+    # Um bloco de sequências por categoria, reservado de uma vez no contador
+    sequences = {category: SequenceCounter.objects.allocate(category, count) for category, count in sorted(demand.items())}
+
+    workstations = []
+    for island, (_, categories) in zip(created, islands):
+        for category in categories:
+            workstations.append(Workstation(island=island, category=category, sequence=sequences[category], status='UNOCCUPIED'))
+            sequences[category] += 1
+    Workstation.objects.bulk_create(workstations, batch_size=BULK_BATCH_SIZE)
+
+    publish_layout_change_on_commit() # Quadros abertos recarregam a nova estrutura
+    return room
+
+
+def build_room(name, island_specs):
+    """Cria a sala, suas ilhas e workstations com bulk_create. Retorna a Room.
+
+    Deve receber specs já validados (ver parse_island_specs e template_specs);
+    a criação roda em uma única transação.
+    """
+    with transaction.atomic():
+        return _create_room(name, [(spec.category, [spec.category] * spec.workstations) for spec in island_specs])
+
+
+def build_room_from_template(name, template):
+    """Cria uma sala com as ilhas de um LayoutTemplate. Retorna a Room."""
+    return build_room(name, template_specs(template.islands))
+
+
+def room_layout(room_id):
+    """[(categoria da ilha, [categoria de cada PA, em ordem de sequence])] de uma sala.
+
+    Levanta Room.DoesNotExist se a sala não existir.
+    """
+    islands = {
+        island_id: (category, [])
+        for island_id, category in Island.objects.filter(room_id=room_id).order_by('island_number').values_list('pk', 'category')
+    }
+    if not islands and not Room.objects.filter(pk=room_id).exists():
+        raise Room.DoesNotExist(f"Sala {room_id} não encontrada.")
+    rows = Workstation.objects.filter(island_id__in=islands).order_by('island_id', 'sequence').values_list('island_id', 'category')
+    for island_id, category in rows:
+        islands[island_id][1].append(category)
+    return list(islands.values())
+
+
+def room_template_islands(room_id):
+    """Ilhas de uma sala no formato de LayoutTemplate.islands.
+
+    A categoria de cada ilha é a da maioria das suas PAs; ilhas sem PA ficam
+    de fora, já que o modelo exige ao menos uma.
+    """
+    return [
+        {'workstations': len(categories), 'category': Counter(categories).most_common(1)[0][0]}
+        for _, categories in room_layout(room_id) if categories
+    ]
+
+
+def clone_room(source_room_id, name):
+    """Copia ilhas e workstations de uma sala para uma sala nova. Retorna a Room.
+
+    A cópia tem a mesma estrutura (ilhas, número de PAs e categorias), com
+    sequências novas, todas as PAs vagas e com os equipamentos padrão.
+    """
+    with transaction.atomic():
+        return _create_room(name, room_layout(source_room_id))
+
+
+def delete_room(room_id):
+    """Remove a sala, suas ilhas e workstations com DELETEs por conjunto.
+
+    O número de consultas não depende do tamanho da sala. Levanta
+    Room.DoesNotExist se a sala não existir.
+    """
+    quote = connection.ops.quote_name
+    room_table, island_table, ws_table = (quote(model._meta.db_table) for model in (Room, Island, Workstation))
+    island_room = quote(Island._meta.get_field('room').column)
+    ws_island = quote(Workstation._meta.get_field('island').column)
+
+    with transaction.atomic():
+        island_ids = list(Island.objects.filter(room_id=room_id).values_list('pk', flat=True))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {ws_table} WHERE {ws_island} IN (SELECT {quote(Island._meta.pk.column)} FROM {island_table} WHERE {island_room} = %s)",
+                [room_id],
+            )
+            cursor.execute(f"DELETE FROM {island_table} WHERE {island_room} = %s", [room_id])
+            cursor.execute(f"DELETE FROM {room_table} WHERE {quote(Room._meta.pk.column)} = %s", [room_id])
+            if cursor.rowcount == 0:
+                raise Room.DoesNotExist(f"Sala {room_id} não encontrada.")
+
+        # O que os sinais de post_delete fariam: os contadores sumiram com a
+        # sala, os fragmentos das ilhas saem do cache e os quadros recarregam
+        bump_island_versions_on_commit(island_ids)
+        publish_layout_change_on_commit()
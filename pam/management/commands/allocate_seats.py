@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from pam.allocation import apply_allocation, plan_allocation
+from pam.models import Employee
+
+
+class Command(BaseCommand):
+    help = "Aloca funcionários sem PA em PAs vagas da categoria do seu setor. Sem --apply, só mostra a prévia."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--apply', action='store_true', help="Grava a alocação (padrão: só a prévia).")
+        parser.add_argument(
+            '--sector', action='append', choices=[key for key, _ in Employee.SECTOR_CHOICES],
+            help="Limita a um setor (pode repetir).",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        plan = plan_allocation(options['sector'])
+        planned = time.perf_counter()
+
+        for row in plan.by_sector():
+            self.stdout.write(f"{row['label']}: {row['placed']} alocado(s), {row['unplaced']} sem PA, {row['vacant_left']} PA(s) vaga(s) restante(s)")
+        for employee in plan.unplaced:
+            self.stderr.write(f"Sem PA compatível: {employee.name} (ID {employee.employee_id}, setor {employee.sector})")
+
+        if not options['apply']:
+            self.stdout.write(f"Prévia: {plan.summary()} ({planned - start:.2f}s). Use --apply para gravar.")
+            return
+
+        seated, skipped = apply_allocation(plan)
+        elapsed = time.perf_counter() - start
+        for assignment in skipped:
+            self.stderr.write(f"Descartado: {assignment.employee_name} -> PA {assignment.workstation_id} (mudou durante a gravação)")
+        style = self.style.WARNING if plan.unplaced or skipped else self.style.SUCCESS
+        self.stdout.write(style(f"{len(seated)} funcionário(s) alocado(s), {len(plan.unplaced)} sem PA compatível ({elapsed:.2f}s)."))
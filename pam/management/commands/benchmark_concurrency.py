@@ -0,0 +1,171 @@
+import random
+import shutil
+import sqlite3
+import tempfile
+import multiprocessing
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+
+from pam.cache import get_layout_version
+from pam.models import Room, Workstation
+from pam.profiling import percentile
+from pam.readmodels import load_rooms, load_workstations
+from pam.services import save_workstation_changes
+from pam.synthetic import generate_office
+
+# Configuração padrão do Django (journal DELETE, transações DEFERRED, conexão
+# fechada a cada requisição) contra a configuração atual do settings.py, com
+# cada transaction_mode (os demais ajustes, busy timeout incluso, ficam iguais)
+TRANSACTION_MODES = ['IMMEDIATE', 'DEFERRED']
+BASELINE = {
+    'OPTIONS': {'init_command': 'PRAGMA journal_mode=DELETE;PRAGMA synchronous=FULL', 'transaction_mode': 'DEFERRED', 'timeout': 5},
+    'CONN_MAX_AGE': 0,
+}
+
+
+class Command(BaseCommand):
+    help = ("Mede leitores (quadros) e escritores (saves do admin) simultâneos no SQLite, com a configuração "
+            "padrão do Django e com a do settings.py em transações IMMEDIATE e DEFERRED: vazão, p95 e erros "
+            "'database is locked'. "
+            "Roda sobre uma cópia temporária do banco.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4, help="Processos lendo o layout (quadros).")
+        parser.add_argument('--writers', type=int, default=2, help="Processos gravando alterações em lote (admin).")
+        parser.add_argument('--seconds', type=float, default=10, help="Duração de cada rodada.")
+        parser.add_argument('--batch', type=int, default=20, help="PAs alteradas por save.")
+        parser.add_argument('--workstations', type=int, default=2000, help="PAs geradas se a cópia do banco não tiver nenhuma.")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        default = connections.settings['default']
+        if default['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError("Este benchmark é só para o SQLite.")
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            raise CommandError("Este benchmark precisa de multiprocessing com fork (Linux/macOS).")
+
+        tmpdir = Path(tempfile.mkdtemp(prefix='pam-bench-'))
+        try:
+            copy = tmpdir / 'bench.sqlite3'
+            self._copy_database(default['NAME'], copy)
+            runs = [('padrão do Django', {**default, **BASELINE})] + [
+                (f"settings.py {mode}", {**default, 'OPTIONS': {**default['OPTIONS'], 'transaction_mode': mode}})
+                for mode in TRANSACTION_MODES
+            ]
+            results = []
+            for label, config in runs:
+                self._use(dict(config, NAME=str(copy)))
+                if not results:
+                    self._prepare(options)
+                results.append((label, self._run(config, options)))
+        finally:
+            self._use(default)
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+        self.stdout.write(f"\n{'configuração':<22} {'leituras/s':>10} {'escritas/s':>10} {'leit. p95 ms':>12} "
+                          f"{'escr. p95 ms':>12} {'travas':>7} {'outros erros':>12}")
+        for label, result in results:
+            self.stdout.write(
+                f"{label:<22} {result['reads'] / options['seconds']:>10.1f} {result['writes'] / options['seconds']:>10.1f} "
+                f"{result['read_p95']:>12.1f} {result['write_p95']:>12.1f} {result['locked']:>7} {result['errors']:>12}"
+            )
+
+    def _copy_database(self, source, target):
+        # backup() copia um estado consistente mesmo com o WAL em uso
+        with sqlite3.connect(source) as src, sqlite3.connect(target) as dst:
+            src.backup(dst)
+
+    def _use(self, config):
+        # As threads abrem conexões novas a partir de connections.settings
+        connections.close_all()
+        connections.settings['default'] = config
+        try:
+            del connections['default']
+        except AttributeError:
+            pass # Esta thread ainda não tinha aberto conexão
+
+    def _prepare(self, options):
+        if not Workstation.objects.exists():
+            per_room = 10 * 20
+            generate_office(
+                rooms=max(1, options['workstations'] // per_room), islands_per_room=10, workstations_per_island=20,
+                employees=options['workstations'], seed=options['seed'], room_prefix='Concorrência',
+            )
+        connection.close()
+
+    def _run(self, config, options):
+        rooms = list(Room.objects.values_list('pk', flat=True))
+        islands_by_room = {room.id: [island.id for island in room.islands] for room in load_rooms()}
+        vacant = list(Workstation.objects.filter(status='UNOCCUPIED').values_list('pk', flat=True))
+        connection.close()
+        if not rooms or len(vacant) < options['writers'] * options['batch']:
+            raise CommandError("Banco sem salas ou PAs vagas suficientes para o benchmark.")
+
+        rng = random.Random(options['seed'])
+        rng.shuffle(vacant)
+        pools = [vacant[index::options['writers']] for index in range(options['writers'])]
+        per_request = config.get('CONN_MAX_AGE', 0) == 0
+        stop = time.perf_counter() + options['seconds']
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+
+        def read():
+            get_layout_version()
+            room_id = random.choice(rooms)
+            load_workstations(islands_by_room.get(room_id, []))
+
+        def make_writer(pool):
+            def write():
+                # Alterna um lote de PAs vagas entre manutenção e vaga (os contadores continuam certos)
+                batch = random.sample(pool, min(options['batch'], len(pool)))
+                status = random.choice(['MAINTENANCE', 'UNOCCUPIED'])
+                save_workstation_changes([{'id': pk, 'status': status} for pk in batch])
+            return write
+
+        def worker(kind, operation, seed):
+            random.seed(seed)
+            durations, locked, errors = [], 0, 0
+            while time.perf_counter() < stop:
+                start = time.perf_counter()
+                try:
+                    operation()
+                except OperationalError as e:
+                    if 'locked' in str(e):
+                        locked += 1
+                    else:
+                        errors += 1
+                    continue
+                finally:
+                    if per_request:
+                        connection.close() # Como o Django faz ao fim de cada requisição sem CONN_MAX_AGE
+                durations.append((time.perf_counter() - start) * 1000)
+            connection.close()
+            results.put((kind, durations, locked, errors))
+
+        # Um processo por leitor/escritor, como workers de um servidor (threads
+        # disputariam o GIL e mediriam o Python, não o banco)
+        workers = [('read', read)] * options['readers'] + [('write', make_writer(pool)) for pool in pools]
+        processes = [
+            context.Process(target=worker, args=(kind, operation, rng.random()))
+            for kind, operation in workers
+        ]
+        for process in processes:
+            process.start()
+        stats = {'read': [], 'write': [], 'locked': 0, 'errors': 0}
+        for _ in processes:
+            kind, durations, locked, errors = results.get()
+            stats[kind].extend(durations)
+            stats['locked'] += locked
+            stats['errors'] += errors
+        for process in processes:
+            process.join()
+
+        reads, writes = sorted(stats['read']), sorted(stats['write'])
+        return {
+            'reads': len(reads), 'writes': len(writes),
+            'read_p95': percentile(reads, 0.95) or 0, 'write_p95': percentile(writes, 0.95) or 0,
+            'locked': stats['locked'], 'errors': stats['errors'],
+        }
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from pam.layouts import IslandSpec, build_room
+from pam.models import Island, Room, Workstation
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Mede o tempo de criação de salas grandes (o banco é revertido ao final)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000], help="Total de workstations por sala.")
+        parser.add_argument('--per-island', type=int, default=40, help="Workstations por ilha.")
+        parser.add_argument('--legacy', action='store_true', help="Também mede a criação linha a linha (caminho antigo).")
+
+    def handle(self, *args, **options):
+        per_island = options['per_island']
+        for size in options['sizes']:
+            counts = [per_island] * (size // per_island)
+            if size % per_island:
+                counts.append(size % per_island)
+            specs = [IslandSpec(workstations=count, category='INSS') for count in counts]
+
+            elapsed = self._timed(lambda: build_room(f'Benchmark {size}', specs))
+            self.stdout.write(f"bulk    {size:>6} PAs em {len(specs):>4} ilhas: {elapsed:8.3f}s")
+            if options['legacy']:
+                elapsed = self._timed(lambda: self._legacy_build(f'Benchmark {size}', specs))
+                self.stdout.write(f"legacy  {size:>6} PAs em {len(specs):>4} ilhas: {elapsed:8.3f}s")
+
+    def _timed(self, build):
+        start = time.perf_counter()
+        try:
+            with transaction.atomic():
+                build()
+                elapsed = time.perf_counter() - start
+                raise _Rollback
+        except _Rollback:
+            pass
+        return elapsed
+
+    def _legacy_build(self, name, specs):
+        # Reproduz o caminho antigo: um create por ilha e um save() por PA
+        room = Room.objects.create(name=name)
+        for number, spec in enumerate(specs, start=1):
+            island = Island.objects.create(room=room, island_number=number, category=spec.category)
+            for _ in range(spec.workstations):
+                Workstation.objects.create(island=island, category=spec.category, status='UNOCCUPIED')
@@ -0,0 +1,95 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from pam.cache import bump_island_versions
+from pam.models import Island
+from pam.profiling import percentile
+from pam.synthetic import generate_office
+
+AJAX = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ("Gera escritórios sintéticos de vários tamanhos e mede as views principais pelo "
+            "test client: vazão e latência p50/p95/p99 (o banco é revertido ao final).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[200, 1000, 5000], help="Total de workstations em cada rodada.")
+        parser.add_argument('--per-island', type=int, default=20, help="Workstations por ilha.")
+        parser.add_argument('--islands', type=int, default=10, help="Ilhas por sala.")
+        parser.add_argument('--employees-per-seat', type=float, default=1.5, help="Funcionários por workstation.")
+        parser.add_argument('--requests', type=int, default=50, help="Requisições medidas por view.")
+        parser.add_argument('--warmup', type=int, default=3, help="Requisições descartadas antes da medição.")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        for size in options['sizes']:
+            self.stdout.write(f"\n== {size} PAs ==")
+            self.stdout.write(f"{'view':<32} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+            try:
+                with transaction.atomic(), override_settings(ALLOWED_HOSTS=['testserver']):
+                    island_ids = self._run(size, options)
+                    raise _Rollback
+            except _Rollback:
+                pass
+            # Os ids revertidos serão reutilizados: descarta os fragmentos cacheados na rodada
+            bump_island_versions(island_ids)
+
+    def _run(self, size, options):
+        per_room = options['islands'] * options['per_island']
+        office = generate_office(
+            rooms=max(1, round(size / per_room)),
+            islands_per_room=options['islands'],
+            workstations_per_island=options['per_island'],
+            employees=int(size * options['employees_per_seat']),
+            seed=options['seed'],
+            room_prefix='Benchmark',
+        )
+        island_ids = list(Island.objects.filter(room__in=office.rooms).values_list('pk', flat=True))
+        bump_island_versions(island_ids) # Dentro do atomic o on_commit do gerador não roda
+
+        client = Client()
+        client.force_login(get_user_model().objects.create_user('benchmark', is_staff=True))
+        etag = client.get(reverse('pam:office_view'))['ETag']
+        checks = [
+            ('office_view', lambda: client.get(reverse('pam:office_view'))),
+            ('office_view 304', lambda: client.get(reverse('pam:office_view'), HTTP_IF_NONE_MATCH=etag)),
+            ('admin_office_view', lambda: client.get(reverse('pam:admin_office_view'))),
+            ('manage_employees_view', lambda: client.get(reverse('pam:manage_employees'))),
+            ('employee_search_ajax_view', lambda: client.get(reverse('pam:employee_search_ajax'), {'q': 'ma'}, **AJAX)),
+            ('list_rooms_ajax_view', lambda: client.get(reverse('pam:list_rooms_ajax'), **AJAX)),
+        ]
+        for name, request in checks:
+            self._measure(name, request, options)
+        # Planos das consultas quentes sobre os dados da rodada: um índice
+        # que deixou de ser usado aparece junto dos tempos
+        call_command('explain_hot_queries', stdout=self.stdout, stderr=self.stderr)
+        return island_ids
+
+    def _measure(self, name, request, options):
+        for _ in range(options['warmup']):
+            request()
+        durations = []
+        for _ in range(options['requests']):
+            start = time.perf_counter()
+            response = request()
+            durations.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                self.stderr.write(f"{name}: status {response.status_code}")
+                return
+        durations.sort()
+        ms = [duration * 1000 for duration in durations]
+        self.stdout.write(
+            f"{name:<32} {len(durations) / sum(durations):>8.1f} "
+            f"{percentile(ms, 0.50):>8.1f} {percentile(ms, 0.95):>8.1f} {percentile(ms, 0.99):>8.1f}"
+        )
@@ -0,0 +1,46 @@
+import functools
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from pam.layouts import build_room, clone_room, template_specs
+from pam.models import LayoutTemplate, Room
+
+
+class Command(BaseCommand):
+    help = ("Cria várias salas de uma vez a partir de um modelo de layout (--template) ou copiando "
+            "uma sala existente (--clone). Tudo em uma transação: se uma sala falhar, nenhuma é criada.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='+', help="Nomes das salas novas.")
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument('--template', help="Nome do modelo de layout.")
+        source.add_argument('--clone', help="Nome da sala a copiar.")
+
+    def handle(self, *args, **options):
+        names = options['names']
+        taken = set(Room.objects.filter(name__in=names).values_list('name', flat=True))
+        taken.update(name for name in names if names.count(name) > 1)
+        if taken:
+            raise CommandError(f"Nomes repetidos ou já usados: {', '.join(sorted(taken))}")
+
+        if options['template']:
+            try:
+                specs = template_specs(LayoutTemplate.objects.get(name=options['template']).islands)
+            except LayoutTemplate.DoesNotExist:
+                raise CommandError(f"Modelo não encontrado: {options['template']}")
+            except ValidationError as e:
+                raise CommandError(f"Modelo inválido: {'; '.join(e.messages)}")
+            create = functools.partial(build_room, island_specs=specs)
+        else:
+            try:
+                source_id = Room.objects.values_list('pk', flat=True).get(name=options['clone'])
+            except Room.DoesNotExist:
+                raise CommandError(f"Sala não encontrada: {options['clone']}")
+            create = functools.partial(clone_room, source_id)
+
+        with transaction.atomic():
+            rooms = [create(name) for name in names]
+        total = sum(room.total_count for room in rooms)
+        self.stdout.write(self.style.SUCCESS(f"{len(rooms)} sala(s) criada(s), {total} PAs."))
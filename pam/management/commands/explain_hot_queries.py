@@ -0,0 +1,112 @@
+from collections import namedtuple
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from pam.models import Employee, FloorSnapshot, Island, SeatChange, Workstation
+
+# Consulta quente, onde ela roda e as colunas do índice que o plano deve usar
+HotQuery = namedtuple('HotQuery', ['label', 'source', 'queryset', 'index_columns'])
+
+
+def hot_queries():
+    ids = [1, 2, 3]
+    return [
+        # MAX(updated_at) de cada tabela: lido em todo office_view, lista de
+        # salas e painel, inclusive nas respostas 304. O ORDER BY ... LIMIT 1
+        # tem o mesmo plano do MAX da consulta crua
+        HotQuery(
+            "Última PA alterada (versão do layout)", "cache.get_layout_version",
+            Workstation.objects.order_by('-updated_at').values_list('updated_at')[:1],
+            ['updated_at'],
+        ),
+        HotQuery(
+            "Último funcionário alterado (versão do layout)", "cache.get_layout_version",
+            Employee.objects.order_by('-updated_at').values_list('updated_at')[:1],
+            ['updated_at'],
+        ),
+        HotQuery(
+            "PAs das ilhas em ordem de sequence", "readmodels.load_workstations",
+            Workstation.objects.filter(island_id__in=ids).order_by('island_id', 'sequence').values_list('island_id', 'pk', 'category', 'status'),
+            ['island_id', 'sequence'],
+        ),
+        HotQuery(
+            "PAs de uma categoria em ordem de sequence", "SequenceCounter._create_counter",
+            Workstation.objects.filter(category='INSS').order_by('-sequence').values_list('sequence')[:1],
+            ['category', 'sequence'],
+        ),
+        HotQuery(
+            "PAs vagas por categoria", "allocation._vacant_seats",
+            Workstation.objects.filter(
+                status='UNOCCUPIED', employee__isnull=True, monitor=True, keyboard=True, mouse=True, category__in=['INSS'],
+            ).order_by().values_list('pk', 'island_id'),
+            ['category', 'island_id'],
+        ),
+        HotQuery(
+            "Funcionários sentados", "forms.EmployeeChoiceProvider.__init__",
+            Workstation.objects.filter(employee__isnull=False).order_by().values_list('employee_id', 'id'),
+            ['employee_id'],
+        ),
+        HotQuery(
+            "Funcionários de um setor em ordem de nome", "admin de funcionários, filtro por setor",
+            Employee.objects.filter(sector='INSS').order_by('name').values_list('pk', 'name'),
+            ['sector', 'name'],
+        ),
+        HotQuery(
+            "Funcionários em ordem de nome", "manage_employees_view, forms.EmployeeChoiceProvider.__init__",
+            Employee.objects.order_by('name').values_list('pk', 'name'),
+            ['name'],
+        ),
+        HotQuery(
+            "Ilhas de uma sala em ordem de número", "Island.Meta.ordering",
+            Island.objects.filter(room_id=1).order_by('room', 'island_number').values_list('pk'),
+            ['room_id', 'island_number'],
+        ),
+        HotQuery(
+            "Histórico de uma PA", "audit.history_page",
+            SeatChange.objects.filter(workstation_id=1, id__lt=1000).order_by('-id').values_list('pk')[:50],
+            ['workstation_id', 'id'],
+        ),
+        HotQuery(
+            "Foto anterior a uma data", "snapshots.floor_at",
+            FloorSnapshot.objects.filter(created_at__lte=timezone.now()).order_by('-created_at').values_list('pk')[:1],
+            ['created_at'],
+        ),
+    ]
+
+
+def index_names(model, columns):
+    """Nomes dos índices (inclusive de unique) do model cujas colunas começam por `columns`."""
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, model._meta.db_table)
+    return [
+        name for name, info in constraints.items()
+        if (info['index'] or info['unique']) and not info['primary_key'] and info['columns'][:len(columns)] == columns
+    ]
+
+
+class Command(BaseCommand):
+    help = ("Mostra o EXPLAIN das consultas quentes do pam e se cada uma usa o índice esperado. "
+            "Com --check, termina com erro se algum plano deixar de usar o índice.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help="Falha se algum plano não usar o índice esperado.")
+        parser.add_argument('--verbose-plans', action='store_true', help="Imprime o plano completo de cada consulta.")
+
+    def handle(self, *args, **options):
+        regressions = []
+        for query in hot_queries():
+            plan = query.queryset.explain()
+            names = index_names(query.queryset.model, query.index_columns)
+            used = next((name for name in names if name in plan), None)
+            status = self.style.SUCCESS(f"índice {used}") if used else self.style.WARNING("sem o índice esperado")
+            self.stdout.write(f"{query.label} ({query.source}): {status}")
+            if options['verbose_plans'] or not used:
+                for line in plan.splitlines():
+                    self.stdout.write(f"    {line}")
+            if not used:
+                regressions.append(f"{query.label}: esperado índice em {', '.join(query.index_columns)} ({', '.join(names) or 'nenhum criado'})")
+
+        if regressions and options['check']:
+            raise CommandError("Planos sem o índice esperado:\n" + '\n'.join(regressions))
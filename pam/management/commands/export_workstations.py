@@ -0,0 +1,25 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from pam.exports import CHUNK_SIZE, FORMATS, iter_export
+
+
+class Command(BaseCommand):
+    help = "Exporta todas as PAs (sala, ilha, sequência, categoria, status, funcionário e equipamentos) em CSV ou JSON Lines."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--output', '-o', default='-', help="Arquivo de saída ('-' para a saída padrão).")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Linhas por fetch do banco.")
+
+    def handle(self, *args, **options):
+        if options['output'] == '-':
+            self._write(sys.stdout, options)
+        else:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as f:
+                self._write(f, options)
+
+    def _write(self, out, options):
+        for chunk in iter_export(options['format'], chunk_size=options['chunk_size']):
+            out.write(chunk)
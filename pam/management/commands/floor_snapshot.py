@@ -0,0 +1,20 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from pam.snapshots import prune_snapshots, take_snapshot
+
+
+class Command(BaseCommand):
+    help = "Grava uma foto do escritório, ponto de partida da reconstrução por data. Agende (ex.: cron) a cada poucas horas."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-days', type=int, help="Apaga as fotos mais antigas que N dias (mantendo a mais recente delas).")
+
+    def handle(self, *args, **options):
+        snapshot = take_snapshot()
+        self.stdout.write(self.style.SUCCESS(f"{snapshot} gravada (até a troca {snapshot.last_change_id})."))
+        if options['keep_days'] is not None:
+            deleted = prune_snapshots(timezone.now() - datetime.timedelta(days=options['keep_days']))
+            self.stdout.write(f"{deleted} foto(s) antiga(s) apagada(s).")
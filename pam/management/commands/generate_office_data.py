@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from pam.models import Room
+from pam.synthetic import flush_office, generate_office
+
+
+class Command(BaseCommand):
+    help = "Gera salas, ilhas, PAs e funcionários sintéticos em lote (determinístico com --seed)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=5, help="Número de salas.")
+        parser.add_argument('--islands', type=int, default=8, help="Ilhas por sala.")
+        parser.add_argument('--workstations', type=int, default=20, help="Workstations por ilha.")
+        parser.add_argument('--employees', type=int, default=1000, help="Total de funcionários.")
+        parser.add_argument('--occupancy', type=float, default=0.8, help="Fração das PAs a ocupar (0 a 1).")
+        parser.add_argument('--seed', type=int, default=None, help="Semente para gerar sempre os mesmos dados.")
+        parser.add_argument('--prefix', default='Sala', help="Prefixo do nome das salas.")
+        parser.add_argument('--flush', action='store_true', help="Apaga salas, PAs, funcionários, contadores, histórico e fotos antes de gerar.")
+
+    def handle(self, *args, **options):
+        if not 0 <= options['occupancy'] <= 1:
+            raise CommandError("--occupancy deve estar entre 0 e 1.")
+        if min(options['rooms'], options['islands'], options['workstations']) <= 0 or options['employees'] < 0:
+            raise CommandError("As quantidades devem ser positivas.")
+
+        if options['flush']:
+            deleted = flush_office()
+            self.stdout.write(f"Dados existentes apagados ({sum(deleted.values())} linhas).")
+
+        names = [f"{options['prefix']} {number:03d}" for number in range(1, options['rooms'] + 1)]
+        if Room.objects.filter(name__in=names).exists():
+            raise CommandError(f"Já existem salas com o prefixo '{options['prefix']}'. Use --prefix ou --flush.")
+
+        start = time.perf_counter()
+        try:
+            office = generate_office(
+                rooms=options['rooms'],
+                islands_per_room=options['islands'],
+                workstations_per_island=options['workstations'],
+                employees=options['employees'],
+                occupancy=options['occupancy'],
+                seed=options['seed'],
+                room_prefix=options['prefix'],
+            )
+        except IntegrityError as e:
+            # CPF ou email repetido com funcionários já existentes (mesma semente, por exemplo)
+            raise CommandError(f"Conflito com dados existentes: {e}. Use outra --seed ou --flush.")
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(office.rooms)} salas, {office.islands} ilhas, {office.workstations} PAs e "
+            f"{len(office.employees)} funcionários ({office.seated} sentados) criados em {elapsed:.2f}s."
+        ))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from pam.importers import DEFAULT_BATCH_SIZE, EmployeeImportError, import_employees
+
+
+class Command(BaseCommand):
+    help = "Importa funcionários de um CSV (nome, cpf, email, telefone, setor), criando ou atualizando pelo CPF."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Arquivo CSV (UTF-8, separado por ',' ou ';').")
+        parser.add_argument('--dry-run', action='store_true', help="Valida e mostra o resultado sem gravar.")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Linhas por lote.")
+        parser.add_argument('--delimiter', default=None, help="Separador (detectado pelo cabeçalho se omitido).")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as f:
+                report = import_employees(f, dry_run=options['dry_run'], batch_size=options['batch_size'], delimiter=options['delimiter'])
+        except (OSError, EmployeeImportError, DatabaseError) as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - start
+
+        for error in report.errors:
+            self.stderr.write(f"Linha {error.line} (CPF {error.cpf or '-'}): {error.message}")
+        if report.error_count > len(report.errors):
+            self.stderr.write(f"... e mais {report.error_count - len(report.errors)} linha(s) com erro.")
+        style = self.style.WARNING if report.error_count else self.style.SUCCESS
+        self.stdout.write(style(f"{report.summary()} ({elapsed:.2f}s)"))
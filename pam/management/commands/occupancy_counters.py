@@ -0,0 +1,49 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from pam.counters import COUNTER_FIELDS, expected_island_counters, refresh_island_counters, refresh_room_counters
+from pam.models import Island, Room
+
+
+class Command(BaseCommand):
+    help = "Confere os contadores de ocupação de ilhas e salas contra as workstations; com --fix, recalcula."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help="Recalcula todos os contadores antes de conferir.")
+
+    def handle(self, *args, **options):
+        if options['fix']:
+            with transaction.atomic():
+                refresh_island_counters()
+                refresh_room_counters()
+            self.stdout.write("Contadores recalculados.")
+
+        mismatches = self.verify()
+        for line in mismatches:
+            self.stderr.write(line)
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} contador(es) divergente(s). Rode com --fix para recalcular.")
+        self.stdout.write(self.style.SUCCESS("Contadores de ocupação conferem."))
+
+    def verify(self):
+        expected_islands = expected_island_counters()
+        expected_rooms = {}
+        mismatches = []
+
+        for island in Island.objects.select_related('room').order_by('room__name', 'island_number'):
+            expected = expected_islands.get(island.pk, dict.fromkeys(COUNTER_FIELDS, 0))
+            expected_rooms.setdefault(island.room_id, Counter()).update(expected)
+            mismatches.extend(self._compare(island, expected))
+
+        for room in Room.objects.order_by('name'):
+            expected = expected_rooms.get(room.pk, Counter())
+            mismatches.extend(self._compare(room, {field: expected[field] for field in COUNTER_FIELDS}))
+        return mismatches
+
+    def _compare(self, obj, expected):
+        return [
+            f"{obj}: {field} = {getattr(obj, field)}, esperado {expected[field]}"
+            for field in COUNTER_FIELDS if getattr(obj, field) != expected[field]
+        ]
@@ -0,0 +1,30 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from pam.audit import compact_history, purge_history
+
+
+class Command(BaseCommand):
+    help = "Manutenção do histórico de PAs: apaga linhas além do prazo de retenção e compacta as antigas."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-days', type=int, help="Apaga as trocas mais antigas que N dias.")
+        parser.add_argument('--compact-days', type=int, help="Junta as trocas de cada PA por dia quando mais antigas que N dias.")
+
+    def handle(self, *args, **options):
+        if options['retention_days'] is None and options['compact_days'] is None:
+            raise CommandError("Informe --retention-days e/ou --compact-days.")
+        now = timezone.now()
+
+        if options['retention_days'] is not None:
+            deleted = purge_history(now - datetime.timedelta(days=options['retention_days']))
+            self.stdout.write(f"Retenção: {deleted} linha(s) apagada(s).")
+
+        if options['compact_days'] is not None:
+            # Dias inteiros, para não compactar pela metade o dia em andamento
+            cutoff = timezone.localtime(now - datetime.timedelta(days=options['compact_days']))
+            cutoff = cutoff.replace(hour=0, minute=0, second=0, microsecond=0)
+            deleted, rewritten = compact_history(cutoff)
+            self.stdout.write(f"Compactação: {deleted} linha(s) apagada(s), {rewritten} reescrita(s).")
@@ -0,0 +1,33 @@
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from pam.routers import replica_alias
+
+
+class Command(BaseCommand):
+    help = ("Copia o banco SQLite principal para o arquivo da réplica (SQLITE_REPLICA_PATH). "
+            "Faz o papel da replicação ao testar localmente as leituras em réplica; "
+            "rode de novo (ou via cron) para atualizá-la.")
+
+    def handle(self, *args, **options):
+        alias = replica_alias()
+        if alias is None:
+            raise CommandError("Nenhuma réplica configurada (defina SQLITE_REPLICA_PATH).")
+        primary, replica = connections.settings['default'], connections.settings[alias]
+        if replica['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError("Só réplicas SQLite locais; no PostgreSQL, use a replicação do próprio banco.")
+        if str(primary['NAME']) == str(replica['NAME']):
+            raise CommandError("A réplica aponta para o mesmo arquivo do banco principal.")
+
+        connections[alias].close()
+        source = connections['default']
+        source.ensure_connection()
+        # backup() copia um estado consistente mesmo com o WAL em uso
+        target = sqlite3.connect(replica['NAME'])
+        try:
+            source.connection.backup(target)
+        finally:
+            target.close()
+        self.stdout.write(self.style.SUCCESS(f"Réplica atualizada: {replica['NAME']}"))
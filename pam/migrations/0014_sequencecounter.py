@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:59
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def seed_counters(apps, schema_editor):
+    # Cada contador parte da maior sequência já usada na categoria
+    Workstation = apps.get_model('pam', 'Workstation')
+    SequenceCounter = apps.get_model('pam', 'SequenceCounter')
+    last_by_category = (
+        Workstation.objects.exclude(category='').order_by()
+        .values('category').annotate(last=Max('sequence'))
+    )
+    SequenceCounter.objects.bulk_create(
+        [SequenceCounter(category=row['category'], last_value=row['last'] or 0) for row in last_by_category]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pam', '0013_alter_employee_cpf_alter_employee_phone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SequenceCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=20, unique=True, verbose_name='Categoria')),
+                ('last_value', models.PositiveIntegerField(default=0, verbose_name='Última Sequência')),
+            ],
+            options={
+                'verbose_name': 'Contador de Sequência',
+                'verbose_name_plural': 'Contadores de Sequência',
+            },
+        ),
+        migrations.AlterField(
+            model_name='employee',
+            name='sector',
+            field=models.CharField(choices=[('INSS', 'INSS'), ('SIAPE_LEO', 'SIAPE Leo'), ('SIAPE_DION', 'SIAPE Dion'), ('ESTAGIO', 'Estágio')], max_length=20, verbose_name='Setor'),
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:01
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+def fill_search_name(apps, schema_editor):
+    # Cópia de pam.models.normalize_search_text, congelada para a migração
+    def normalize(value):
+        decomposed = unicodedata.normalize('NFKD', value or '')
+        return ''.join(char for char in decomposed if not unicodedata.combining(char)).casefold().strip()
+
+    Employee = apps.get_model('pam', 'Employee')
+    employees = list(Employee.objects.only('id', 'name'))
+    for employee in employees:
+        employee.search_name = normalize(employee.name)
+    Employee.objects.bulk_update(employees, ['search_name'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pam', '0014_sequencecounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='search_name',
+            field=models.CharField(default='', editable=False, max_length=100),
+        ),
+        migrations.RunPython(fill_search_name, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['sector', 'search_name'], name='employee_sector_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['search_name'], name='employee_search_idx'),
+        ),
+    ]
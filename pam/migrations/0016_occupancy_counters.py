@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:17
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    # Mesmo cálculo de pam.counters.refresh_*_counters, congelado para a migração
+    Island = apps.get_model('pam', 'Island')
+    Room = apps.get_model('pam', 'Room')
+    Workstation = apps.get_model('pam', 'Workstation')
+
+    def count(**filters):
+        workstations = Workstation.objects.filter(island=OuterRef('pk'), **filters).order_by().values('island')
+        return Coalesce(Subquery(workstations.annotate(total=Count('pk')).values('total')), 0)
+
+    Island.objects.update(
+        occupied_count=count(status='OCCUPIED'),
+        vacant_count=count(status='UNOCCUPIED'),
+        maintenance_count=count(status='MAINTENANCE'),
+        total_count=count(),
+    )
+
+    def total(field):
+        islands = Island.objects.filter(room=OuterRef('pk')).order_by().values('room')
+        return Coalesce(Subquery(islands.annotate(total=Sum(field)).values('total')), 0)
+
+    Room.objects.update(**{field: total(field) for field in ('occupied_count', 'vacant_count', 'maintenance_count', 'total_count')})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pam', '0015_employee_search_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='island',
+            name='maintenance_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='PAs em Manutenção'),
+        ),
+        migrations.AddField(
+            model_name='island',
+            name='occupied_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='PAs Ocupadas'),
+        ),
+        migrations.AddField(
+            model_name='island',
+            name='total_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Total de PAs'),
+        ),
+        migrations.AddField(
+            model_name='island',
+            name='vacant_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='PAs Vagas'),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='maintenance_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='PAs em Manutenção'),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='occupied_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='PAs Ocupadas'),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='total_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Total de PAs'),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='vacant_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='PAs Vagas'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:19
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def resolve_double_bookings(apps, schema_editor):
+    """Mantém cada funcionário só na PA alterada mais recentemente; as outras ficam vagas."""
+    Workstation = apps.get_model('pam', 'Workstation')
+    Island = apps.get_model('pam', 'Island')
+    Room = apps.get_model('pam', 'Room')
+
+    duplicated = (
+        Workstation.objects.filter(employee__isnull=False).order_by()
+        .values('employee_id').annotate(seats=Count('pk')).filter(seats__gt=1).values('employee_id')
+    )
+    released, kept = [], set()
+    for workstation in Workstation.objects.filter(employee_id__in=duplicated).order_by('employee_id', '-updated_at', '-pk'):
+        if workstation.employee_id not in kept:
+            kept.add(workstation.employee_id)
+            continue
+        workstation.employee = None
+        if workstation.status == 'OCCUPIED':
+            workstation.status = 'UNOCCUPIED'
+        released.append(workstation)
+    if not released:
+        return
+    Workstation.objects.bulk_update(released, ['employee', 'status'], batch_size=500)
+
+    # Contadores de ocupação das ilhas/salas afetadas (mesmo cálculo de pam.counters)
+    island_ids = {workstation.island_id for workstation in released if workstation.island_id}
+
+    def count(**filters):
+        workstations = Workstation.objects.filter(island=OuterRef('pk'), **filters).order_by().values('island')
+        return Coalesce(Subquery(workstations.annotate(total=Count('pk')).values('total')), 0)
+
+    def total(field):
+        islands = Island.objects.filter(room=OuterRef('pk')).order_by().values('room')
+        return Coalesce(Subquery(islands.annotate(total=Sum(field)).values('total')), 0)
+
+    Island.objects.filter(pk__in=island_ids).update(
+        occupied_count=count(status='OCCUPIED'),
+        vacant_count=count(status='UNOCCUPIED'),
+        maintenance_count=count(status='MAINTENANCE'),
+        total_count=count(),
+    )
+    Room.objects.filter(islands__in=island_ids).update(
+        **{field: total(field) for field in ('occupied_count', 'vacant_count', 'maintenance_count', 'total_count')}
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pam', '0016_occupancy_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(resolve_double_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='workstation',
+            constraint=models.UniqueConstraint(condition=models.Q(('employee__isnull', False)), fields=('employee',), name='workstation_one_seat_per_employee', violation_error_message='Este funcionário já ocupa outra PA.'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pam', '0017_one_seat_per_employee'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatChange',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(verbose_name='Data')),
+                ('workstation_id', models.PositiveIntegerField(verbose_name='PA')),
+                ('old_employee_id', models.PositiveIntegerField(null=True, verbose_name='Funcionário anterior')),
+                ('new_employee_id', models.PositiveIntegerField(null=True, verbose_name='Funcionário novo')),
+                ('old_status', models.PositiveSmallIntegerField(choices=[(1, 'Ocupada'), (2, 'Vaga'), (3, 'Manutenção')], verbose_name='Status anterior')),
+                ('new_status', models.PositiveSmallIntegerField(choices=[(1, 'Ocupada'), (2, 'Vaga'), (3, 'Manutenção')], verbose_name='Status novo')),
+                ('user_id', models.PositiveIntegerField(null=True, verbose_name='Usuário')),
+                ('source', models.PositiveSmallIntegerField(choices=[(1, 'Admin'), (2, 'Alocação automática'), (3, 'Edição individual')], verbose_name='Origem')),
+            ],
+            options={
+                'verbose_name': 'Troca de PA',
+                'verbose_name_plural': 'Histórico de PAs',
+                'indexes': [models.Index(fields=['workstation_id', 'id'], name='seatchange_workstation_idx'), models.Index(fields=['created_at'], name='seatchange_created_idx')],
+            },
+        ),
+    ]
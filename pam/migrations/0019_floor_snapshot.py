@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pam', '0018_seat_change_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FloorSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(db_index=True, verbose_name='Data')),
+                ('last_change_id', models.BigIntegerField(default=0, verbose_name='Última troca incluída')),
+                ('workstation_count', models.PositiveIntegerField(default=0, verbose_name='PAs')),
+                ('data', models.JSONField(verbose_name='Dados')),
+            ],
+            options={
+                'verbose_name': 'Foto do Escritório',
+                'verbose_name_plural': 'Fotos do Escritório',
+            },
+        ),
+    ]
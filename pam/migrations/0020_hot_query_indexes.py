@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pam', '0019_floor_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['name'], name='employee_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['sector', 'name'], name='employee_sector_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workstation',
+            index=models.Index(fields=['island', 'sequence'], name='workstation_island_seq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workstation',
+            index=models.Index(condition=models.Q(('employee__isnull', True), ('status', 'UNOCCUPIED')), fields=['category', 'island'], name='workstation_vacant_idx'),
+        ),
+        migrations.AlterField(
+            model_name='workstation',
+            name='island',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='workstations', to='pam.island', verbose_name='Ilha'),
+        ),
+    ]
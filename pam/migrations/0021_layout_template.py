@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:51
+
+from collections import Counter
+
+from django.db import migrations, models
+
+# Categorias fixas que o builder aplicava às primeiras ilhas destas salas
+ROOM_CATEGORY_OVERRIDES = {
+    'Sala 1': {1: 'INSS', 2: 'ESTAGIO'},
+    'Sala 2': {1: 'SIAPE_DION', 2: 'SIAPE_LEO'},
+}
+
+# PAs por ilha quando a sala ainda não existe (editável no admin)
+DEFAULT_WORKSTATIONS = 10
+
+
+def seed_templates(apps, schema_editor):
+    # Os casos especiais viram modelos: o layout atual da sala, se ela existir
+    Island = apps.get_model('pam', 'Island')
+    Workstation = apps.get_model('pam', 'Workstation')
+    LayoutTemplate = apps.get_model('pam', 'LayoutTemplate')
+    for name, overrides in ROOM_CATEGORY_OVERRIDES.items():
+        islands = []
+        for island in Island.objects.filter(room__name=name).order_by('island_number'):
+            categories = Counter(Workstation.objects.filter(island=island).values_list('category', flat=True))
+            if categories:
+                category = overrides.get(island.island_number, categories.most_common(1)[0][0])
+                islands.append({'workstations': sum(categories.values()), 'category': category})
+        if not islands:
+            islands = [{'workstations': DEFAULT_WORKSTATIONS, 'category': category} for _, category in sorted(overrides.items())]
+        LayoutTemplate.objects.create(name=name, islands=islands)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pam', '0020_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LayoutTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Nome do Modelo')),
+                ('islands', models.JSONField(default=list, verbose_name='Ilhas')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Modelo de Layout',
+                'verbose_name_plural': 'Modelos de Layout',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.RunPython(seed_templates, migrations.RunPython.noop),
+    ]
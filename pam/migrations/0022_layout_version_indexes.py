@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pam', '0021_layout_template'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['updated_at'], name='employee_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workstation',
+            index=models.Index(fields=['updated_at'], name='workstation_updated_idx'),
+        ),
+    ]
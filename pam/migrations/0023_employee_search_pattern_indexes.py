@@ -0,0 +1,40 @@
+from django.db import migrations
+
+# No PostgreSQL o autocomplete filtra por LIKE 'prefixo%' (ver
+# views._search_name_prefix), que só usa índices com varchar_pattern_ops
+# quando a collation do banco não é 'C'. No SQLite a busca é um intervalo
+# sobre os índices que já existem, e estes índices seriam só cópias deles.
+PATTERN_INDEXES = [
+    ('employee_search_prefix_idx', ['search_name']),
+    ('employee_sector_prefix_idx', ['sector', 'search_name']),
+]
+
+
+def create_pattern_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Employee = apps.get_model('pam', 'Employee')
+    quote = schema_editor.quote_name
+    for name, columns in PATTERN_INDEXES:
+        schema_editor.execute('CREATE INDEX {} ON {} ({})'.format(
+            quote(name), quote(Employee._meta.db_table),
+            ', '.join(f'{quote(column)} varchar_pattern_ops' for column in columns),
+        ))
+
+
+def drop_pattern_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in PATTERN_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(name)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pam', '0022_layout_version_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_pattern_indexes, drop_pattern_indexes),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:24
+
+from django.db import migrations, models
+
+
+def fill_cpf_digits(apps, schema_editor):
+    Employee = apps.get_model('pam', 'Employee')
+    employees = list(Employee.objects.only('id', 'cpf'))
+    for employee in employees:
+        employee.cpf_digits = ''.join(filter(str.isdigit, employee.cpf or ''))
+    Employee.objects.bulk_update(employees, ['cpf_digits'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pam', '0023_employee_search_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='cpf_digits',
+            field=models.CharField(default='', editable=False, max_length=11),
+        ),
+        migrations.RunPython(fill_cpf_digits, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['cpf_digits'], name='employee_cpf_digits_idx'),
+        ),
+    ]
@@ -1,8 +1,26 @@
-from django.db import models
+import unicodedata
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Max
 from django.core.validators import MinLengthValidator
-from django.db.models.signals import pre_delete
+from django.db.models.signals import pre_delete, post_delete, post_save
 from django.dispatch import receiver
 
+from .audit import SOURCE_EDIT, record_seat_changes
+from .cache import bump_island_versions_on_commit
+from .counters import COUNTER_FIELDS, apply_status_deltas, refresh_island_counters, refresh_room_counters, status_change_deltas
+from .events import publish_seat_changes_on_commit
+
+def normalize_search_text(value):
+    """Forma de busca de um nome: minúsculas e sem acentos ("José" -> "jose")."""
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).casefold().strip()
+
+
+def only_digits(value):
+    return ''.join(filter(str.isdigit, value or ''))
+
+
 class Employee(models.Model):
     SECTOR_CHOICES = [
         ('INSS', 'INSS'),
@@ -20,6 +38,11 @@ class Employee(models.Model):
         choices=SECTOR_CHOICES,
         verbose_name="Setor",
     )
+    # Nome normalizado (ver normalize_search_text), mantido pelo save() para a busca por prefixo
+    search_name = models.CharField(max_length=100, editable=False, default='')
+    # Só os dígitos do CPF, mantidos pelo save(): o cpf é gravado como digitado
+    # e a importação casa linhas com funcionários por aqui
+    cpf_digits = models.CharField(max_length=11, editable=False, default='')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -27,13 +50,58 @@ class Employee(models.Model):
         verbose_name = "Funcionário"
         verbose_name_plural = "Funcionários"
         ordering = ['name']
+        indexes = [
+            # Autocomplete: setor + prefixo do nome, já na ordem de exibição
+            models.Index(fields=['sector', 'search_name'], name='employee_sector_search_idx'),
+            models.Index(fields=['search_name'], name='employee_search_idx'),
+            # Ordem padrão (nome), sozinha e dentro de um setor
+            models.Index(fields=['name'], name='employee_name_idx'),
+            models.Index(fields=['sector', 'name'], name='employee_sector_name_idx'),
+            # MAX(updated_at) da versão do layout (cache.get_layout_version)
+            models.Index(fields=['updated_at'], name='employee_updated_idx'),
+            # Upsert da importação CSV pelo CPF, em qualquer formato
+            models.Index(fields=['cpf_digits'], name='employee_cpf_digits_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.search_name = normalize_search_text(self.name)
+        self.cpf_digits = only_digits(self.cpf)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            # Campos derivados acompanham a origem
+            for source, derived in (('name', 'search_name'), ('cpf', 'cpf_digits')):
+                if source in update_fields and derived not in update_fields:
+                    update_fields = [*update_fields, derived]
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
 
     def __str__(self):
         # Display only the name, sector is handled elsewhere
         return self.name
 
 
-class Room(models.Model):
+class OccupancyCounters(models.Model):
+    """Contadores de PAs por status, mantidos pelas escritas de Workstation (ver pam/counters.py)."""
+    occupied_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="PAs Ocupadas")
+    vacant_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="PAs Vagas")
+    maintenance_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="PAs em Manutenção")
+    total_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Total de PAs")
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        # Um save comum não pode regravar contadores lidos antes de outra
+        # transação incrementá-los: fora da criação, eles ficam de fora
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+
+class Room(OccupancyCounters):
     name = models.CharField(max_length=100, unique=True, verbose_name="Nome da Sala")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -46,7 +114,7 @@ class Room(models.Model):
     def __str__(self):
         return self.name
 
-class Island(models.Model):
+class Island(OccupancyCounters):
     room = models.ForeignKey(Room, related_name='islands', on_delete=models.CASCADE, verbose_name='Sala')
     island_number = models.PositiveIntegerField(verbose_name='Número da Ilha')
     category = models.CharField(max_length=50, blank=True, null=True, verbose_name='Categoria da Ilha')
@@ -59,10 +127,68 @@ class Island(models.Model):
         unique_together = ('room', 'island_number')
         ordering = ['room', 'island_number']
 
+    # Sala carregada do banco, para recalcular os contadores das duas salas se a ilha mudar de sala
+    _loaded_room_id = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_room_id = instance.__dict__.get('room_id')
+        return instance
+
     def __str__(self):
         return f"Sala {self.room.name} - Ilha {self.island_number}"
 
 
+class SequenceCounterManager(models.Manager):
+    def allocate(self, category, count=1):
+        """Reserva `count` sequências consecutivas da categoria e retorna a primeira.
+
+        A reserva é um único UPDATE com incremento no próprio banco: ele trava a
+        linha do contador (ou o banco, no SQLite) até o fim da transação, então
+        inserções concorrentes recebem blocos distintos sem varrer as
+        workstations nem repetir em IntegrityError.
+        """
+        with transaction.atomic():
+            if not self.filter(category=category).update(last_value=F('last_value') + count):
+                self._create_counter(category)
+                self.filter(category=category).update(last_value=F('last_value') + count)
+            last_value = self.filter(category=category).values_list('last_value', flat=True).get()
+        return last_value - count + 1
+
+    def _create_counter(self, category):
+        # Primeira reserva da categoria: parte da maior sequência já existente
+        last = Workstation.objects.filter(category=category).aggregate(last=Max('sequence'))['last'] or 0
+        try:
+            with transaction.atomic():
+                self.create(category=category, last_value=last)
+        except IntegrityError:
+            pass # Outra transação criou o contador primeiro
+
+
+class SequenceCounter(models.Model):
+    """Última sequência reservada de cada categoria de Workstation.
+
+    Sequências definidas à mão (ex.: pelo admin do Django) acima do contador
+    não o avançam; evite editá-las diretamente.
+    """
+    category = models.CharField(max_length=20, unique=True, verbose_name="Categoria")
+    last_value = models.PositiveIntegerField(default=0, verbose_name="Última Sequência")
+
+    objects = SequenceCounterManager()
+
+    class Meta:
+        verbose_name = "Contador de Sequência"
+        verbose_name_plural = "Contadores de Sequência"
+
+    def __str__(self):
+        return f"{self.category}: {self.last_value}"
+
+
+# Campos de que o status da PA é derivado (Workstation.refresh_status)
+STATUS_INPUTS = {'employee', 'employee_id', 'monitor', 'keyboard', 'mouse'}
+
+
 class Workstation(models.Model):
     STATUS_CHOICES = [
         ('OCCUPIED', 'Ocupada'),
@@ -113,7 +239,8 @@ class Workstation(models.Model):
         related_name='workstations',
         verbose_name="Ilha",
         null=True,
-        blank=True
+        blank=True,
+        db_index=False, # Coberto por workstation_island_seq_idx (island, sequence)
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -123,37 +250,266 @@ class Workstation(models.Model):
         verbose_name_plural = "Estações de Trabalho"
         unique_together = [['category', 'sequence']]
         ordering = ['island__room__name', 'island__island_number', 'sequence']
+        # category + sequence já tem o índice do unique_together; a ordem das
+        # ilhas (room, island_number), o do unique_together de Island
+        indexes = [
+            # PAs de cada ilha em ordem de sequence (office_view, fotos)
+            models.Index(fields=['island', 'sequence'], name='workstation_island_seq_idx'),
+            # MAX(updated_at) da versão do layout, lido a cada office_view
+            models.Index(fields=['updated_at'], name='workstation_updated_idx'),
+            # Só as PAs vagas, por categoria (alocação automática)
+            models.Index(
+                fields=['category', 'island'],
+                condition=models.Q(status='UNOCCUPIED', employee__isnull=True),
+                name='workstation_vacant_idx',
+            ),
+        ]
+        constraints = [
+            # Um funcionário ocupa no máximo uma PA; o índice parcial também
+            # serve a consulta "onde este funcionário está sentado"
+            models.UniqueConstraint(
+                fields=['employee'],
+                condition=models.Q(employee__isnull=False),
+                name='workstation_one_seat_per_employee',
+                violation_error_message="Este funcionário já ocupa outra PA.",
+            ),
+        ]
+
+    # Ilha, status e funcionário carregados do banco: a ilha antiga tem o cache
+    # invalidado, os contadores de ocupação recebem a diferença e a troca entra
+    # no histórico (SeatChange) quando a PA muda
+    _loaded_island_id = None
+    _loaded_status = None
+    _loaded_employee_id = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_island_id = instance.__dict__.get('island_id')
+        instance._loaded_status = instance.__dict__.get('status')
+        instance._loaded_employee_id = instance.__dict__.get('employee_id')
+        return instance
+
+    def refresh_status(self):
+        """Deriva o status do funcionário e dos equipamentos (PAs em manutenção ficam como estão)."""
+        if self.status != 'MAINTENANCE':
+            if not self.employee_id:
+                self.status = 'UNOCCUPIED'
+            elif not all([self.monitor, self.keyboard, self.mouse]):
+                self.status = 'MAINTENANCE'
+            else:
+                self.status = 'OCCUPIED'
 
     def save(self, *args, **kwargs):
-        # Só atualiza status automaticamente se não foi definido manualmente
-        if not self.pk or 'status' not in kwargs.get('update_fields', []):
-            if self.status != 'MAINTENANCE':
-                if not self.employee:
-                    self.status = 'UNOCCUPIED'
-                elif not all([self.monitor, self.keyboard, self.mouse]):
-                    self.status = 'MAINTENANCE'
-                else:
-                    self.status = 'OCCUPIED'
+        update_fields = kwargs.get('update_fields')
+        written = None if update_fields is None else set(update_fields)
+
+        # Só atualiza status automaticamente se não foi definido manualmente.
+        # Com update_fields, só quando funcionário ou equipamentos são gravados,
+        # e o status derivado é gravado junto
+        if written is None or ('status' not in written and written & STATUS_INPUTS):
+            self.refresh_status()
+            if written is not None:
+                written.add('status')
         
         if not self.sequence and self.category:
-            last = Workstation.objects.filter(
-                category=self.category
-            ).order_by('-sequence').first()
-            self.sequence = last.sequence + 1 if last else 1
+            self.sequence = SequenceCounter.objects.allocate(self.category)
             
         # If status is set to UNOCCUPIED, ensure no employee is assigned
-        if self.status == 'UNOCCUPIED' and self.employee is not None:
+        if self.status == 'UNOCCUPIED' and self.employee_id is not None and (written is None or 'status' in written):
             self.employee = None
-            
-        super().save(*args, **kwargs)
+            if written is not None:
+                written.add('employee')
+
+        # Com update_fields o auto_now não é gravado; sem ele a versão do
+        # layout (ETag do office_view) não perceberia a alteração
+        if written is not None:
+            written.add('updated_at')
+            kwargs['update_fields'] = [*update_fields, *(written - set(update_fields))]
+
+        # Estado que de fato vai para o banco: com update_fields, campos fora
+        # da lista continuam como foram carregados, mesmo se alterados em memória
+        def saved(value, loaded, *fields):
+            if written is None or written.intersection(fields) or self._loaded_status is None:
+                return value
+            return loaded
+        status = saved(self.status, self._loaded_status, 'status')
+        island_id = saved(self.island_id, self._loaded_island_id, 'island', 'island_id')
+        employee_id = saved(self.employee_id, self._loaded_employee_id, 'employee', 'employee_id')
+
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                apply_status_deltas(status_change_deltas([(self.island_id, None, self.status)]))
+            elif written is None or {'status', 'island', 'island_id'} & written:
+                self._update_counters(island_id, status)
+            if self._loaded_status is not None and (self._loaded_status, self._loaded_employee_id) != (status, employee_id):
+                record_seat_changes([(self.pk, self._loaded_employee_id, employee_id, self._loaded_status, status)], source=SOURCE_EDIT)
+        self._loaded_island_id = island_id
+        self._loaded_status = status
+        self._loaded_employee_id = employee_id
+
+    def _update_counters(self, island_id, status):
+        if self._loaded_status is None:
+            # Instância montada à mão (não veio do banco): o estado anterior é desconhecido
+            refresh_island_counters([island_id])
+            refresh_room_counters(Island.objects.filter(pk=island_id).values('room_id'))
+        elif (self._loaded_island_id, self._loaded_status) != (island_id, status):
+            apply_status_deltas(status_change_deltas([
+                (self._loaded_island_id, self._loaded_status, None),
+                (island_id, None, status),
+            ]))
 
     def __str__(self):
         location = f"Sala {self.island.room.name}, Ilha {self.island.island_number}" if self.island else f"Categoria {self.category}"
         return f"PA {location} Seq {self.sequence} - {self.employee.name if self.employee else 'Sem funcionário'}"
 
-# Signal to handle related objects upon Room deletion if needed more granularly than CASCADE
-# (Optional, CASCADE should handle basic deletion)
-# @receiver(pre_delete, sender=Room)
-# def room_delete_handler(sender, instance, **kwargs):
-#     # Custom logic before a room is deleted, if necessary
-#     pass
+class SeatChange(models.Model):
+    """Histórico somente de inserção das trocas de funcionário e status das PAs.
+
+    As colunas são inteiros (ids e códigos de status), sem chaves estrangeiras:
+    o histórico sobrevive à remoção de PAs, funcionários e usuários, e cada
+    linha fica pequena. Escrito em lote por pam/audit.py.
+    """
+    STATUS_CODE_CHOICES = [(1, 'Ocupada'), (2, 'Vaga'), (3, 'Manutenção')]
+    SOURCE_CHOICES = [
+        (1, 'Admin'),
+        (2, 'Alocação automática'),
+        (3, 'Edição individual'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    created_at = models.DateTimeField(verbose_name="Data")
+    workstation_id = models.PositiveIntegerField(verbose_name="PA")
+    old_employee_id = models.PositiveIntegerField(null=True, verbose_name="Funcionário anterior")
+    new_employee_id = models.PositiveIntegerField(null=True, verbose_name="Funcionário novo")
+    old_status = models.PositiveSmallIntegerField(choices=STATUS_CODE_CHOICES, verbose_name="Status anterior")
+    new_status = models.PositiveSmallIntegerField(choices=STATUS_CODE_CHOICES, verbose_name="Status novo")
+    user_id = models.PositiveIntegerField(null=True, verbose_name="Usuário")
+    source = models.PositiveSmallIntegerField(choices=SOURCE_CHOICES, verbose_name="Origem")
+
+    class Meta:
+        verbose_name = "Troca de PA"
+        verbose_name_plural = "Histórico de PAs"
+        indexes = [
+            # Histórico de uma PA, paginado por id (keyset)
+            models.Index(fields=['workstation_id', 'id'], name='seatchange_workstation_idx'),
+            # Retenção e compactação por data
+            models.Index(fields=['created_at'], name='seatchange_created_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("O histórico de PAs é somente de inserção.")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"PA {self.workstation_id}: {self.get_old_status_display()} -> {self.get_new_status_display()} em {self.created_at:%d/%m/%Y %H:%M}"
+
+
+class FloorSnapshot(models.Model):
+    """Foto completa do escritório (salas, ilhas e PAs) em um instante.
+
+    Serve de ponto de partida para reconstruir o office_view em uma data: o
+    estado da foto mais próxima mais as trocas do SeatChange até lá (ver
+    pam/snapshots.py). `last_change_id` é a última troca já refletida na foto.
+    """
+    created_at = models.DateTimeField(db_index=True, verbose_name="Data")
+    last_change_id = models.BigIntegerField(default=0, verbose_name="Última troca incluída")
+    workstation_count = models.PositiveIntegerField(default=0, verbose_name="PAs")
+    data = models.JSONField(verbose_name="Dados")
+
+    class Meta:
+        verbose_name = "Foto do Escritório"
+        verbose_name_plural = "Fotos do Escritório"
+
+    def __str__(self):
+        return f"Foto de {self.created_at:%d/%m/%Y %H:%M} ({self.workstation_count} PAs)"
+
+
+class LayoutTemplate(models.Model):
+    """Layout de sala reutilizável: ilhas com número de PAs e categoria.
+
+    `islands` é uma lista [{"workstations": 10, "category": "INSS"}, ...], na
+    ordem das ilhas. O modal de nova sala preenche os campos a partir dele e
+    build_room_from_template cria a sala direto (ver pam/layouts.py).
+    """
+    name = models.CharField(max_length=100, unique=True, verbose_name="Nome do Modelo")
+    islands = models.JSONField(default=list, verbose_name="Ilhas")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Modelo de Layout"
+        verbose_name_plural = "Modelos de Layout"
+        ordering = ['name']
+
+    def clean(self):
+        from .layouts import template_islands, template_specs
+        # Normaliza rótulos de categoria ('SIAPE Dion') para as chaves
+        self.islands = template_islands(template_specs(self.islands))
+
+    @property
+    def workstation_count(self):
+        return sum(island['workstations'] for island in self.islands)
+
+    def __str__(self):
+        return f"{self.name} ({len(self.islands)} ilhas, {self.workstation_count} PAs)"
+
+# --- Invalidação do cache de fragmentos do office_view (ver pam/cache.py) ---
+
+@receiver(post_save, sender=Workstation)
+@receiver(post_delete, sender=Workstation)
+def workstation_changed_handler(sender, instance, **kwargs):
+    # Uma PA movida de ilha invalida também a ilha de origem
+    bump_island_versions_on_commit([instance.island_id, instance._loaded_island_id])
+
+
+@receiver(post_save, sender=Workstation)
+def workstation_saved_push_handler(sender, instance, **kwargs):
+    # Push SSE para os quadros abertos (ver pam/events.py)
+    publish_seat_changes_on_commit([instance])
+
+
+@receiver(post_save, sender=Island)
+@receiver(post_delete, sender=Island)
+def island_changed_handler(sender, instance, **kwargs):
+    bump_island_versions_on_commit([instance.pk])
+
+
+# --- Contadores de ocupação de Island/Room (ver pam/counters.py) ---
+
+def _origin_model(origin):
+    # O delete() pode ter partido de uma instância ou de um QuerySet
+    return origin.model if isinstance(origin, models.QuerySet) else type(origin)
+
+
+@receiver(post_delete, sender=Workstation)
+def workstation_deleted_counters_handler(sender, instance, origin=None, **kwargs):
+    if _origin_model(origin) in (Island, Room):
+        return  # Ilha ou sala inteira removida: tratado no handler da ilha
+    apply_status_deltas(status_change_deltas([(instance.island_id, instance.status, None)]))
+
+
+@receiver(post_delete, sender=Island)
+def island_deleted_counters_handler(sender, instance, origin=None, **kwargs):
+    if _origin_model(origin) is not Room:
+        refresh_room_counters([instance.room_id])
+
+
+@receiver(post_save, sender=Island)
+def island_moved_counters_handler(sender, instance, created=False, **kwargs):
+    if not created and instance._loaded_room_id not in (None, instance.room_id):
+        refresh_room_counters([instance._loaded_room_id, instance.room_id])
+    instance._loaded_room_id = instance.room_id
+
+
+@receiver(post_save, sender=Employee)
+@receiver(pre_delete, sender=Employee)
+def employee_changed_handler(sender, instance, created=False, **kwargs):
+    if created:
+        return  # Funcionário novo ainda não ocupa nenhuma PA
+    # No pre_delete as PAs ainda apontam para o funcionário (o SET_NULL vem depois)
+    island_ids = Workstation.objects.filter(employee=instance).values_list('island_id', flat=True)
+    bump_island_versions_on_commit(island_ids)
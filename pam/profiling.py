@@ -0,0 +1,200 @@
+"""Medição opcional do custo das requisições das views do pam.
+
+Ative com PAM_PROFILING=True no ambiente. Para cada requisição de uma view
+do app, o QueryProfilingMiddleware registra número de consultas, tempo total
+de SQL, tempo de renderização de templates e tempo total. Requisições lentas
+e consultas repetidas (padrão N+1) vão para o logger 'pam'; os percentis
+agregados por view ficam disponíveis em profiling_stats_view.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import Template as DjangoTemplate
+
+logger = logging.getLogger(__name__)
+
+# Views de stream ou da própria medição não entram nas estatísticas
+EXCLUDED_URL_NAMES = {'seat_events', 'profiling_stats'}
+
+METRICS = ('wall_ms', 'sql_ms', 'template_ms', 'queries')
+
+_current = ContextVar('pam_profile', default=None)
+
+_FINGERPRINT_RULES = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),        # literais de texto
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),     # números
+    (re.compile(r'\((?:\s*(?:\?|%s)\s*,?)+\)'), '(...)'),  # listas do IN
+    (re.compile(r'\s+'), ' '),
+]
+
+
+def fingerprint(sql):
+    """SQL sem os valores, para agrupar consultas iguais com parâmetros diferentes."""
+    for pattern, replacement in _FINGERPRINT_RULES:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+class RequestProfile:
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        # Assinatura de connection.execute_wrapper
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_seconds += time.perf_counter() - start
+            self.queries += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+
+class ProfileStore:
+    """Últimas amostras de cada view, em memória do processo."""
+
+    def __init__(self, max_samples):
+        self.max_samples = max_samples
+        self._samples = defaultdict(lambda: deque(maxlen=self.max_samples))
+        self._lock = threading.Lock()
+
+    def add(self, view_name, sample):
+        with self._lock:
+            self._samples[view_name].append(sample)
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self):
+        with self._lock:
+            samples = {view_name: list(values) for view_name, values in self._samples.items()}
+        return {view_name: summarize(values) for view_name, values in sorted(samples.items())}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(samples):
+    summary = {'count': len(samples)}
+    for metric in METRICS:
+        values = sorted(sample[metric] for sample in samples)
+        summary[metric] = {
+            'p50': percentile(values, 0.50),
+            'p95': percentile(values, 0.95),
+            'p99': percentile(values, 0.99),
+            'max': values[-1] if values else None,
+        }
+    return summary
+
+
+store = ProfileStore(getattr(settings, 'PAM_PROFILING_MAX_SAMPLES', 1000))
+
+class TemplateTiming:
+    """Soma o tempo de cada render de template ao perfil da requisição atual.
+
+    Context manager: o render do backend de templates só é trocado enquanto
+    houver alguma requisição medida em andamento, e a última a terminar
+    devolve o original. Entradas simultâneas compartilham o mesmo wrapper.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = 0
+        self._original = None
+
+    def __enter__(self):
+        with self._lock:
+            if self._active == 0:
+                self._original = original = DjangoTemplate.render
+
+                def render(template, context=None, request=None):
+                    profile = _current.get()
+                    if profile is None:
+                        return original(template, context, request)
+                    start = time.perf_counter()
+                    try:
+                        return original(template, context, request)
+                    finally:
+                        profile.template_seconds += time.perf_counter() - start
+
+                DjangoTemplate.render = render
+            self._active += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        with self._lock:
+            self._active -= 1
+            if self._active == 0:
+                DjangoTemplate.render = self._original
+                self._original = None
+
+
+template_timing = TemplateTiming()
+
+
+class QueryProfilingMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'PAM_PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, 'PAM_PROFILING_SLOW_MS', 500)
+        self.duplicate_threshold = getattr(settings, 'PAM_PROFILING_DUPLICATE_THRESHOLD', 5)
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        token = _current.set(profile)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                stack.enter_context(template_timing)
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        wall_seconds = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        if match is None or match.app_name != 'pam' or match.url_name in EXCLUDED_URL_NAMES:
+            return response
+        self.record(match.view_name, request, profile, wall_seconds)
+        return response
+
+    def record(self, view_name, request, profile, wall_seconds):
+        sample = {
+            'wall_ms': wall_seconds * 1000,
+            'sql_ms': profile.sql_seconds * 1000,
+            'template_ms': profile.template_seconds * 1000,
+            'queries': profile.queries,
+        }
+        store.add(view_name, sample)
+
+        logger.debug(
+            "%s %s: %.1fms total, %d consultas (%.1fms SQL), %.1fms templates",
+            request.method, view_name, sample['wall_ms'], sample['queries'], sample['sql_ms'], sample['template_ms'],
+        )
+        if sample['wall_ms'] >= self.slow_ms:
+            logger.warning(
+                "Requisição lenta: %s %s levou %.1fms (%d consultas, %.1fms SQL, %.1fms templates)",
+                request.method, request.path, sample['wall_ms'], sample['queries'], sample['sql_ms'], sample['template_ms'],
+            )
+        for sql, count in profile.fingerprints.most_common():
+            if count < self.duplicate_threshold:
+                break
+            logger.warning("Possível N+1 em %s: consulta repetida %d vezes: %s", view_name, count, sql)
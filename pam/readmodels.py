@@ -0,0 +1,79 @@
+"""Projeção somente leitura usada para renderizar o office_view.
+
+O quadro do escritório só mostra nomes, status, categorias e contagens. Em vez
+de instâncias completas de Room, Island, Workstation e Employee (todos os
+campos, estado do ORM, cache de relações), as consultas usam values_list com
+as colunas exibidas e montam registros pequenos com __slots__:
+- salas e ilhas vêm de uma consulta (LEFT JOIN, para incluir salas sem ilha);
+- as PAs das ilhas a renderizar vêm de outra, com o nome do funcionário no
+  mesmo SELECT.
+Os registros expõem só os atributos que o office_view.html e o
+office_island.html leem; o HTML gerado é o mesmo das instâncias completas.
+A reconstrução por data (pam/snapshots.py) monta os mesmos registros.
+"""
+from collections import defaultdict
+
+from .models import Room, Workstation
+
+
+class WorkstationRow:
+    __slots__ = ('id', 'category', 'status', 'employee_name', 'display_sequence')
+
+    def __init__(self, id, category, status, employee_name):
+        self.id = id
+        self.category = category
+        self.status = status
+        self.employee_name = employee_name
+        self.display_sequence = None # Preenchido por arrange_workstations_in_columns
+
+
+class IslandRow:
+    __slots__ = ('id', 'island_number', 'occupied_count', 'total_count', 'workstation_list', 'processed_columns', 'fragment')
+
+    def __init__(self, id, island_number, occupied_count, total_count):
+        self.id = id
+        self.island_number = island_number
+        self.occupied_count = occupied_count
+        self.total_count = total_count
+        self.workstation_list = []
+        self.processed_columns = []
+        self.fragment = ''
+
+
+class RoomRow:
+    __slots__ = ('id', 'name', 'occupied_count', 'total_count', 'islands')
+
+    def __init__(self, id, name, occupied_count, total_count):
+        self.id = id
+        self.name = name
+        self.occupied_count = occupied_count
+        self.total_count = total_count
+        self.islands = []
+
+
+def load_rooms():
+    """Salas em ordem de nome, cada uma com as ilhas (sem PAs) em ordem de número."""
+    rows = Room.objects.order_by('name', 'pk', 'islands__island_number').values_list(
+        'pk', 'name', 'occupied_count', 'total_count',
+        'islands__pk', 'islands__island_number', 'islands__occupied_count', 'islands__total_count',
+    )
+    rooms = {}
+    for room_id, name, occupied, total, island_id, number, island_occupied, island_total in rows:
+        room = rooms.get(room_id)
+        if room is None:
+            room = rooms[room_id] = RoomRow(room_id, name, occupied, total)
+        if island_id is not None:
+            room.islands.append(IslandRow(island_id, number, island_occupied, island_total))
+    return list(rooms.values())
+
+
+def load_workstations(island_ids):
+    """{island_id: [WorkstationRow]} das ilhas dadas, em ordem de sequence."""
+    by_island = defaultdict(list)
+    rows = (
+        Workstation.objects.filter(island_id__in=island_ids).order_by('island_id', 'sequence')
+        .values_list('island_id', 'pk', 'category', 'status', 'employee__name')
+    )
+    for island_id, *fields in rows:
+        by_island[island_id].append(WorkstationRow(*fields))
+    return by_island
@@ -0,0 +1,136 @@
+"""Leituras em réplica para as views somente leitura.
+
+Com um alias 'replica' em DATABASES (settings.PAM_READ_REPLICA), as views
+marcadas com @read_from_replica (quadro do escritório, lista de salas,
+exportação e painel) leem da réplica. Todo o resto usa o banco principal:
+- escritas, sempre (db_for_write);
+- leituras fora dessas views, como a autenticação, as views do admin e os
+  comandos;
+- leituras dentro de uma transação no principal;
+- requisições POST/PUT/PATCH/DELETE e, por PAM_REPLICA_MAX_LAG_SECONDS depois
+  delas, as do mesmo navegador (cookie gravado pelo ReplicaPinningMiddleware).
+  Assim, quem acabou de salvar no admin não vê o estado anterior ao abrir o
+  quadro ou o painel.
+
+Sem réplica configurada, o roteador não opina e tudo vai para o 'default'.
+Localmente, dois arquivos SQLite fazem o papel de principal e réplica
+(SQLITE_REPLICA_PATH), copiados com o comando sync_replica.
+"""
+import functools
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import StreamingHttpResponse
+
+PIN_COOKIE = 'pam_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Alias usado nas leituras da requisição atual (None: banco principal)
+_read_alias = ContextVar('pam_read_alias', default=None)
+
+
+def replica_alias():
+    return getattr(settings, 'PAM_READ_REPLICA', None)
+
+
+def reading_from_replica():
+    """True quando as leituras do contexto atual vão para a réplica."""
+    return _read_alias.get() is not None and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if reading_from_replica():
+            return _read_alias.get()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Principal e réplica têm os mesmos dados
+        aliases = {DEFAULT_DB_ALIAS, replica_alias()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # A réplica recebe o esquema do principal (replicação ou sync_replica)
+        if db == replica_alias():
+            return False
+        return None
+
+
+def _pinned_to_primary(request):
+    return request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES
+
+
+def _stream_from(alias, content):
+    # O conteúdo em streaming é lido depois que a view retorna: cada bloco
+    # é gerado com o alias da view
+    iterator = iter(content)
+    while True:
+        token = _read_alias.set(alias)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _read_alias.reset(token)
+        yield chunk
+
+
+async def _astream_from(alias, content):
+    iterator = aiter(content)
+    while True:
+        token = _read_alias.set(alias)
+        try:
+            chunk = await anext(iterator)
+        except StopAsyncIteration:
+            return
+        finally:
+            _read_alias.reset(token)
+        yield chunk
+
+
+def read_from_replica(view_func):
+    """Faz as leituras da view (e do conteúdo em streaming) irem para a réplica.
+
+    Deve ficar abaixo do user_passes_test: a sessão e o usuário continuam
+    sendo lidos do principal.
+    """
+    @functools.wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        alias = replica_alias()
+        if alias is None or _pinned_to_primary(request):
+            return view_func(request, *args, **kwargs)
+        token = _read_alias.set(alias)
+        try:
+            response = view_func(request, *args, **kwargs)
+        finally:
+            _read_alias.reset(token)
+        if isinstance(response, StreamingHttpResponse):
+            if response.is_async:
+                response.streaming_content = _astream_from(alias, response.streaming_content)
+            else:
+                response.streaming_content = _stream_from(alias, response.streaming_content)
+        return response
+    return wrapper
+
+
+class ReplicaPinningMiddleware:
+    """Depois de uma escrita, lê do principal até a réplica alcançá-la."""
+
+    def __init__(self, get_response):
+        if replica_alias() is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.max_lag = getattr(settings, 'PAM_REPLICA_MAX_LAG_SECONDS', 5)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(PIN_COOKIE, '1', max_age=self.max_lag, httponly=True, samesite='Lax')
+        return response
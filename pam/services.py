@@ -0,0 +1,256 @@
+"""Gravação em lote das alterações de PAs feitas no admin.
+
+Tanto o POST do formulário do admin_office_view quanto o endpoint JSON
+save_workstations_ajax_view passam por save_workstation_changes: os
+funcionários são resolvidos com um único in_bulk, as regras de status são as
+mesmas do formulário original e a escrita é um bulk_update. Como o
+bulk_update não dispara signals, a invalidação do cache de fragmentos, o push
+SSE, os contadores de ocupação e o histórico (SeatChange) são feitos aqui
+explicitamente.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .audit import SOURCE_ADMIN, record_seat_changes
+from .cache import bump_island_versions_on_commit
+from .counters import apply_status_deltas, status_change_deltas
+from .events import publish_seat_changes_on_commit
+from .models import Employee, Workstation
+
+VALID_STATUSES = dict(Workstation.STATUS_CHOICES)
+
+# Campos gravados pelo bulk_update (o auto_now não é aplicado pelo bulk_update)
+SAVED_FIELDS = ['employee', 'status', 'updated_at']
+
+
+class ChangeError(Exception):
+    pass
+
+
+def _parse_employee_id(value):
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ChangeError(f"Erro: Funcionário com ID '{value}' inválido.")
+
+
+def _apply_change(workstation, change, employees):
+    """Aplica uma alteração à workstation em memória. Retorna True se mudou algo.
+
+    `change` pode trazer 'status' e/ou 'employee_id'; chaves ausentes não
+    alteram o campo correspondente.
+    """
+    original = (workstation.status, workstation.employee_id)
+
+    if 'employee_id' in change:
+        employee_id = _parse_employee_id(change['employee_id'])
+        if employee_id is not None and employee_id != workstation.employee_id:
+            if employee_id not in employees:
+                raise ChangeError(f"Erro: Funcionário com ID '{employee_id}' inválido para PA {workstation.pk}.")
+            workstation.employee = employees[employee_id]
+        elif employee_id is None:
+            workstation.employee = None
+
+    status = change.get('status')
+    status_changed = bool(status) and status != workstation.status
+    if status_changed:
+        if status not in VALID_STATUSES:
+            raise ChangeError(f"Erro: Status '{status}' inválido para PA {workstation.pk}.")
+        workstation.status = status
+
+    # Sem status explícito, o status segue o funcionário (mesma regra do Workstation.save)
+    if not status_changed and workstation.employee_id != original[1]:
+        workstation.refresh_status()
+
+    # Vaga nunca fica com funcionário
+    if workstation.status == 'UNOCCUPIED' and workstation.employee_id is not None:
+        workstation.employee = None
+
+    if workstation.status == 'OCCUPIED' and workstation.employee_id is None:
+        raise ChangeError(f"Erro Crítico: Tentativa de salvar PA {workstation.pk} como 'Ocupada' sem funcionário.")
+
+    return (workstation.status, workstation.employee_id) != original
+
+
+def _result(workstation, **extra):
+    result = {
+        'id': workstation.pk,
+        'status': workstation.status,
+        'employee_id': workstation.employee_id,
+        'employee_name': workstation.employee.name if workstation.employee_id else None,
+    }
+    result.update(extra)
+    return result
+
+
+def _original_employee_id(snapshot):
+    return snapshot[1].pk if snapshot[1] is not None else None
+
+
+def _reject_double_bookings(modified, snapshots):
+    """Desfaz, em memória, as alterações que deixariam um funcionário em duas PAs.
+
+    Retorna [(workstation, erro)]. Quem já está sentado fora do lote vem de
+    uma consulta pelo índice único de employee. Dentro do lote, PAs que
+    mantêm o funcionário têm prioridade sobre as que o recebem, então trocas
+    entre PAs do mesmo lote passam.
+    """
+    employee_ids = {ws.employee_id for ws in modified if ws.employee_id}
+    seated = {}
+    if employee_ids:
+        seated = dict(
+            Workstation.objects.filter(employee_id__in=employee_ids)
+            .exclude(pk__in=[ws.pk for ws in modified])
+            .values_list('employee_id', 'pk')
+        )
+
+    rejected = []
+    pending = sorted(modified, key=lambda ws: ws.employee_id != _original_employee_id(snapshots[ws.pk]))
+    while True:
+        claimed = dict(seated)
+        for workstation in pending:
+            if workstation.employee_id is None:
+                continue
+            holder = claimed.setdefault(workstation.employee_id, workstation.pk)
+            if holder != workstation.pk:
+                break
+        else:
+            return rejected
+
+        # Volta a PA ao estado original; ela continua segurando o funcionário antigo
+        name = workstation.employee.name
+        workstation.status, workstation.employee = snapshots[workstation.pk]
+        pending.remove(workstation)
+        if workstation.employee_id is not None:
+            seated[workstation.employee_id] = workstation.pk
+        rejected.append((workstation, f"Erro: Funcionário '{name}' já ocupa a PA {holder}."))
+
+
+def _release_moving_employees(modified, snapshots):
+    """Primeira fase de trocas: tira do lugar quem muda de PA dentro do lote.
+
+    Sem isso o índice único de employee acusaria conflito no meio do UPDATE
+    em lote (as linhas são conferidas uma a uma).
+    """
+    incoming = {ws.employee_id for ws in modified if ws.employee_id}
+    releasing = [
+        ws.pk for ws in modified
+        if _original_employee_id(snapshots[ws.pk]) in incoming and _original_employee_id(snapshots[ws.pk]) != ws.employee_id
+    ]
+    if releasing:
+        Workstation.objects.filter(pk__in=releasing).update(employee=None)
+
+
+def save_workstation_changes(changes, user=None):
+    """Aplica uma lista de alterações {id, status, employee_id} em lote.
+
+    `user` é quem fez as alterações, gravado no histórico. Retorna uma lista de resultados por id, na ordem recebida, com
+    'success', 'changed' e o estado final da PA (ou 'error'). PAs com erro
+    são puladas; as demais são gravadas juntas em uma transação.
+    """
+    ids = []
+    for change in changes:
+        try:
+            ids.append(int(change.get('id')))
+        except (AttributeError, TypeError, ValueError):
+            ids.append(None)
+
+    employee_ids = set()
+    for change in changes:
+        try:
+            employee_ids.add(_parse_employee_id(change.get('employee_id')))
+        except (AttributeError, ChangeError):
+            pass
+    employee_ids.discard(None)
+
+    results = []
+    modified = []
+    snapshots = {} # Estado original (status, funcionário) de cada PA alterada
+    result_index = {}
+    with transaction.atomic():
+        workstations = Workstation.objects.select_related('employee').order_by().in_bulk([ws_id for ws_id in ids if ws_id is not None])
+        employees = Employee.objects.order_by().in_bulk(employee_ids)
+
+        for ws_id, change in zip(ids, changes):
+            workstation = workstations.get(ws_id)
+            if workstation is None:
+                results.append({'id': ws_id, 'success': False, 'error': f"Erro: Workstation com ID {ws_id} não encontrada no banco."})
+                continue
+            snapshot = (workstation.status, workstation.employee)
+            try:
+                changed = _apply_change(workstation, change, employees)
+            except ChangeError as e:
+                # Desfaz as alterações em memória desta PA
+                workstation.status, workstation.employee = snapshot
+                results.append(_result(workstation, success=False, error=str(e)))
+                continue
+            if changed and workstation.pk not in snapshots:
+                snapshots[workstation.pk] = snapshot
+                modified.append(workstation)
+            result_index[workstation.pk] = len(results)
+            results.append(_result(workstation, success=True, changed=changed))
+
+        for workstation, error in _reject_double_bookings(modified, snapshots):
+            modified.remove(workstation)
+            results[result_index[workstation.pk]] = _result(workstation, success=False, error=error)
+
+        if modified:
+            now = timezone.now()
+            for workstation in modified:
+                workstation.updated_at = now
+            _release_moving_employees(modified, snapshots)
+            Workstation.objects.bulk_update(modified, SAVED_FIELDS)
+            apply_status_deltas(status_change_deltas(
+                (ws.island_id, snapshots[ws.pk][0], ws.status) for ws in modified
+            ))
+            bump_island_versions_on_commit(ws.island_id for ws in modified)
+            publish_seat_changes_on_commit(modified)
+            record_seat_changes([
+                (ws.pk, _original_employee_id(snapshots[ws.pk]), ws.employee_id, snapshots[ws.pk][0], ws.status)
+                for ws in modified
+            ], user=user, source=SOURCE_ADMIN, at=now)
+
+    return results
+
+
+
+def delete_employees(employees, user=None):
+    """Remove os funcionários do queryset, liberando antes as PAs deles em lote.
+
+    O SET_NULL da FK sozinho deixaria a PA 'Ocupada' sem funcionário e sem
+    registro no histórico. Aqui as PAs ficam vagas (as em manutenção
+    continuam em manutenção, como no refresh_status), com contadores,
+    cache, push SSE e SeatChange, na mesma transação da remoção. Retorna o
+    número de funcionários removidos.
+    """
+    with transaction.atomic():
+        seats = list(
+            Workstation.objects.filter(employee__in=employees).order_by()
+            .values_list('pk', 'island_id', 'status', 'employee_id')
+        )
+        if seats:
+            now = timezone.now()
+            released = [
+                Workstation(pk=pk, island_id=island_id, employee=None, updated_at=now,
+                            status='MAINTENANCE' if status == 'MAINTENANCE' else 'UNOCCUPIED')
+                for pk, island_id, status, _ in seats
+            ]
+            for new_status in {ws.status for ws in released}:
+                Workstation.objects.filter(pk__in=[ws.pk for ws in released if ws.status == new_status]).update(
+                    employee=None, status=new_status, updated_at=now,
+                )
+            apply_status_deltas(status_change_deltas(
+                (island_id, status, ws.status) for (_, island_id, status, _), ws in zip(seats, released)
+            ))
+            bump_island_versions_on_commit(ws.island_id for ws in released)
+            publish_seat_changes_on_commit(released)
+            record_seat_changes([
+                (ws.pk, employee_id, None, status, ws.status)
+                for (_, _, status, employee_id), ws in zip(seats, released)
+            ], user=user, source=SOURCE_ADMIN, at=now)
+        # Sem PAs apontando para eles, o Collector (que recarrega os
+        # funcionários, dispara o pre_delete e repete o SET_NULL) não tem o
+        # que fazer: um DELETE por conjunto basta
+        return employees._raw_delete(employees.db)
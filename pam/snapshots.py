@@ -0,0 +1,162 @@
+"""Reconstrução do office_view em uma data: fotos periódicas + replay do histórico.
+
+Uma FloorSnapshot guarda salas, ilhas e PAs em listas compactas, cada PA com
+funcionário, status e equipamentos. Para reconstruir uma data, o ponto de
+partida é a foto mais próxima dela:
+- foto anterior: aplica as trocas do SeatChange entre a foto e a data, em
+  ordem de id;
+- foto posterior (ou o estado atual, sem foto depois da data): desfaz as
+  trocas no sentido inverso, usando os valores 'anteriores'.
+Com fotos a cada poucas horas (comando floor_snapshot, via cron), o replay
+lê só as trocas de um intervalo, e não o histórico inteiro: os ids do
+SeatChange ficam entre os last_change_id das duas fotos vizinhas da data.
+
+O histórico só registra trocas de funcionário e status. Salas, ilhas e PAs
+criadas ou removidas entre a foto e a data aparecem como na foto. Trocas
+apagadas pela retenção do seat_history não podem ser reaplicadas.
+"""
+from collections import Counter, defaultdict, namedtuple
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .audit import STATUS_CODES, STATUS_KEYS
+from .models import Employee, FloorSnapshot, Island, Room, SeatChange, Workstation
+from .readmodels import IslandRow, RoomRow, WorkstationRow
+
+EQUIPMENT = ['monitor', 'keyboard', 'mouse', 'mousepad', 'headset']
+
+# Posições de cada PA em data['workstations']
+WS_ID, WS_ISLAND, WS_CATEGORY, WS_SEQUENCE, WS_EMPLOYEE, WS_STATUS = range(6)
+
+FloorState = namedtuple('FloorState', ['at', 'data', 'base', 'replayed'])
+
+
+def capture_floor():
+    """Estado atual do escritório em listas compactas (formato de FloorSnapshot.data)."""
+    workstations = (
+        Workstation.objects.filter(island__isnull=False).order_by('sequence')
+        .values_list('pk', 'island_id', 'category', 'sequence', 'employee_id', 'status', *EQUIPMENT)
+    )
+    seated = Employee.objects.filter(workstation__isnull=False).order_by().values_list('pk', 'name')
+    return {
+        'rooms': [list(row) for row in Room.objects.order_by('name').values_list('pk', 'name')],
+        'islands': [list(row) for row in Island.objects.order_by('island_number').values_list('pk', 'room_id', 'island_number')],
+        'workstations': [[*row[:WS_STATUS], STATUS_CODES[row[WS_STATUS]], *row[WS_STATUS + 1:]] for row in workstations],
+        'employees': [list(row) for row in seated],
+    }
+
+
+def _last_change_id():
+    return SeatChange.objects.aggregate(last=Max('id'))['last'] or 0
+
+
+def take_snapshot():
+    """Grava uma foto do estado atual. Retorna a FloorSnapshot criada."""
+    with transaction.atomic():
+        # A última troca é lida antes do estado: uma troca gravada entre as
+        # duas leituras já está na foto e o replay só a aplica de novo
+        last_change_id = _last_change_id()
+        data = capture_floor()
+        return FloorSnapshot.objects.create(
+            created_at=timezone.now(),
+            last_change_id=last_change_id,
+            workstation_count=len(data['workstations']),
+            data=data,
+        )
+
+
+def _replay(data, changes, forward):
+    seats = {seat[WS_ID]: seat for seat in data['workstations']}
+    replayed = 0
+    for workstation_id, old_employee_id, new_employee_id, old_status, new_status in changes:
+        seat = seats.get(workstation_id)
+        if seat is None:
+            continue # PA que não existia no ponto de partida
+        seat[WS_EMPLOYEE], seat[WS_STATUS] = (new_employee_id, new_status) if forward else (old_employee_id, old_status)
+        replayed += 1
+    return replayed
+
+
+def floor_at(at):
+    """Reconstrói o escritório no instante `at`. Retorna FloorState.
+
+    `base` é a foto usada como ponto de partida (None para o estado atual) e
+    `replayed`, quantas trocas foram aplicadas ou desfeitas.
+    """
+    snapshots = FloorSnapshot.objects.only('pk', 'created_at', 'last_change_id')
+    previous = snapshots.filter(created_at__lte=at).order_by('-created_at').first()
+    following = snapshots.filter(created_at__gt=at).order_by('created_at').first()
+    now = timezone.now()
+    following_at = following.created_at if following else now
+
+    changes = SeatChange.objects.values_list('workstation_id', 'old_employee_id', 'new_employee_id', 'old_status', 'new_status')
+    if previous is not None and at - previous.created_at <= following_at - at:
+        base = previous
+        data = FloorSnapshot.objects.values_list('data', flat=True).get(pk=base.pk)
+        window = changes.filter(id__gt=base.last_change_id, created_at__lte=at)
+        if following is not None:
+            # Trocas depois da foto seguinte são posteriores a `at`: nem são lidas
+            window = window.filter(id__lte=following.last_change_id)
+        replayed = _replay(data, window.order_by('id'), forward=True)
+    else:
+        base = following
+        if base is not None:
+            data = FloorSnapshot.objects.values_list('data', flat=True).get(pk=base.pk)
+            last_change_id = base.last_change_id
+        else:
+            with transaction.atomic():
+                last_change_id = _last_change_id()
+                data = capture_floor()
+        window = changes.filter(id__lte=last_change_id, created_at__gt=at)
+        if previous is not None:
+            # Idem para as trocas anteriores à foto de antes
+            window = window.filter(id__gt=previous.last_change_id)
+        replayed = _replay(data, window.order_by('-id'), forward=False)
+    return FloorState(at=at, data=data, base=base, replayed=replayed)
+
+
+def build_rooms(data):
+    """Salas do estado nos registros leves do office_view (ver pam/readmodels.py).
+
+    Cada sala traz as ilhas em room.islands e cada ilha, as PAs em
+    island.workstation_list; as contagens de ocupação são calculadas do estado.
+    """
+    names = dict(map(tuple, data['employees']))
+    missing = {seat[WS_EMPLOYEE] for seat in data['workstations'] if seat[WS_EMPLOYEE] and seat[WS_EMPLOYEE] not in names}
+    if missing:
+        names.update(Employee.objects.filter(pk__in=missing).values_list('pk', 'name'))
+
+    by_island = defaultdict(list)
+    for seat in data['workstations']:
+        employee_id = seat[WS_EMPLOYEE]
+        employee_name = names.get(employee_id, f"Funcionário removido (ID {employee_id})") if employee_id else None
+        by_island[seat[WS_ISLAND]].append(
+            WorkstationRow(seat[WS_ID], seat[WS_CATEGORY], STATUS_KEYS[seat[WS_STATUS]], employee_name)
+        )
+
+    islands_by_room = defaultdict(list)
+    room_counts = defaultdict(Counter)
+    for island_id, room_id, number in data['islands']:
+        workstations = by_island.get(island_id, [])
+        counts = Counter(ws.status for ws in workstations)
+        island = IslandRow(island_id, number, counts['OCCUPIED'], len(workstations))
+        island.workstation_list = workstations
+        room_counts[room_id].update(counts)
+        islands_by_room[room_id].append(island)
+
+    rooms = []
+    for room_id, name in data['rooms']:
+        counts = room_counts[room_id]
+        room = RoomRow(room_id, name, counts['OCCUPIED'], sum(counts.values()))
+        room.islands = islands_by_room.get(room_id, [])
+        rooms.append(room)
+    return rooms
+
+
+def prune_snapshots(before):
+    """Apaga as fotos anteriores a `before`, mantendo sempre a mais recente delas."""
+    old = FloorSnapshot.objects.filter(created_at__lt=before)
+    newest = old.order_by('-created_at').values_list('pk', flat=True).first()
+    return old.exclude(pk=newest).delete()[0] if newest else 0
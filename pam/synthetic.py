@@ -0,0 +1,161 @@
+"""Geração de dados sintéticos (salas, ilhas, PAs e funcionários) em lote.
+
+Usado pelo comando generate_office_data, pelo benchmark_views e pelo
+populate_employees.py. Com a mesma semente, gera sempre os mesmos nomes,
+categorias, CPFs e ocupação. Os funcionários usam as chaves válidas de
+Employee.SECTOR_CHOICES e entram com bulk_create. As salas passam pelo
+build_room, o mesmo builder do admin.
+"""
+import random
+from collections import defaultdict, namedtuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import bump_island_versions_on_commit
+from .counters import apply_status_deltas, status_change_deltas
+from .events import publish_layout_change_on_commit
+from .layouts import BULK_BATCH_SIZE, IslandSpec, build_room
+from .models import Employee, FloorSnapshot, Island, Room, SeatChange, SequenceCounter, Workstation, normalize_search_text, only_digits
+
+# Ordem dos DELETEs do flush_office: quem aponta para outra tabela sai antes dela
+FLUSHED_MODELS = [SeatChange, FloorSnapshot, Workstation, Island, Room, Employee, SequenceCounter]
+
+SECTORS = [key for key, _ in Employee.SECTOR_CHOICES]
+CATEGORIES = [key for key, _ in Workstation.CATEGORY_CHOICES]
+
+GeneratedOffice = namedtuple('GeneratedOffice', ['rooms', 'islands', 'workstations', 'employees', 'seated'])
+
+
+def flush_office():
+    """Apaga salas, ilhas, PAs, funcionários, contadores, histórico e fotos.
+
+    Um DELETE por tabela, sem o Collector (que carregaria cada linha e
+    dispararia os sinais de contadores e cache uma a uma). O histórico e as
+    fotos saem junto: apontariam para PAs e funcionários que não existem
+    mais. Retorna {model: linhas apagadas}.
+    """
+    with transaction.atomic():
+        island_ids = list(Island.objects.values_list('pk', flat=True))
+        deleted = {model: model.objects.all()._raw_delete(model.objects.db) for model in FLUSHED_MODELS}
+        bump_island_versions_on_commit(island_ids)
+        publish_layout_change_on_commit()
+    return deleted
+
+
+def cpf_from_base(base):
+    """CPF formatado (123.456.789-09) com dígitos verificadores válidos para uma base de 9 dígitos."""
+    digits = [int(char) for char in f'{base:09d}']
+    for weight in (10, 11):
+        total = sum(digit * factor for digit, factor in zip(digits, range(weight, 1, -1)))
+        digits.append(total * 10 % 11 % 10)
+    text = ''.join(map(str, digits))
+    return f'{text[:3]}.{text[3:6]}.{text[6:9]}-{text[9:]}'
+
+
+def format_phone_number(digits):
+    """Formata 10 ou 11 dígitos no padrão (XX) XXXXX-XXXX / (XX) XXXX-XXXX."""
+    if len(digits) == 11:
+        return f'({digits[:2]}) {digits[2:7]}-{digits[7:]}'
+    if len(digits) == 10:
+        return f'({digits[:2]}) {digits[2:6]}-{digits[6:]}'
+    return digits
+
+
+def _faker(seed):
+    from faker import Faker # Dependência só dos geradores, não da aplicação
+
+    fake = Faker('pt_BR')
+    fake.seed_instance(seed)
+    return fake
+
+
+def build_employees(sectors, seed=None):
+    """Funcionários (não salvos), um por item de `sectors`, determinísticos para a semente.
+
+    Os CPFs são consecutivos a partir de uma base sorteada, então não se
+    repetem dentro de uma geração; os emails derivam do CPF.
+    """
+    rng = random.Random(seed)
+    fake = _faker(seed)
+    first_base = rng.randrange(10 ** 9 - len(sectors))
+    employees = []
+    for offset, sector in enumerate(sectors):
+        name = fake.name()
+        cpf = cpf_from_base(first_base + offset)
+        employees.append(Employee(
+            name=name,
+            search_name=normalize_search_text(name), # bulk_create não passa pelo save()
+            cpf=cpf,
+            cpf_digits=only_digits(cpf),
+            email=f"funcionario{cpf[:3]}{cpf[4:7]}{cpf[8:11]}@example.com",
+            phone=format_phone_number(''.join(str(rng.randint(0, 9)) for _ in range(11))),
+            sector=sector,
+        ))
+    return employees
+
+
+def create_employees(counts_by_sector, seed=None):
+    """Cria em lote {setor: quantidade} funcionários. Retorna a lista criada."""
+    sectors = [sector for sector, count in counts_by_sector.items() for _ in range(count)]
+    return Employee.objects.bulk_create(build_employees(sectors, seed), batch_size=BULK_BATCH_SIZE)
+
+
+def generate_office(rooms, islands_per_room, workstations_per_island, employees, occupancy=0.8, seed=None, room_prefix='Sala'):
+    """Cria um escritório completo e senta parte dos funcionários. Retorna GeneratedOffice.
+
+    Cada ilha recebe uma categoria sorteada. Cada funcionário recebe um setor
+    sorteado, e as PAs de cada categoria são ocupadas, até `occupancy`, por
+    funcionários do setor de mesma chave. Tudo roda em uma transação.
+    """
+    rng = random.Random(seed)
+    with transaction.atomic():
+        room_list = []
+        for number in range(1, rooms + 1):
+            specs = [
+                IslandSpec(workstations=workstations_per_island, category=rng.choice(CATEGORIES))
+                for _ in range(islands_per_room)
+            ]
+            room_list.append(build_room(f'{room_prefix} {number:03d}', specs))
+
+        employee_list = create_employees(
+            {sector: count for sector, count in _split(employees, SECTORS, rng).items() if count},
+            seed=rng.randrange(2 ** 32),
+        )
+
+        waiting = defaultdict(list)
+        for employee in employee_list:
+            waiting[employee.sector].append(employee)
+
+        workstations = list(
+            Workstation.objects.filter(island__room__in=room_list).order_by('pk').only('pk', 'category', 'island_id')
+        )
+        seated = []
+        for workstation in workstations:
+            if rng.random() >= occupancy or not waiting[workstation.category]:
+                continue
+            workstation.employee = waiting[workstation.category].pop()
+            workstation.status = 'OCCUPIED'
+            seated.append(workstation)
+        now = timezone.now() # O bulk_update não aplica o auto_now (e o updated_at entra na versão do layout)
+        for workstation in seated:
+            workstation.updated_at = now
+        Workstation.objects.bulk_update(seated, ['employee', 'status', 'updated_at'], batch_size=BULK_BATCH_SIZE)
+        apply_status_deltas(status_change_deltas((ws.island_id, 'UNOCCUPIED', 'OCCUPIED') for ws in seated))
+        bump_island_versions_on_commit(ws.island_id for ws in seated)
+
+    return GeneratedOffice(
+        rooms=room_list,
+        islands=rooms * islands_per_room,
+        workstations=len(workstations),
+        employees=employee_list,
+        seated=len(seated),
+    )
+
+
+def _split(total, keys, rng):
+    """Distribui `total` itens entre as chaves de forma sorteada (multinomial simples)."""
+    counts = dict.fromkeys(keys, 0)
+    for _ in range(total):
+        counts[rng.choice(keys)] += 1
+    return counts
@@ -0,0 +1,73 @@
+"""Fábricas de dados para os testes: andares realistas criados em lote.
+
+Usam os mesmos caminhos de escrita da aplicação (build_room para salas) e
+bulk_create para funcionários, para que montar milhares de linhas não custe
+uma consulta por linha.
+"""
+import itertools
+
+from django.contrib.auth import get_user_model
+
+from ..counters import apply_status_deltas, status_change_deltas
+from ..layouts import IslandSpec, build_room
+from ..models import Employee, Workstation, normalize_search_text
+
+SECTORS = [key for key, _ in Employee.SECTOR_CHOICES]
+CATEGORIES = [key for key, _ in Workstation.CATEGORY_CHOICES]
+
+_counter = itertools.count(1)
+
+
+def make_admin(username='admin'):
+    return get_user_model().objects.create_user(username=username, password='senha-teste', is_staff=True)
+
+
+def make_employees(count, sectors=SECTORS):
+    """Cria `count` funcionários distribuídos entre os setores, com CPF/email únicos."""
+    employees = []
+    for index in range(count):
+        number = next(_counter)
+        name = f"Funcionário {number:06d}"
+        employees.append(Employee(
+            name=name,
+            search_name=normalize_search_text(name), # bulk_create não passa pelo save()
+            cpf=f"{number:011d}",
+            cpf_digits=f"{number:011d}",
+            email=f"funcionario{number}@example.com",
+            phone=f"619{number:08d}",
+            sector=sectors[index % len(sectors)],
+        ))
+    return Employee.objects.bulk_create(employees)
+
+
+def make_room(islands=4, workstations_per_island=10, name=None):
+    """Cria uma sala pelo builder do admin, alternando as categorias das ilhas."""
+    specs = [
+        IslandSpec(workstations=workstations_per_island, category=CATEGORIES[number % len(CATEGORIES)])
+        for number in range(islands)
+    ]
+    return build_room(name or f"Sala Teste {next(_counter)}", specs)
+
+
+def seat_employees(employees, workstations=None):
+    """Ocupa as PAs vagas com os funcionários dados, na ordem. Retorna as PAs ocupadas."""
+    if workstations is None:
+        workstations = Workstation.objects.filter(status='UNOCCUPIED', employee__isnull=True).order_by('pk')
+    seated, changes = [], []
+    for workstation, employee in zip(workstations, employees):
+        changes.append((workstation.island_id, workstation.status, 'OCCUPIED'))
+        workstation.employee = employee
+        workstation.status = 'OCCUPIED'
+        seated.append(workstation)
+    Workstation.objects.bulk_update(seated, ['employee', 'status'])
+    apply_status_deltas(status_change_deltas(changes))
+    return seated
+
+
+def make_floor(rooms=2, islands=4, workstations_per_island=10, employees=100, occupancy=0.7):
+    """Monta um andar completo: salas, ilhas, PAs e funcionários, parte deles sentados."""
+    room_list = [make_room(islands, workstations_per_island) for _ in range(rooms)]
+    employee_list = make_employees(employees)
+    seats = int(rooms * islands * workstations_per_island * occupancy)
+    seat_employees(employee_list[:seats])
+    return room_list, employee_list
@@ -0,0 +1,102 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from ..allocation import apply_allocation, plan_allocation
+from ..cache import get_layout_version
+from ..counters import COUNTER_FIELDS, expected_island_counters
+from ..models import Island, Workstation
+from .factories import make_admin, make_employees, make_room, seat_employees
+
+
+class AllocationTests(TestCase):
+    def setUp(self):
+        # 8 ilhas de 3 PAs: cada categoria aparece em duas ilhas (1ª e 5ª, 2ª e 6ª...)
+        self.room = make_room(islands=8, workstations_per_island=3)
+        self.islands = list(Island.objects.filter(room=self.room).order_by('island_number'))
+
+    def seats_of(self, island):
+        return list(Workstation.objects.filter(island=island).order_by('sequence'))
+
+    def test_matches_sector_and_fills_islands_contiguously(self):
+        estagio_first, estagio_second = self.islands[0], self.islands[4]
+        self.assertEqual({ws.category for ws in self.seats_of(estagio_first) + self.seats_of(estagio_second)}, {'ESTAGIO'})
+        # A segunda ilha já tem alguém: ela é completada antes de abrir a primeira
+        seat_employees(make_employees(1, sectors=['ESTAGIO']), self.seats_of(estagio_second)[1:2])
+
+        newcomers = make_employees(4, sectors=['ESTAGIO'])
+        plan = plan_allocation()
+        targets = [assignment.workstation_id for assignment in plan.assignments]
+        second, first = self.seats_of(estagio_second), self.seats_of(estagio_first)
+        self.assertEqual(targets, [second[0].pk, second[2].pk, first[0].pk, first[1].pk])
+        self.assertEqual([assignment.employee_id for assignment in plan.assignments], [e.pk for e in newcomers])
+        self.assertEqual(plan.unplaced, [])
+        self.assertEqual(plan.vacant_left['ESTAGIO'], 1)
+
+    def test_reports_unplaced_and_applies(self):
+        make_employees(8, sectors=['INSS'])  # 6 PAs INSS
+        plan = plan_allocation()
+        self.assertEqual(len(plan.assignments), 6)
+        self.assertEqual([employee.sector for employee in plan.unplaced], ['INSS', 'INSS'])
+        self.assertEqual(plan.by_sector()[0]['placed'], 6)
+
+        with self.assertNumQueries(9):  # savepoint (2), revalidação (2), UPDATE, contadores (3), histórico
+            seated, skipped = apply_allocation(plan)
+        self.assertEqual((len(seated), skipped), (6, []))
+        self.assertEqual(Workstation.objects.filter(status='OCCUPIED', employee__sector='INSS').count(), 6)
+
+        expected = expected_island_counters()
+        for island in Island.objects.all():
+            self.assertEqual({field: getattr(island, field) for field in COUNTER_FIELDS}, expected[island.pk])
+
+    def test_skips_seats_missing_equipment(self):
+        # Ocupada, uma PA sem mouse ficaria em MAINTENANCE (refresh_status)
+        inss = Workstation.objects.filter(category='INSS').order_by('pk')
+        broken = inss[0]
+        broken.mouse = False
+        broken.save()
+        make_employees(6, sectors=['INSS'])
+
+        plan = plan_allocation()
+        self.assertNotIn(broken.pk, [assignment.workstation_id for assignment in plan.assignments])
+        self.assertEqual((len(plan.assignments), len(plan.unplaced)), (5, 1))
+
+        seated, _ = apply_allocation(plan)
+        for workstation in Workstation.objects.filter(pk__in=[ws.pk for ws in seated]):
+            status = workstation.status
+            workstation.refresh_status()
+            self.assertEqual(workstation.status, status)
+        self.assertEqual(Workstation.objects.get(pk=broken.pk).status, 'UNOCCUPIED')
+
+    def test_apply_skips_assignments_that_changed_since_preview(self):
+        first, second = make_employees(2, sectors=['INSS'])
+        plan = plan_allocation()
+        taken = Workstation.objects.get(pk=plan.assignments[0].workstation_id)
+        taken.status = 'MAINTENANCE'
+        taken.save()
+
+        seated, skipped = apply_allocation(plan)
+        self.assertEqual([ws.employee_id for ws in seated], [second.pk])
+        self.assertEqual([assignment.employee_id for assignment in skipped], [first.pk])
+
+
+class AllocateSeatsViewTests(TestCase):
+    def setUp(self):
+        make_room(islands=4, workstations_per_island=2)
+        make_employees(3, sectors=['SIAPE_LEO'])
+        self.client.force_login(make_admin())
+        self.url = reverse('pam:allocate_seats')
+
+    def test_preview_does_not_write(self):
+        response = self.client.get(self.url)
+        self.assertContains(response, "2 funcionário(s) alocado(s) em 1 ilha(s), 1 sem PA compatível.")
+        self.assertFalse(Workstation.objects.filter(status='OCCUPIED').exists())
+
+    def test_apply_requires_current_layout_version(self):
+        response = self.client.post(self.url, {'layout_version': 'antiga'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "O layout mudou desde a prévia")
+        self.assertFalse(Workstation.objects.filter(status='OCCUPIED').exists())
+
+        response = self.client.post(self.url, {'layout_version': get_layout_version().etag})
+        self.assertRedirects(response, reverse('pam:admin_office_view'))
+        self.assertEqual(Workstation.objects.filter(status='OCCUPIED').count(), 2)
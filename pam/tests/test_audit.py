@@ -0,0 +1,130 @@
+import datetime
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..audit import SOURCE_ADMIN, SOURCE_EDIT, STATUS_CODES, compact_history, history_page, purge_history, record_seat_changes
+from ..counters import COUNTER_FIELDS, expected_island_counters
+from ..models import Employee, Island, SeatChange, Workstation
+from ..services import save_workstation_changes
+from .factories import make_admin, make_employees, make_room
+
+
+class SeatChangeRecordingTests(TestCase):
+    def setUp(self):
+        make_room(islands=1, workstations_per_island=3)
+        self.ws = list(Workstation.objects.order_by('pk'))
+        self.ana, self.bruno = make_employees(2)
+        self.admin = make_admin()
+
+    def test_bulk_save_records_who_moved_whom(self):
+        save_workstation_changes([{'id': self.ws[0].pk, 'employee_id': self.ana.pk}], user=self.admin)
+        save_workstation_changes([
+            {'id': self.ws[0].pk, 'employee_id': ''},
+            {'id': self.ws[1].pk, 'employee_id': self.ana.pk},
+        ], user=self.admin)
+
+        changes = list(SeatChange.objects.order_by('id').values_list(
+            'workstation_id', 'old_employee_id', 'new_employee_id', 'old_status', 'new_status', 'user_id', 'source'))
+        occupied, vacant = STATUS_CODES['OCCUPIED'], STATUS_CODES['UNOCCUPIED']
+        self.assertEqual(changes, [
+            (self.ws[0].pk, None, self.ana.pk, vacant, occupied, self.admin.pk, SOURCE_ADMIN),
+            (self.ws[0].pk, self.ana.pk, None, occupied, vacant, self.admin.pk, SOURCE_ADMIN),
+            (self.ws[1].pk, None, self.ana.pk, vacant, occupied, self.admin.pk, SOURCE_ADMIN),
+        ])
+
+    def test_single_save_records_change_only_when_seat_changes(self):
+        workstation = Workstation.objects.get(pk=self.ws[2].pk)
+        workstation.headset = False
+        workstation.save()
+        self.assertFalse(SeatChange.objects.exists())
+
+        workstation.employee = self.bruno
+        workstation.save()
+        change = SeatChange.objects.get()
+        self.assertEqual((change.new_employee_id, change.source, change.user_id), (self.bruno.pk, SOURCE_EDIT, None))
+
+    def test_removing_seated_employee_releases_seat_with_history(self):
+        save_workstation_changes([{'id': self.ws[0].pk, 'employee_id': self.ana.pk}], user=self.admin)
+        self.client.force_login(self.admin)
+        self.client.post(reverse('pam:manage_employees'), {'action': 'remove', 'employee_id': self.ana.pk})
+
+        self.assertFalse(Employee.objects.filter(pk=self.ana.pk).exists())
+        seat = Workstation.objects.get(pk=self.ws[0].pk)
+        self.assertEqual((seat.employee_id, seat.status), (None, 'UNOCCUPIED'))
+        last = SeatChange.objects.latest('id')
+        self.assertEqual(
+            (last.workstation_id, last.old_employee_id, last.new_employee_id, last.new_status, last.user_id),
+            (self.ws[0].pk, self.ana.pk, None, STATUS_CODES['UNOCCUPIED'], self.admin.pk),
+        )
+        expected = expected_island_counters()
+        for island in Island.objects.all():
+            self.assertEqual({field: getattr(island, field) for field in COUNTER_FIELDS}, expected[island.pk])
+
+    def test_entries_are_append_only(self):
+        change, = record_seat_changes([(self.ws[0].pk, None, self.ana.pk, 'UNOCCUPIED', 'OCCUPIED')])
+        with self.assertRaises(ValueError):
+            change.save()
+
+
+class SeatHistoryMaintenanceTests(TestCase):
+    def record(self, workstation_id, at, old, new, old_status='OCCUPIED', new_status='OCCUPIED'):
+        record_seat_changes([(workstation_id, old, new, old_status, new_status)], at=at)
+
+    def test_keyset_pages_cover_history_once(self):
+        at = timezone.now()
+        for number in range(7):
+            self.record(number % 2 + 1, at, None, number, 'UNOCCUPIED')
+
+        seen, before = [], None
+        while True:
+            page = history_page(before=before, limit=3)
+            seen.extend(entry.id for entry in page.entries)
+            if page.next_before is None:
+                break
+            before = page.next_before
+        self.assertEqual(seen, list(SeatChange.objects.order_by('-id').values_list('id', flat=True)))
+        self.assertEqual([entry.workstation_id for entry in history_page(workstation_id=2).entries], [2, 2, 2])
+
+    def test_purge_and_compact(self):
+        now = timezone.now()
+        old_day = now - datetime.timedelta(days=40)
+        ancient = now - datetime.timedelta(days=400)
+        self.record(1, ancient, None, 10, 'UNOCCUPIED')
+        # PA 1: três trocas no mesmo dia -> uma linha 10 -> 12
+        self.record(1, old_day, 10, 11)
+        self.record(1, old_day + datetime.timedelta(seconds=1), 11, 12)
+        self.record(1, old_day + datetime.timedelta(seconds=2), 12, 12, new_status='MAINTENANCE')
+        # PA 2: vai e volta no mesmo dia -> some
+        self.record(2, old_day, 20, None, new_status='UNOCCUPIED')
+        self.record(2, old_day + datetime.timedelta(seconds=1), None, 20, old_status='UNOCCUPIED')
+        # Recente: não é compactada
+        self.record(3, now, 30, 31)
+        self.record(3, now, 31, 32)
+
+        self.assertEqual(purge_history(now - datetime.timedelta(days=365)), 1)
+        self.assertEqual(compact_history(now - datetime.timedelta(days=30), workstations_per_batch=1), (4, 1))
+
+        compacted = SeatChange.objects.get(workstation_id=1)
+        self.assertEqual(
+            (compacted.old_employee_id, compacted.new_employee_id, compacted.old_status, compacted.new_status),
+            (10, 12, STATUS_CODES['OCCUPIED'], STATUS_CODES['MAINTENANCE']),
+        )
+        self.assertEqual(SeatChange.objects.filter(workstation_id=3).count(), 2)
+        self.assertFalse(SeatChange.objects.filter(workstation_id=2).exists())
+
+
+class SeatHistoryViewTests(TestCase):
+    def test_lists_changes_with_names(self):
+        make_room(islands=1, workstations_per_island=1)
+        workstation = Workstation.objects.get()
+        employee, = make_employees(1)
+        admin = make_admin()
+        save_workstation_changes([{'id': workstation.pk, 'employee_id': employee.pk}], user=admin)
+
+        self.client.force_login(admin)
+        response = self.client.get(reverse('pam:seat_history'))
+        self.assertContains(response, employee.name)
+        self.assertContains(response, admin.username)
+        self.assertNotContains(response, "Mais antigas")
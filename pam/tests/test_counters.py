@@ -0,0 +1,83 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ..models import Island, Room, SeatChange, Workstation
+from ..services import save_workstation_changes
+from .factories import make_employees, make_room, seat_employees
+
+
+class OccupancyCounterTests(TestCase):
+    def setUp(self):
+        self.room = make_room(islands=2, workstations_per_island=5)
+        self.first, self.second = self.room.islands.order_by('island_number')
+        self.employees = make_employees(4)
+        seat_employees(self.employees[:2]) # As duas primeiras PAs, na primeira ilha
+
+    def assertCounters(self, obj, occupied, vacant, maintenance):
+        obj.refresh_from_db()
+        self.assertEqual(
+            (obj.occupied_count, obj.vacant_count, obj.maintenance_count, obj.total_count),
+            (occupied, vacant, maintenance, occupied + vacant + maintenance),
+        )
+
+    def test_build_room_and_seating(self):
+        self.assertCounters(self.first, 2, 3, 0)
+        self.assertCounters(self.second, 0, 5, 0)
+        self.assertCounters(self.room, 2, 8, 0)
+
+    def test_workstation_save_and_delete(self):
+        workstation = self.second.workstations.first()
+        workstation.status = 'MAINTENANCE'
+        workstation.save()
+        self.assertCounters(self.second, 0, 4, 1)
+        self.assertCounters(self.room, 2, 7, 1)
+
+        workstation.island = self.first
+        workstation.save()
+        self.assertCounters(self.first, 2, 3, 1)
+        self.assertCounters(self.second, 0, 4, 0)
+
+        workstation.delete()
+        self.assertCounters(self.first, 2, 3, 0)
+        self.assertCounters(self.room, 2, 7, 0)
+
+    def test_update_fields_only_counts_what_is_written(self):
+        seated = Workstation.objects.get(employee=self.employees[0])
+        # Funcionário removido só em memória: o status derivado não é gravado
+        seated.employee = None
+        seated.headset = False
+        seated.save(update_fields=['headset'])
+        seated.refresh_from_db()
+        self.assertEqual((seated.status, seated.employee_id), ('OCCUPIED', self.employees[0].pk))
+        self.assertCounters(self.first, 2, 3, 0)
+        self.assertFalse(SeatChange.objects.exists())
+
+        # Equipamento gravado: o status derivado vai junto
+        seated.monitor = False
+        seated.save(update_fields=['monitor'])
+        self.assertEqual(Workstation.objects.get(pk=seated.pk).status, 'MAINTENANCE')
+        self.assertCounters(self.first, 1, 3, 1)
+        self.assertEqual(list(SeatChange.objects.values_list('old_status', 'new_status')), [(1, 3)])
+
+    def test_bulk_save_path(self):
+        vacant = self.second.workstations.order_by('pk')[:2]
+        save_workstation_changes([{'id': ws.pk, 'employee_id': employee.pk} for ws, employee in zip(vacant, self.employees[2:])])
+        self.assertCounters(self.second, 2, 3, 0)
+        self.assertCounters(self.room, 4, 6, 0)
+
+    def test_stale_room_save_keeps_counters(self):
+        stale = Room.objects.get(pk=self.room.pk)
+        self.second.delete()
+        self.assertCounters(self.room, 2, 3, 0)
+        stale.name = 'Renomeada'
+        stale.save()
+        self.assertCounters(self.room, 2, 3, 0)
+
+    def test_command_detects_and_fixes_drift(self):
+        Island.objects.update(occupied_count=0)
+        with self.assertRaises(CommandError):
+            call_command('occupancy_counters', stdout=StringIO(), stderr=StringIO())
+        call_command('occupancy_counters', '--fix', stdout=StringIO())
+        self.assertCounters(self.first, 2, 3, 0)
@@ -0,0 +1,43 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Workstation
+from .factories import make_admin, make_employees, make_room, seat_employees
+
+
+class OccupancyDashboardTests(TestCase):
+    url = reverse('pam:occupancy_dashboard')
+
+    def setUp(self):
+        cache.clear()
+        make_room(islands=2, workstations_per_island=4, name='Sala A')
+        employees = make_employees(6)
+        seat_employees(employees[:3])
+        ws = Workstation.objects.filter(status='UNOCCUPIED').order_by('-pk').first()
+        ws.status = 'MAINTENANCE'
+        ws.headset = False
+        ws.save()
+        self.client.force_login(make_admin())
+
+    def test_json_counts(self):
+        data = self.client.get(self.url, {'format': 'json'}).json()
+        self.assertEqual(data['totals'], {'OCCUPIED': 3, 'UNOCCUPIED': 4, 'MAINTENANCE': 1, 'total': 8})
+        self.assertEqual(data['missing']['headset'], 1)
+        self.assertEqual(sum(row['total'] for row in data['unseated_by_sector']), 3)
+        room = data['rooms'][0]
+        self.assertEqual((room['name'], len(room['islands'])), ('Sala A', 2))
+        self.assertEqual(sum(island['counts']['total'] for island in room['islands']), 8)
+
+    def test_cached_against_layout_version(self):
+        self.client.get(self.url)
+        # Sessão, usuário e a versão do layout: as agregações vêm do cache
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Sala A')
+
+        ws = Workstation.objects.filter(status='OCCUPIED').first()
+        ws.employee = None
+        ws.save()
+        data = self.client.get(self.url, {'format': 'json'}).json()
+        self.assertEqual(data['totals']['OCCUPIED'], 2)
@@ -0,0 +1,44 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Employee, normalize_search_text
+from ..views import EMPLOYEE_SEARCH_PAGE_SIZE, _prefix_upper_bound
+from .factories import make_admin
+
+AJAX = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+
+
+class EmployeeSearchTests(TestCase):
+    def setUp(self):
+        self.client.force_login(make_admin())
+        names = [f"Ana {number:03d}" for number in range(45)] + ["Anabela", "Anb", "Bruno", "Ána Acentuada"]
+        Employee.objects.bulk_create([
+            Employee(name=name, search_name=normalize_search_text(name), cpf=f"{index:011d}", cpf_digits=f"{index:011d}", phone="61900000000", sector='INSS')
+            for index, name in enumerate(names, start=1)
+        ])
+
+    def search(self, **params):
+        return self.client.get(reverse('pam:employee_search_ajax'), params, **AJAX).json()
+
+    def test_prefix_bound(self):
+        self.assertEqual(_prefix_upper_bound("ana"), "anb")
+        self.assertEqual(_prefix_upper_bound("a\U0010ffff"), "b")
+        self.assertIsNone(_prefix_upper_bound("\U0010ffff"))
+
+    def test_keyset_pages_cover_matches_once(self):
+        names, cursor, pages = [], {}, 0
+        while True:
+            data = self.search(q="ana", **cursor)
+            names += [row['name'] for row in data['results']]
+            pages += 1
+            if not data['has_more']:
+                self.assertIsNone(data['next'])
+                break
+            cursor = data['next']
+        self.assertEqual(pages, -(-47 // EMPLOYEE_SEARCH_PAGE_SIZE))
+        self.assertEqual(len(names), len(set(names)))
+        self.assertEqual(
+            sorted(names),
+            sorted([f"Ana {number:03d}" for number in range(45)] + ["Anabela", "Ána Acentuada"]),
+        )
+        self.assertNotIn('search_name', data['results'][0])
@@ -0,0 +1,78 @@
+import asyncio
+
+from django.db import transaction
+from django.test import TestCase
+from django.urls import reverse
+
+from ..events import broker, publish_seat_changes_on_commit
+from ..models import Workstation
+from .factories import make_employees, make_room
+
+
+class SeatEventTests(TestCase):
+    def setUp(self):
+        make_room(islands=1, workstations_per_island=3)
+        self.employee, = make_employees(1)
+        self.workstation = Workstation.objects.order_by('pk').first()
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.subscription = self.loop.run_until_complete(self._subscribe())
+        self.addCleanup(broker.unsubscribe, self.subscription)
+
+    async def _subscribe(self):
+        return broker.subscribe()
+
+    def received(self):
+        # Roda os call_soon_threadsafe pendentes e esvazia a fila do inscrito
+        self.loop.run_until_complete(asyncio.sleep(0))
+        events = []
+        while not self.subscription.queue.empty():
+            events.append(self.subscription.queue.get_nowait())
+        return events
+
+    def test_committed_save_publishes_seat_event(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.workstation.employee = self.employee
+            self.workstation.save()
+            self.assertEqual(self.received(), [])  # Nada antes do commit
+
+        self.assertEqual(self.received(), [{
+            'type': 'seat', 'id': self.workstation.pk, 'status': 'OCCUPIED',
+            'employee_id': self.employee.pk, 'employee_name': self.employee.name,
+        }])
+
+    def test_layout_change_publishes_resync(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            make_room(islands=1, workstations_per_island=2)
+        self.assertEqual(self.received(), [{'type': 'layout'}])
+
+    def test_rolled_back_save_publishes_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.workstation.employee = self.employee
+                    self.workstation.save()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(self.received(), [])
+
+    def test_batch_names_cost_one_query(self):
+        seats = list(Workstation.objects.order_by('pk'))
+        others = make_employees(2)
+        for seat, employee in zip(seats, [self.employee, *others]):
+            seat.employee_id = employee.pk  # Sem o objeto em cache
+            seat.status = 'OCCUPIED'
+
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(1):
+            publish_seat_changes_on_commit(seats)
+        self.assertEqual(
+            [event['employee_name'] for event in self.received()],
+            [self.employee.name, *(employee.name for employee in others)],
+        )
+
+
+class SeatEventsViewTests(TestCase):
+    def test_wsgi_request_gets_no_content(self):
+        # Sem ASGI o stream infinito não pode ser servido: 204 faz o EventSource desistir
+        self.assertEqual(self.client.get(reverse('pam:seat_events')).status_code, 204)
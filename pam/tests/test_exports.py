@@ -0,0 +1,38 @@
+import csv
+import io
+import json
+
+from django.test import TestCase
+from django.urls import reverse
+
+from .factories import make_admin, make_employees, make_room, seat_employees
+
+
+class WorkstationExportTests(TestCase):
+    url = reverse('pam:export_workstations')
+
+    def setUp(self):
+        make_room(islands=2, workstations_per_island=5, name='Sala A')
+        seat_employees(make_employees(3))
+        self.client.force_login(make_admin())
+
+    def test_csv_streams_every_workstation(self):
+        response = self.client.get(self.url, {'format': 'csv'})
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment;', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(sum(1 for row in rows if row['status'] == 'OCCUPIED'), 3)
+        self.assertEqual(rows[0]['room'], 'Sala A')
+
+    def test_jsonl(self):
+        with self.assertNumQueries(3): # sessão, usuário e a consulta da exportação
+            response = self.client.get(self.url, {'format': 'jsonl'})
+            lines = b''.join(response.streaming_content).decode().splitlines()
+        first = json.loads(lines[0])
+        self.assertEqual(len(lines), 10)
+        self.assertEqual(first['island'], 1)
+        self.assertIs(first['monitor'], True)
+
+    def test_unknown_format(self):
+        self.assertEqual(self.client.get(self.url, {'format': 'xml'}).status_code, 400)
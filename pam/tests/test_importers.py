@@ -0,0 +1,79 @@
+import io
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+
+from ..importers import EmployeeImportError, import_employees
+from ..models import Employee
+from .factories import make_admin
+
+CSV = """nome;cpf;email;telefone;setor
+Ana Souza;111.444.777-35;ana@example.com;(61) 91234-5678;Estágio
+Bruno Lima;22233344405;;6133334444;SIAPE_LEO
+Inválido;123;x@;1;Nada
+"""
+
+
+def csv_file(text):
+    return io.BytesIO(text.encode('utf-8'))
+
+
+class EmployeeImportTests(TestCase):
+    def test_creates_and_reports_errors(self):
+        report = import_employees(csv_file(CSV))
+        self.assertEqual((report.created, report.updated, report.error_count), (2, 0, 1))
+        self.assertEqual(report.errors[0].line, 4)
+        ana = Employee.objects.get(cpf='111.444.777-35')
+        self.assertEqual((ana.sector, ana.search_name), ('ESTAGIO', 'ana souza'))
+
+    def test_upsert_by_cpf_digits(self):
+        import_employees(csv_file(CSV))
+        report = import_employees(csv_file(
+            "nome,cpf,email,telefone,setor\n"
+            "Ana Souza Lima,11144477735,ana@example.com,(61) 91234-5678,ESTAGIO\n"
+            "Bruno Lima,222.333.444-05,,6133334444,SIAPE Leo\n"
+        ))
+        self.assertEqual((report.created, report.updated, report.unchanged), (0, 1, 1))
+        self.assertEqual(Employee.objects.get(cpf='111.444.777-35').name, 'Ana Souza Lima')
+
+    def test_upsert_matches_any_stored_cpf_format(self):
+        ana = Employee.objects.create(name="Ana", cpf="111 444 777 35", phone="61912345678", sector='INSS')
+        self.assertEqual(ana.cpf_digits, '11144477735')
+        report = import_employees(csv_file(
+            "nome,cpf,email,telefone,setor\n"
+            "Ana Souza,111.444.777-35,,61912345678,INSS\n"
+        ))
+        self.assertEqual((report.created, report.updated), (0, 1))
+        self.assertEqual(Employee.objects.get(pk=ana.pk).name, 'Ana Souza')
+
+    def test_dry_run_writes_nothing(self):
+        report = import_employees(csv_file(CSV), dry_run=True)
+        self.assertEqual(report.created, 2)
+        self.assertFalse(Employee.objects.exists())
+
+    def test_values_longer_than_the_columns_are_row_errors(self):
+        # Dígitos certos, mas mais caracteres do que cabem em cpf (14) e phone (15)
+        report = import_employees(csv_file(
+            "nome;cpf;email;telefone;setor\n"
+            f"{'A' * 101};11144477735;;6133334444;INSS\n"
+            "Ana;111.444.777--35;;6133334444;INSS\n"
+            "Bruno;22233344405;;(61)  3333 - 4444;INSS\n"
+        ))
+        self.assertEqual((report.created, report.error_count), (0, 3))
+        self.assertEqual(
+            [error.message for error in report.errors],
+            ["Nome muito longo (máximo de 100 caracteres).", "CPF muito longo (máximo de 14 caracteres).",
+             "Telefone muito longo (máximo de 15 caracteres)."],
+        )
+
+    def test_missing_columns(self):
+        with self.assertRaises(EmployeeImportError):
+            import_employees(csv_file("nome,cpf\nAna,11144477735\n"))
+
+    def test_upload_from_manage_employees(self):
+        self.client.force_login(make_admin())
+        upload = SimpleUploadedFile('funcionarios.csv', CSV.encode('utf-8'), content_type='text/csv')
+        response = self.client.post(reverse('pam:manage_employees'), {'action': 'import', 'file': upload})
+        self.assertRedirects(response, reverse('pam:manage_employees'))
+        self.assertEqual(Employee.objects.count(), 2)
@@ -0,0 +1,12 @@
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+
+
+class HotQueryPlanTests(TestCase):
+    def test_hot_queries_use_their_indexes(self):
+        # --check falha (CommandError) se algum plano deixar de usar o índice esperado
+        out = io.StringIO()
+        call_command('explain_hot_queries', check=True, stdout=out)
+        self.assertNotIn("sem o índice esperado", out.getvalue())
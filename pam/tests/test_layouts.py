@@ -0,0 +1,150 @@
+import io
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..cache import get_island_versions
+from ..layouts import clone_room, delete_room
+from ..models import Employee, Island, LayoutTemplate, Room, Workstation
+from .factories import make_admin, make_employees, make_room, seat_employees
+
+
+class DeleteRoomTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.room = make_room(islands=3, workstations_per_island=4, name="Removida")
+        self.other = make_room(islands=1, workstations_per_island=4, name="Mantida")
+        self.employees = make_employees(2)
+        seat_employees(self.employees[:1], self.room_workstations())
+        seat_employees(self.employees[1:], Workstation.objects.filter(island__room=self.other))
+
+    def room_workstations(self):
+        return Workstation.objects.filter(island__room=self.room)
+
+    def test_deletes_room_islands_and_workstations(self):
+        island_ids = list(self.room.islands.values_list('pk', flat=True))
+        versions = get_island_versions(island_ids)
+        with self.captureOnCommitCallbacks(execute=True):
+            delete_room(self.room.pk)
+
+        self.assertFalse(Room.objects.filter(pk=self.room.pk).exists())
+        self.assertFalse(Island.objects.filter(pk__in=island_ids).exists())
+        self.assertFalse(Workstation.objects.filter(island_id__in=island_ids).exists())
+        self.assertNotEqual(get_island_versions(island_ids), versions)
+        # Funcionários continuam cadastrados; a outra sala fica intacta
+        self.assertEqual(Employee.objects.count(), 2)
+        self.other.refresh_from_db()
+        self.assertEqual((self.other.occupied_count, self.other.total_count), (1, 4))
+        self.assertEqual(Workstation.objects.filter(employee__isnull=False).count(), 1)
+
+    def test_missing_room(self):
+        with self.assertRaises(Room.DoesNotExist):
+            delete_room(self.room.pk + 1000)
+
+        self.client.force_login(make_admin())
+        url = reverse('pam:remove_room_ajax', args=[self.room.pk + 1000])
+        response = self.client.post(url, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 404)
+
+
+class LayoutTemplateTests(TestCase):
+    def test_special_rooms_became_templates(self):
+        # Antes fixas no código (ROOM_CATEGORY_OVERRIDES), agora dados editáveis
+        self.assertEqual(
+            [island['category'] for island in LayoutTemplate.objects.get(name="Sala 1").islands],
+            ['INSS', 'ESTAGIO'],
+        )
+        self.assertTrue(LayoutTemplate.objects.filter(name="Sala 2").exists())
+
+    def test_clean_validates_and_normalizes(self):
+        template = LayoutTemplate(name="Andar", islands=[{'workstations': '20', 'category': 'SIAPE Dion'}])
+        template.full_clean()
+        self.assertEqual(template.islands, [{'workstations': 20, 'category': 'SIAPE_DION'}])
+
+        for islands in ([], [{'workstations': 0, 'category': 'INSS'}], [{'workstations': 5, 'category': 'X'}], [5]):
+            with self.subTest(islands=islands), self.assertRaises(ValidationError):
+                LayoutTemplate(name="Inválido", islands=islands).full_clean()
+
+    def test_create_rooms_from_template(self):
+        LayoutTemplate.objects.create(name="Andar", islands=[{'workstations': 3, 'category': 'INSS'}, {'workstations': 2, 'category': 'ESTAGIO'}])
+        call_command('create_rooms', 'A', 'B', template="Andar", stdout=io.StringIO())
+
+        for name in ("A", "B"):
+            room = Room.objects.get(name=name)
+            self.assertEqual(room.total_count, 5)
+            self.assertEqual(
+                list(room.islands.order_by('island_number').values_list('island_number', 'category', 'total_count')),
+                [(1, 'INSS', 3), (2, 'ESTAGIO', 2)],
+            )
+        with self.assertRaises(CommandError):
+            call_command('create_rooms', 'A', 'C', template="Andar", stdout=io.StringIO())
+        self.assertFalse(Room.objects.filter(name="C").exists())
+
+
+class CloneRoomTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.source = make_room(islands=3, workstations_per_island=4, name="Origem")
+        seat_employees(make_employees(2), Workstation.objects.filter(island__room=self.source).order_by('pk'))
+        Workstation.objects.filter(island__room=self.source, island__island_number=3).update(status='MAINTENANCE', monitor=False)
+
+    def layout(self, room):
+        return [
+            (number, category, list(room.islands.get(island_number=number).workstations.order_by('sequence').values_list('category', flat=True)))
+            for number, category in room.islands.order_by('island_number').values_list('island_number', 'category')
+        ]
+
+    def test_clone_copies_structure_with_fresh_vacant_workstations(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            clone = clone_room(self.source.pk, "Cópia")
+
+        self.assertEqual(self.layout(clone), self.layout(self.source))
+        copies = Workstation.objects.filter(island__room=clone)
+        self.assertEqual(copies.count(), 12)
+        self.assertFalse(copies.exclude(status='UNOCCUPIED').exists())
+        self.assertFalse(copies.filter(employee__isnull=False).exists())
+        self.assertFalse(copies.filter(monitor=False).exists())
+        source_sequences = set(Workstation.objects.filter(island__room=self.source).values_list('category', 'sequence'))
+        self.assertFalse(source_sequences & set(copies.values_list('category', 'sequence')))
+        clone.refresh_from_db()
+        self.assertEqual((clone.occupied_count, clone.vacant_count, clone.total_count), (0, 12, 12))
+
+    def test_clone_view(self):
+        self.client.force_login(make_admin())
+        url = reverse('pam:clone_room_ajax', args=[self.source.pk])
+        response = self.client.post(url, {'name': "Cópia"}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertTrue(response.json()['success'])
+        self.assertEqual(Room.objects.get(name="Cópia").total_count, 12)
+
+        response = self.client.post(url, {'name': "Cópia"}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertIn('name', response.json()['errors'])
+        missing = reverse('pam:clone_room_ajax', args=[self.source.pk + 1000])
+        response = self.client.post(missing, {'name': "Outra"}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(PAM_MAX_ISLANDS_PER_ROOM=3, PAM_MAX_WORKSTATIONS_PER_ISLAND=20)
+class RoomSizeLimitTests(TestCase):
+    def post_room(self, islands, workstations):
+        data = {'name': "Grande", 'num_islands': str(islands)}
+        for number in range(1, islands + 1):
+            data[f'island_{number}_workstations'] = str(workstations)
+            data[f'island_{number}_category'] = 'INSS'
+        return self.client.post(reverse('pam:add_room_ajax'), data, HTTP_X_REQUESTED_WITH='XMLHttpRequest').json()
+
+    def test_add_room_rejects_oversized_requests(self):
+        self.client.force_login(make_admin())
+        for islands, workstations in ((4, 1), (1, 21)):
+            with self.subTest(islands=islands, workstations=workstations):
+                response = self.post_room(islands, workstations)
+                self.assertFalse(response['success'])
+                self.assertIn('counts', response['errors'])
+        self.assertFalse(Room.objects.exists())
+        self.assertTrue(self.post_room(3, 20)['success'])
+
+    def test_template_limits(self):
+        with self.assertRaises(ValidationError):
+            LayoutTemplate(name="Grande", islands=[{'workstations': 21, 'category': 'INSS'}]).full_clean()
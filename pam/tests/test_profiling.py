@@ -0,0 +1,65 @@
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.template.backends.django import Template as DjangoTemplate
+from django.template.loader import render_to_string
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import resolve, reverse
+
+from ..models import Room
+from ..profiling import QueryProfilingMiddleware, store, template_timing
+
+
+class QueryProfilingMiddlewareTests(TestCase):
+    def setUp(self):
+        store.clear()
+        self.addCleanup(store.clear)
+
+    def profiled_request(self, view):
+        request = RequestFactory().get(reverse('pam:list_rooms_ajax'))
+        request.resolver_match = resolve(request.path)
+        return QueryProfilingMiddleware(view)(request)
+
+    @override_settings(PAM_PROFILING_ENABLED=False)
+    def test_disabled_by_default(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            QueryProfilingMiddleware(lambda request: HttpResponse())
+
+    @override_settings(PAM_PROFILING_ENABLED=True, PAM_PROFILING_DUPLICATE_THRESHOLD=3)
+    def test_counts_queries_and_repeated_fingerprints(self):
+        def view(request):
+            for pk in (1, 2, 3):
+                Room.objects.filter(pk=pk).exists()
+            render_to_string('pam/office_island.html', {'island': None})
+            return HttpResponse()
+
+        with self.assertLogs('pam.profiling', 'WARNING') as logs:
+            self.profiled_request(view)
+
+        summary = store.summary()['pam:list_rooms_ajax']
+        self.assertEqual((summary['count'], summary['queries']['max']), (1, 3))
+        self.assertGreater(summary['template_ms']['max'], 0)
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn("repetida 3 vezes", logs.output[0])
+        self.assertIn('FROM "pam_room" WHERE "pam_room"."id" = %s', logs.output[0])
+
+    @override_settings(PAM_PROFILING_ENABLED=True)
+    def test_template_render_is_restored_after_requests(self):
+        original = DjangoTemplate.render
+        seen = []
+
+        def view(request):
+            seen.append(DjangoTemplate.render)
+            return HttpResponse()
+
+        with self.assertLogs('pam.profiling', 'DEBUG'):
+            self.profiled_request(view)
+        self.assertIsNot(seen[0], original)
+        self.assertIs(DjangoTemplate.render, original)
+
+        # Medições simultâneas compartilham o mesmo wrapper, sem empilhar
+        with template_timing:
+            wrapper = DjangoTemplate.render
+            with template_timing:
+                self.assertIs(DjangoTemplate.render, wrapper)
+            self.assertIs(DjangoTemplate.render, wrapper)
+        self.assertIs(DjangoTemplate.render, original)
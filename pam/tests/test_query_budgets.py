@@ -0,0 +1,200 @@
+"""Orçamento de consultas das views do pam.
+
+Cada teste mede a mesma requisição em um andar pequeno e depois em um andar
+realista (centenas de PAs, milhares de funcionários) e exige o mesmo número
+fixo de consultas nos dois: se alguém reintroduzir uma consulta por PA,
+por ilha ou por formulário, o teste quebra mostrando as consultas extras.
+
+Os tempos das views no andar grande são registrados no logger 'pam.tests'
+como referência; com PAM_TIMING_BASELINES=<arquivo.json> eles também são
+gravados em disco para comparar entre execuções. Tempo não reprova o teste.
+"""
+import json
+import logging
+import os
+import statistics
+import time
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Room, Workstation
+from .factories import make_admin, make_employees, make_floor, make_room
+
+logger = logging.getLogger('pam.tests')
+
+SMALL_FLOOR = {'rooms': 1, 'islands': 2, 'workstations_per_island': 5, 'employees': 20}
+LARGE_FLOOR = {'rooms': 4, 'islands': 6, 'workstations_per_island': 30, 'employees': 3000}
+
+TIMING_RUNS = 5
+
+AJAX = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+
+
+class QueryBudgetTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.timings = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if not cls.timings:
+            return
+        for name, ms in sorted(cls.timings.items()):
+            logger.info("Baseline %s: %.1fms (mediana de %d execuções)", name, ms, TIMING_RUNS)
+        path = os.getenv('PAM_TIMING_BASELINES')
+        if path:
+            # Cada classe acrescenta as suas views ao mesmo arquivo
+            baselines = {}
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    baselines = json.load(f)
+            baselines.update(cls.timings)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(baselines, f, indent=2, sort_keys=True)
+
+    def setUp(self):
+        # Os ids das ilhas se repetem entre testes (rollback); o cache de fragmentos não pode vazar
+        cache.clear()
+        self.client.force_login(make_admin())
+
+    def assertBudget(self, budget, request, setup=None):
+        """Exige exatamente `budget` consultas no andar pequeno e no grande."""
+        make_floor(**SMALL_FLOOR)
+        for size in ('pequeno', 'grande'):
+            if size == 'grande':
+                make_floor(**LARGE_FLOOR)
+            args = (setup() if setup else None) or ()
+            with self.subTest(andar=size), self.assertNumQueries(budget):
+                response = request(*args)
+            self.assertLess(response.status_code, 400)
+        return response
+
+    def record_timing(self, name, request, setup=None):
+        durations = []
+        for _ in range(TIMING_RUNS):
+            args = (setup() if setup else None) or ()
+            start = time.perf_counter()
+            request(*args)
+            durations.append((time.perf_counter() - start) * 1000)
+        self.timings[name] = statistics.median(durations)
+
+
+class OfficeViewBudgetTests(QueryBudgetTestCase):
+    url = reverse('pam:office_view')
+
+    def test_cold_cache(self):
+        # Versão do layout (ETag), salas com ilhas (um LEFT JOIN) e as PAs das ilhas sem fragmento
+        self.assertBudget(3, lambda: self.client.get(self.url), setup=cache.clear)
+        self.record_timing('office_view (cache frio)', lambda: self.client.get(self.url), setup=cache.clear)
+
+    def test_warm_cache(self):
+        def warm():
+            cache.clear()
+            self.client.get(self.url)
+        # Sem consulta de PAs: todas as ilhas vêm do cache de fragmentos
+        self.assertBudget(2, lambda: self.client.get(self.url), setup=warm)
+        self.record_timing('office_view (cache quente)', lambda: self.client.get(self.url))
+
+    def test_not_modified(self):
+        def etag():
+            return (self.client.get(self.url)['ETag'],)
+        # Só a consulta da versão do layout
+        response = self.assertBudget(1, lambda tag: self.client.get(self.url, HTTP_IF_NONE_MATCH=tag), setup=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class AdminOfficeViewBudgetTests(QueryBudgetTestCase):
+    url = reverse('pam:admin_office_view')
+
+    def test_get(self):
+        # Sessão, usuário, salas, ilhas, PAs com funcionário (select_related) e modelos de layout
+        self.assertBudget(6, lambda: self.client.get(self.url))
+        self.record_timing('admin_office_view GET', lambda: self.client.get(self.url))
+
+    def post_data(self):
+        """Alterações para 50 PAs: metade esvaziada, metade ocupada por quem está sem PA."""
+        workstations = list(Workstation.objects.order_by('pk')[:50])
+        employees = make_employees(25)
+        data = {}
+        for index, workstation in enumerate(workstations):
+            if index % 2:
+                data[f'{workstation.pk}-status'] = 'UNOCCUPIED'
+                data[f'{workstation.pk}-employee'] = ''
+            else:
+                data[f'{workstation.pk}-status'] = 'OCCUPIED'
+                data[f'{workstation.pk}-employee'] = str(employees[index // 2].pk)
+        return (data,)
+
+    def test_post(self):
+        # Sessão, usuário, PAs e funcionários (in_bulk), onde os funcionários já estão sentados,
+        # um UPDATE em lote, os contadores de ocupação (ilhas das PAs, UPDATE das ilhas e das
+        # salas), o INSERT em lote do histórico, mais o savepoint
+        response = self.assertBudget(12, lambda data: self.client.post(self.url, data), setup=self.post_data)
+        self.assertEqual(response.status_code, 302)
+        self.record_timing('admin_office_view POST', lambda data: self.client.post(self.url, data), setup=self.post_data)
+
+
+class RoomAjaxBudgetTests(QueryBudgetTestCase):
+    def room_data(self):
+        data = {'name': f'Sala Nova {Room.objects.count()}', 'num_islands': '4'}
+        for number in range(1, 5):
+            data[f'island_{number}_workstations'] = '10'
+            data[f'island_{number}_category'] = 'INSS'
+        return (data,)
+
+    def test_add_room(self):
+        url = reverse('pam:add_room_ajax')
+        # Sessão, usuário, nome único, sala, ilhas, reserva de sequências e PAs, mais savepoints
+        response = self.assertBudget(12, lambda data: self.client.post(url, data, **AJAX), setup=self.room_data)
+        self.assertTrue(response.json()['success'])
+        self.record_timing('add_room_ajax_view', lambda data: self.client.post(url, data, **AJAX), setup=self.room_data)
+
+    def clone_data(self):
+        room = make_room(islands=4, workstations_per_island=30)
+        return (reverse('pam:clone_room_ajax', args=[room.pk]), {'name': f'Cópia {Room.objects.count()}'})
+
+    def test_clone_room(self):
+        # Sessão, usuário, nome único, ilhas e PAs da origem, sala, ilhas, reserva de
+        # sequências (4 consultas por categoria; a origem tem as 4) e PAs, mais savepoints
+        response = self.assertBudget(27, lambda url, data: self.client.post(url, data, **AJAX), setup=self.clone_data)
+        self.assertTrue(response.json()['success'])
+        self.record_timing('clone_room_ajax_view', lambda url, data: self.client.post(url, data, **AJAX), setup=self.clone_data)
+
+    def room_url(self, islands=4, workstations_per_island=30):
+        room = make_room(islands=islands, workstations_per_island=workstations_per_island)
+        return (reverse('pam:remove_room_ajax', args=[room.pk]),)
+
+    def test_remove_room(self):
+        # Sessão, usuário, ids das ilhas e os DELETEs de PAs, ilhas e sala, mais
+        # savepoints: não depende do andar nem do tamanho da sala removida
+        sizes = iter([(1, 5), (10, 100)])
+        response = self.assertBudget(8, lambda url: self.client.post(url, **AJAX), setup=lambda: self.room_url(*next(sizes)))
+        self.assertTrue(response.json()['success'])
+        self.record_timing('remove_room_ajax_view', lambda url: self.client.post(url, **AJAX), setup=self.room_url)
+
+
+class ManageEmployeesBudgetTests(QueryBudgetTestCase):
+    url = reverse('pam:manage_employees')
+
+    def test_get(self):
+        # Sessão, usuário e a lista de funcionários
+        self.assertBudget(3, lambda: self.client.get(self.url))
+        self.record_timing('manage_employees_view GET', lambda: self.client.get(self.url))
+
+    def seated_employee(self):
+        employee = make_employees(1)[0]
+        workstation = Workstation.objects.filter(employee__isnull=False).order_by('pk').first()
+        workstation.employee = employee
+        workstation.save()
+        return ({'action': 'remove', 'employee_id': employee.pk},)
+
+    def test_remove(self):
+        # Sessão, usuário, funcionário, PAs dele, liberação (UPDATE), contadores (3),
+        # histórico e o DELETE, mais o savepoint (2)
+        response = self.assertBudget(12, lambda data: self.client.post(self.url, data), setup=self.seated_employee)
+        self.assertEqual(response.status_code, 302)
+        self.record_timing('manage_employees_view POST remove', lambda data: self.client.post(self.url, data), setup=self.seated_employee)
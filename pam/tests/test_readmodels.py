@@ -0,0 +1,42 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Room, Workstation
+from ..readmodels import load_rooms, load_workstations
+from .factories import make_employees, make_room, seat_employees
+
+
+class ReadModelTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.room = make_room(islands=2, workstations_per_island=3, name="B")
+        self.empty = Room.objects.create(name="A")
+        self.employee, = make_employees(1)
+        self.seat, = seat_employees([self.employee])
+
+    def test_rooms_include_islands_and_empty_rooms(self):
+        with self.assertNumQueries(1):
+            rooms = load_rooms()
+        self.assertEqual([room.name for room in rooms], ["A", "B"])
+        self.assertEqual(rooms[0].islands, [])
+        self.assertEqual([island.island_number for island in rooms[1].islands], [1, 2])
+        self.assertEqual((rooms[1].occupied_count, rooms[1].total_count), (1, 6))
+
+    def test_workstation_rows_carry_only_rendered_columns(self):
+        with self.assertNumQueries(1):
+            by_island = load_workstations([self.seat.island_id])
+        rows = by_island[self.seat.island_id]
+        self.assertEqual(len(rows), 3)
+        seated = next(row for row in rows if row.id == self.seat.pk)
+        self.assertEqual((seated.status, seated.employee_name), ('OCCUPIED', self.employee.name))
+        with self.assertRaises(AttributeError):
+            seated.monitor = False  # __slots__: nenhum atributo além dos exibidos
+        self.assertFalse(hasattr(seated, '__dict__'))
+
+    def test_office_view_renders_rows(self):
+        response = self.client.get(reverse('pam:office_view'))
+        self.assertContains(response, self.employee.name)
+        self.assertContains(response, "Nenhuma ilha nesta sala.")
+        self.assertContains(response, f'data-workstation-id="{self.seat.pk}"')
+        self.assertEqual(response.content.count(b'class="workstation"'), Workstation.objects.count())
@@ -0,0 +1,74 @@
+import io
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from ..cache import get_island_fragments, get_island_versions
+from ..models import Island, Room
+from ..routers import PIN_COOKIE
+from .factories import make_admin, make_room
+
+# Alias próprio: não colide com uma réplica configurada no ambiente
+REPLICA = 'test_replica'
+
+AJAX = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+
+
+@override_settings(PAM_READ_REPLICA=REPLICA)
+class ReplicaRoutingTests(TransactionTestCase):
+    """Principal (banco de teste) e réplica (arquivo SQLite copiado com sync_replica)."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Alias criado só para esta classe; o test runner não o conhece
+        cls.tmpdir = Path(tempfile.mkdtemp(prefix='pam-replica-'))
+        connections.settings[REPLICA] = {**connections.settings['default'], 'NAME': str(cls.tmpdir / 'replica.sqlite3')}
+        cls.databases = {'default', REPLICA}
+
+    @classmethod
+    def tearDownClass(cls):
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+        cls.databases = {'default'}
+        shutil.rmtree(cls.tmpdir, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.room = make_room(islands=1, workstations_per_island=2, name="Sala Antiga")
+        call_command('sync_replica', stdout=io.StringIO())
+        # Alteração que a réplica ainda não recebeu
+        Room.objects.filter(pk=self.room.pk).update(name="Sala Nova")
+        self.client.force_login(make_admin())
+
+    def test_read_only_views_read_from_replica(self):
+        self.assertContains(self.client.get(reverse('pam:office_view')), "Sala Antiga")
+        rooms = self.client.get(reverse('pam:list_rooms_ajax'), **AJAX).json()['rooms']
+        self.assertEqual([room['name'] for room in rooms], ["Sala Antiga"])
+        export = b''.join(self.client.get(reverse('pam:export_workstations'), {'format': 'csv'}).streaming_content)
+        self.assertIn(b"Sala Antiga", export)
+        # As demais views leem do principal
+        self.assertContains(self.client.get(reverse('pam:admin_office_view')), "Sala Nova")
+
+    def test_write_pins_browser_to_primary(self):
+        data = {'name': 'Sala Extra', 'num_islands': '1', 'island_1_workstations': '2', 'island_1_category': 'INSS'}
+        response = self.client.post(reverse('pam:add_room_ajax'), data, **AJAX)
+        self.assertTrue(response.json()['success'])
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        response = self.client.get(reverse('pam:office_view'))
+        self.assertContains(response, "Sala Nova")
+        self.assertContains(response, "Sala Extra")
+
+    def test_recent_island_versions_are_not_cached_from_replica(self):
+        self.client.get(reverse('pam:office_view'))
+        island_ids = Island.objects.values_list('pk', flat=True)
+        self.assertEqual(get_island_fragments(get_island_versions(island_ids)), {})
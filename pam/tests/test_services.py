@@ -0,0 +1,51 @@
+from django.db import IntegrityError
+from django.test import TestCase
+
+from ..models import Workstation
+from ..services import save_workstation_changes
+from .factories import make_employees, make_room, seat_employees
+
+
+class OneSeatPerEmployeeTests(TestCase):
+    def setUp(self):
+        make_room(islands=1, workstations_per_island=4)
+        self.ana, self.bruno, self.carla = make_employees(3)
+        self.ws = list(Workstation.objects.order_by('pk'))
+        seat_employees([self.ana, self.bruno], self.ws[:2])
+
+    def employee_of(self, workstation):
+        return Workstation.objects.values_list('employee_id', flat=True).get(pk=workstation.pk)
+
+    def test_database_rejects_double_booking(self):
+        with self.assertRaises(IntegrityError):
+            Workstation.objects.filter(pk=self.ws[2].pk).update(employee=self.ana)
+
+    def test_assigning_seated_employee_is_an_error(self):
+        results = save_workstation_changes([{'id': self.ws[2].pk, 'employee_id': self.ana.pk}])
+        self.assertFalse(results[0]['success'])
+        self.assertIn('já ocupa', results[0]['error'])
+        self.assertIsNone(self.employee_of(self.ws[2]))
+
+    def test_same_employee_twice_in_batch(self):
+        results = save_workstation_changes([
+            {'id': self.ws[2].pk, 'employee_id': self.carla.pk},
+            {'id': self.ws[3].pk, 'employee_id': self.carla.pk},
+        ])
+        self.assertEqual([result['success'] for result in results], [True, False])
+        self.assertEqual(self.employee_of(self.ws[2]), self.carla.pk)
+
+    def test_swap_and_move_within_batch(self):
+        results = save_workstation_changes([
+            {'id': self.ws[0].pk, 'employee_id': self.bruno.pk},
+            {'id': self.ws[1].pk, 'employee_id': self.ana.pk},
+        ])
+        self.assertTrue(all(result['success'] for result in results))
+        self.assertEqual((self.employee_of(self.ws[0]), self.employee_of(self.ws[1])), (self.bruno.pk, self.ana.pk))
+
+        # Mover para uma PA vaga liberando a antiga no mesmo lote
+        results = save_workstation_changes([
+            {'id': self.ws[3].pk, 'employee_id': self.ana.pk},
+            {'id': self.ws[1].pk, 'employee_id': ''},
+        ])
+        self.assertTrue(all(result['success'] for result in results))
+        self.assertEqual(self.employee_of(self.ws[3]), self.ana.pk)
@@ -0,0 +1,118 @@
+import re
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import FloorSnapshot, SeatChange, Workstation
+from ..services import save_workstation_changes
+from ..snapshots import floor_at, take_snapshot
+from .factories import make_admin, make_employees, make_floor
+
+
+def floor_html(response):
+    # Só as salas e ilhas: o cabeçalho e o script diferem na versão histórica
+    return re.search(r'<div class="room-slider-area">.*?<script>', response.content.decode(), re.S).group(0)
+
+
+class OfficeAtTests(TestCase):
+    def setUp(self):
+        make_floor(rooms=2, islands=2, workstations_per_island=4, employees=10, occupancy=0.5)
+        self.admin = make_admin()
+        self.client.force_login(self.admin)
+        self.ws = list(Workstation.objects.order_by('pk'))
+        self.newcomers = make_employees(3)
+
+    def live_floor(self):
+        cache.clear()
+        return floor_html(self.client.get(reverse('pam:office_view')))
+
+    def floor_at_view(self, at):
+        response = self.client.get(reverse('pam:office_at'), {'at': at.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'connectSeatEvents();\n') # Sem SSE na versão histórica
+        return floor_html(response), response.context
+
+    def change_seats(self):
+        save_workstation_changes([
+            {'id': self.ws[0].pk, 'employee_id': ''},
+            {'id': self.ws[-1].pk, 'employee_id': self.newcomers[0].pk},
+        ], user=self.admin)
+        save_workstation_changes([{'id': self.ws[-2].pk, 'status': 'MAINTENANCE'}], user=self.admin)
+
+    def test_forward_replay_from_previous_snapshot(self):
+        snapshot = take_snapshot()
+        save_workstation_changes([{'id': self.ws[-3].pk, 'employee_id': self.newcomers[1].pk}], user=self.admin)
+        expected, at = self.live_floor(), timezone.now()
+        self.change_seats()
+        # A foto fica mais perto de `at` que o estado atual, qualquer que seja
+        # a demora do render acima
+        FloorSnapshot.objects.filter(pk=snapshot.pk).update(created_at=at)
+
+        html, context = self.floor_at_view(at)
+        self.assertEqual(html, expected)
+        self.assertIsNotNone(context['snapshot_base'])
+        self.assertEqual(context['snapshot_replayed'], 1)
+
+    def test_backward_replay_from_current_state(self):
+        expected, at = self.live_floor(), timezone.now()
+        self.change_seats()
+
+        html, context = self.floor_at_view(at)
+        self.assertEqual(html, expected)
+        self.assertNotEqual(html, self.live_floor())
+        self.assertIsNone(context['snapshot_base'])
+        self.assertEqual(context['snapshot_replayed'], 3)
+
+    def test_backward_replay_from_following_snapshot(self):
+        expected, at = self.live_floor(), timezone.now()
+        self.change_seats()
+        snapshot = take_snapshot()
+        save_workstation_changes([{'id': self.ws[1].pk, 'employee_id': ''}], user=self.admin)
+
+        state = floor_at(at)
+        self.assertEqual(state.base, snapshot)
+        self.assertEqual(state.replayed, 3)  # A troca posterior à foto não é lida
+        html, _ = self.floor_at_view(at)
+        self.assertEqual(html, expected)
+
+    def test_snapshot_is_compact(self):
+        snapshot = take_snapshot()
+        self.assertEqual(snapshot.workstation_count, 16)
+        seat = FloorSnapshot.objects.get().data['workstations'][0]
+        self.assertEqual(len(seat), 11)  # id, ilha, categoria, sequência, funcionário, status e 5 equipamentos
+
+    def test_impossible_date_is_rejected(self):
+        for at in ('2024-02-30T10:00', '2024-13-01T10:00'):
+            with self.subTest(at=at):
+                self.assertEqual(self.client.get(reverse('pam:office_at'), {'at': at}).status_code, 400)
+
+    def test_replay_reads_only_changes_between_neighbouring_snapshots(self):
+        save_workstation_changes([{'id': self.ws[1].pk, 'employee_id': ''}], user=self.admin)
+        previous = take_snapshot()
+        save_workstation_changes([{'id': self.ws[-3].pk, 'employee_id': self.newcomers[1].pk}], user=self.admin)
+        following = take_snapshot()
+        self.change_seats()
+
+        # Datas forjadas: se o replay não limitasse os ids pelas fotos
+        # vizinhas, as trocas de fora do intervalo entrariam na conta
+        now = timezone.now()
+        FloorSnapshot.objects.filter(pk=previous.pk).update(created_at=now - timedelta(hours=3))
+        FloorSnapshot.objects.filter(pk=following.pk).update(created_at=now - timedelta(hours=1))
+        inside = SeatChange.objects.filter(id__gt=previous.last_change_id, id__lte=following.last_change_id)
+        SeatChange.objects.filter(id__lte=previous.last_change_id).update(created_at=now - timedelta(minutes=65))
+        SeatChange.objects.filter(id__gt=following.last_change_id).update(created_at=now - timedelta(hours=2, minutes=55))
+
+        # Perto da foto anterior: replay para frente
+        inside.update(created_at=now - timedelta(hours=2, minutes=40))
+        self.assertEqual(floor_at(now - timedelta(hours=2, minutes=50)).replayed, 0)
+        state = floor_at(now - timedelta(hours=2, minutes=30))
+        self.assertEqual((state.base, state.replayed), (previous, 1))
+
+        # Perto da foto seguinte: replay para trás
+        inside.update(created_at=now - timedelta(hours=1, minutes=20))
+        self.assertEqual(floor_at(now - timedelta(hours=1, minutes=10)).replayed, 0)
+        state = floor_at(now - timedelta(hours=1, minutes=30))
+        self.assertEqual((state.base, state.replayed), (following, 1))
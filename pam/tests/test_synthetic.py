@@ -0,0 +1,40 @@
+from django.test import TestCase
+
+from ..models import Employee, Workstation
+from ..services import save_workstation_changes
+from ..snapshots import take_snapshot
+from ..synthetic import FLUSHED_MODELS, build_employees, cpf_from_base, flush_office, generate_office
+
+
+class SyntheticDataTests(TestCase):
+    def test_same_seed_same_employees(self):
+        first = build_employees(['INSS', 'ESTAGIO'] * 5, seed=3)
+        second = build_employees(['INSS', 'ESTAGIO'] * 5, seed=3)
+        self.assertEqual([(e.name, e.cpf, e.phone) for e in first], [(e.name, e.cpf, e.phone) for e in second])
+
+    def test_cpf_check_digits(self):
+        self.assertEqual(cpf_from_base(111444777), '111.444.777-35')
+
+    def test_generate_office(self):
+        office = generate_office(rooms=2, islands_per_room=3, workstations_per_island=5, employees=60, occupancy=1, seed=1)
+        self.assertEqual(Workstation.objects.count(), 30)
+        self.assertEqual(len(office.employees), 60)
+        valid_sectors = {key for key, _ in Employee.SECTOR_CHOICES}
+        self.assertTrue(set(Employee.objects.values_list('sector', flat=True)) <= valid_sectors)
+        # Cada PA ocupada tem um funcionário do setor da sua categoria
+        seated = Workstation.objects.filter(status='OCCUPIED').select_related('employee')
+        self.assertEqual(seated.count(), office.seated)
+        self.assertTrue(all(ws.employee.sector == ws.category for ws in seated))
+
+    def test_flush_office_is_set_based_and_clears_history(self):
+        generate_office(rooms=2, islands_per_room=3, workstations_per_island=5, employees=40, occupancy=0.5, seed=1)
+        vacant = Workstation.objects.filter(employee__isnull=True).order_by('pk').first()
+        seated = Workstation.objects.filter(employee__isnull=False).order_by('pk').first()
+        save_workstation_changes([{'id': seated.pk, 'employee_id': ''}, {'id': vacant.pk, 'employee_id': seated.employee_id}])
+        take_snapshot()
+
+        # Ids das ilhas, um DELETE por tabela, mais o savepoint (2)
+        with self.assertNumQueries(len(FLUSHED_MODELS) + 3):
+            flush_office()
+        for model in FLUSHED_MODELS:
+            self.assertFalse(model.objects.exists(), model.__name__)
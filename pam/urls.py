@@ -5,11 +5,21 @@ app_name = 'pam'
 
 urlpatterns = [
     path('', views.office_view, name='office_view'),
+    path('events/seats/', views.seat_events_view, name='seat_events'),
     path('office-admin/', views.admin_office_view, name='admin_office_view'),
     # URLs AJAX
+    path('office-admin/save-workstations-ajax/', views.save_workstations_ajax_view, name='save_workstations_ajax'),
     path('office-admin/add-room-ajax/', views.add_room_ajax_view, name='add_room_ajax'),
+    path('office-admin/employee-search-ajax/', views.employee_search_ajax_view, name='employee_search_ajax'),
     path('office-admin/list-rooms-ajax/', views.list_rooms_ajax_view, name='list_rooms_ajax'),
     path('office-admin/remove-room-ajax/<int:room_id>/', views.remove_room_ajax_view, name='remove_room_ajax'),
+    path('office-admin/clone-room-ajax/<int:room_id>/', views.clone_room_ajax_view, name='clone_room_ajax'),
+    path('office-admin/occupancy/', views.occupancy_dashboard_view, name='occupancy_dashboard'),
+    path('office-admin/allocate/', views.allocate_seats_view, name='allocate_seats'),
+    path('office-admin/history/', views.seat_history_view, name='seat_history'),
+    path('office-admin/history/office/', views.office_at_view, name='office_at'),
+    path('office-admin/export/', views.export_workstations_view, name='export_workstations'),
+    path('office-admin/profiling/', views.profiling_stats_view, name='profiling_stats'),
     # URL para Gerenciar Funcionários
     path('manage-employees/', views.manage_employees_view, name='manage_employees'),
 ]
\ No newline at end of file
@@ -1,15 +1,55 @@
 from django.shortcuts import render, redirect, HttpResponse, get_object_or_404
 from django.contrib.auth.decorators import user_passes_test
 from django.contrib import messages
-from .models import Workstation, Employee, Room, Island
-from .forms import WorkstationForm, RoomForm, EmployeeForm
-from django.http import JsonResponse
-from django.db.models import Prefetch
-from django.views.decorators.http import require_POST
+from .models import Workstation, Employee, Room, Island, LayoutTemplate, normalize_search_text
+from .forms import WorkstationForm, RoomForm, EmployeeForm, EmployeeImportForm, CurrentEmployeeChoiceProvider
+from django.http import JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Prefetch, Exists, OuterRef, Q
+from django.views.decorators.http import require_POST, condition
+from django.utils.cache import patch_cache_control
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.http import Http404 # Import Http404
 import math # Add math import
+import logging
+import asyncio
+import json
+import sys
 from django.db.models.query import Prefetch
-from django.db import transaction
+from django.db import DatabaseError, connections
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from .events import broker as event_broker
+from . import profiling
+from .services import delete_employees, save_workstation_changes
+from .layouts import parse_island_specs, build_room, clone_room, delete_room
+from .importers import EmployeeImportError, import_employees
+from .exports import FORMATS as EXPORT_FORMATS, aiter_export, iter_export
+from .dashboard import get_dashboard
+from .allocation import apply_allocation, plan_allocation
+from .audit import describe_entries, history_page
+from .snapshots import build_rooms, floor_at
+from .readmodels import load_rooms, load_workstations
+from .routers import read_from_replica, reading_from_replica
+from .cache import get_island_versions, get_island_fragments, set_island_fragments, get_layout_version, layout_etag, layout_last_modified
+
+logger = logging.getLogger(__name__)
+
+# Intervalo de keep-alive do stream SSE e espera sugerida para reconexão
+SSE_HEARTBEAT_SECONDS = 15
+SSE_RETRY_MS = 5000
+
+# Itens por página na busca de funcionários do admin
+EMPLOYEE_SEARCH_PAGE_SIZE = 20
+
+# Erros da importação CSV mostrados como mensagens (o relatório completo sai no comando import_employees)
+IMPORT_ERRORS_SHOWN = 20
+
+# Funcionários sem PA listados na prévia da alocação automática (o comando allocate_seats lista todos)
+ALLOCATION_UNPLACED_SHOWN = 50
 
 def is_admin(user):
     return user.is_authenticated and user.is_staff
@@ -63,154 +103,134 @@ def arrange_workstations_in_columns(workstations_list_input, num_columns=2):
     processed_columns = [list(reversed(col)) for col in columns]
     return processed_columns
 
+@read_from_replica
+@condition(etag_func=layout_etag, last_modified_func=layout_last_modified)
 def office_view(request):
     """Visualização pública do escritório, organizada por Salas e Ilhas"""
-    # Configura headers para evitar cache
-    response = HttpResponse()
-    response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-    response['Pragma'] = 'no-cache'
-    response['Expires'] = '0'
-    
-    # Busca dados usando a nova estrutura, otimizada com prefetch_related
-    rooms_data = Room.objects.prefetch_related(
-        Prefetch(
-            'islands',
-            queryset=Island.objects.prefetch_related(
-                Prefetch(
-                    'workstations',
-                    queryset=Workstation.objects.select_related('employee').order_by('sequence'),
-                )
-            ).order_by('island_number'),
-        )
-    ).order_by('name')
-
-    # Processa workstations em colunas para cada ilha
-    for room in rooms_data:
-        for island in room.islands.all(): # Itera sobre as ilhas pré-carregadas
-             workstations_on_island = list(island.workstations.all()) # Acessa workstations pré-carregadas
-             # Chama a função refatorada (definida acima)
-             island.processed_columns = arrange_workstations_in_columns(workstations_on_island)
+    # O decorator condition responde 304 sem chegar aqui quando o layout não mudou
+    # Busca salas e ilhas; as workstations só são carregadas para as ilhas
+    # cujo fragmento renderizado não está no cache (ver pam/cache.py). Tudo em
+    # registros leves com só as colunas exibidas (ver pam/readmodels.py)
+    rooms_data = load_rooms()
+    islands = {island.id: island for room in rooms_data for island in room.islands}
+
+    versions = get_island_versions(islands)
+    fragments = get_island_fragments(versions)
+    stale_island_ids = [island_id for island_id in islands if island_id not in fragments]
+
+    if stale_island_ids:
+        workstations_by_island = load_workstations(stale_island_ids)
+        rendered = {}
+        for island_id in stale_island_ids:
+            island = islands[island_id]
+            island.processed_columns = arrange_workstations_in_columns(workstations_by_island.get(island_id, []))
+            rendered[island_id] = render_to_string('pam/office_island.html', {'island': island})
+        # Lido da réplica, o fragmento de uma ilha recém-alterada pode estar atrasado
+        min_age = settings.PAM_REPLICA_MAX_LAG_SECONDS if reading_from_replica() else 0
+        set_island_fragments(rendered, versions, min_age=min_age)
+        fragments.update(rendered)
+
+    for island_id, island in islands.items():
+        island.fragment = mark_safe(fragments[island_id])
 
     # Passa os dados estruturados por sala para o template
     context = {
         'rooms_data': rooms_data,
     }
     # Precisamos garantir que o template 'pam/office_view.html' também use 'rooms_data'
+    response = render(request, 'pam/office_view.html', context)
+    # no-cache (e não no-store): o navegador guarda a página, mas revalida com o ETag
+    patch_cache_control(response, no_cache=True)
+    return response
+
+@user_passes_test(is_admin)
+def office_at_view(request):
+    """O office_view como estava em ?at=<data e hora>, reconstruído por foto + replay (ver pam/snapshots.py)."""
+    try:
+        at = parse_datetime(request.GET.get('at', ''))
+    except ValueError:
+        # Bem formada mas impossível (ex.: 2024-02-30T10:00)
+        return HttpResponse("Data inválida.", status=400)
+    if at is None:
+        at = timezone.now()
+    elif timezone.is_naive(at):
+        at = timezone.make_aware(at)
+
+    state = floor_at(at)
+    rooms_data = build_rooms(state.data)
+    for room in rooms_data:
+        for island in room.islands:
+            island.processed_columns = arrange_workstations_in_columns(island.workstation_list)
+            island.fragment = mark_safe(render_to_string('pam/office_island.html', {'island': island}))
+
+    context = {
+        'rooms_data': rooms_data,
+        'snapshot_at': timezone.localtime(at),
+        'snapshot_base': state.base,
+        'snapshot_replayed': state.replayed,
+    }
     return render(request, 'pam/office_view.html', context)
 
+async def seat_events_view(request):
+    """Stream SSE com os deltas de status das PAs (ver pam/events.py).
+
+    Só funciona sob um servidor ASGI: no WSGI o Django tentaria consumir o
+    stream infinito de uma vez. Nesse caso respondemos 204, que faz o
+    EventSource do navegador desistir de reconectar.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    async def stream():
+        subscription = event_broker.subscribe()
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    # Comentário SSE: mantém proxies e o navegador com a conexão viva
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            # Executado também quando o cliente desconecta (o Django cancela o stream)
+            event_broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no' # Desliga o buffer do nginx, se houver
+    return response
+
 @user_passes_test(is_admin)
 def admin_office_view(request):
     """Visualização administrativa do escritório, organizada por Salas e Ilhas"""
 
     if request.method == 'POST':
-        modified_workstations = []
-        errors_found = []
-        workstation_ids_in_post = set()
-
-        # 1. Coletar todos os IDs de Workstation presentes no POST
+        # 1. Agrupar os campos do POST ('<id>-employee', '<id>-status') por Workstation
+        changes_by_id = {}
         for key in request.POST:
-            if '-' in key:
-                try:
-                    ws_id_str = key.split('-')[0]
-                    ws_id = int(ws_id_str)
-                    workstation_ids_in_post.add(ws_id)
-                except (ValueError, IndexError):
-                    continue # Ignora chaves mal formatadas
+            ws_id_str, _, field = key.partition('-')
+            if field in ('employee', 'status') and ws_id_str.isdigit():
+                change = changes_by_id.setdefault(int(ws_id_str), {'id': int(ws_id_str)})
+                change['employee_id' if field == 'employee' else 'status'] = request.POST[key]
 
-        if not workstation_ids_in_post:
+        if not changes_by_id:
             messages.warning(request, "Nenhuma alteração detectada.")
             return redirect('pam:admin_office_view')
 
-        # 2. Buscar todas as workstations relevantes do banco de dados de uma vez
-        workstations_to_check = Workstation.objects.select_related('employee').filter(id__in=workstation_ids_in_post)
-        workstations_dict = {ws.id: ws for ws in workstations_to_check}
-
-        # 3. Iterar sobre os IDs e verificar modificações
+        # 2. Aplicar tudo em lote (mesmo caminho do endpoint JSON)
         try:
-            with transaction.atomic(): # Garante que todas as alterações sejam salvas ou nenhuma
-                for ws_id in workstation_ids_in_post:
-                    if ws_id not in workstations_dict:
-                        errors_found.append(f"Erro: Workstation com ID {ws_id} não encontrada no banco.")
-                        continue # Pula para o próximo ID
-                    
-                    workstation = workstations_dict[ws_id]
-                    original_status = workstation.status
-                    original_employee = workstation.employee
-                    fields_to_update = []
-
-                    # Verificar Employee (ANTES de verificar/aplicar status)
-                    submitted_employee_id = request.POST.get(f'{ws_id}-employee')
-                    selected_employee = None
-                    employee_changed = False
-                    if submitted_employee_id is not None: # Verifica se o campo foi enviado
-                        if submitted_employee_id == '' and original_employee is not None: # Desatribuindo
-                            workstation.employee = None
-                            employee_changed = True
-                        elif submitted_employee_id:
-                            try:
-                                submitted_employee_id_int = int(submitted_employee_id)
-                                if original_employee is None or original_employee.id != submitted_employee_id_int:
-                                    # Busca o funcionário SE houver mudança ou for nova atribuição
-                                    # Idealmente, ter um cache de funcionários aqui seria mais eficiente se muitos forem alterados
-                                    selected_employee = Employee.objects.get(pk=submitted_employee_id_int)
-                                    workstation.employee = selected_employee
-                                    employee_changed = True
-                                else:
-                                     # ID enviado é o mesmo que já estava, não faz nada
-                                     pass
-                            except (ValueError, Employee.DoesNotExist):
-                                errors_found.append(f"Erro: Funcionário com ID '{submitted_employee_id}' inválido para PA {ws_id}.")
-                                continue # Pula esta PA
-                    
-                    # Se o funcionário foi alterado, marca para salvar
-                    if employee_changed:
-                        fields_to_update.append('employee')
-
-                    # Verificar Status
-                    submitted_status = request.POST.get(f'{ws_id}-status')
-                    if submitted_status and submitted_status != original_status:
-                        if submitted_status in dict(Workstation.STATUS_CHOICES):
-                            # Aplica o status ANTES da lógica condicional abaixo
-                            workstation.status = submitted_status
-                            fields_to_update.append('status')
-                        else:
-                             errors_found.append(f"Erro: Status '{submitted_status}' inválido para PA {ws_id}.")
-                             continue # Não processa mais esta PA se status for inválido
-
-                    # Aplicar lógica de status (APÓS processar employee e status submetidos)
-                    if workstation.status == 'UNOCCUPIED' and workstation.employee is not None:
-                        # Se status foi definido como Vaga, mas ainda temos um funcionário (vindo do original ou selecionado)
-                        # Força a desassociação do funcionário.
-                        workstation.employee = None # Desassocia funcionário
-                        if 'employee' not in fields_to_update: fields_to_update.append('employee')
-
-                    # Não precisamos mais da verificação explícita `elif workstation.status == 'OCCUPIED' and workstation.employee is None:`
-                    # porque se o status for OCCUPIED e o employee não foi selecionado/mantido,
-                    # a verificação final antes do save() pegará isso.
-
-                    # 4. Salvar se houver alterações
-                    if fields_to_update:
-                        # Verifica consistência final antes de salvar
-                        if workstation.status == 'OCCUPIED' and workstation.employee is None:
-                             errors_found.append(f"Erro Crítico: Tentativa de salvar PA {ws_id} como 'Ocupada' sem funcionário.")
-                             # Reverte o status para o original para evitar inconsistência?
-                             # workstation.status = original_status
-                             # if 'status' in fields_to_update: fields_to_update.remove('status')
-                             # if 'employee' in fields_to_update: fields_to_update.remove('employee')
-                             # fields_to_update = [] # Não salva nada desta PA
-                        elif workstation.status == 'UNOCCUPIED' and workstation.employee is not None:
-                            # Deveria ter sido corrigido acima, mas como segurança
-                            errors_found.append(f"Erro Crítico: Tentativa de salvar PA {ws_id} como 'Vaga' com funcionário.")
-                        else:
-                            workstation.save(update_fields=fields_to_update)
-                            modified_workstations.append(ws_id)
-
+            results = save_workstation_changes(list(changes_by_id.values()), user=request.user)
         except Exception as e:
             messages.error(request, f"Erro inesperado durante o processamento: {e}")
-            print(f"Erro inesperado salvando multiplas workstations: {e}") # Log
+            logger.exception("Erro inesperado salvando multiplas workstations: %s", e)
             return redirect('pam:admin_office_view')
 
-        # 5. Feedback ao usuário
+        modified_workstations = [result['id'] for result in results if result.get('changed')]
+        errors_found = [result['error'] for result in results if not result['success']]
+
+        # 3. Feedback ao usuário
         if modified_workstations and not errors_found:
             messages.success(request, f"Alterações salvas com sucesso para {len(modified_workstations)} workstation(s)!")
         elif modified_workstations:
@@ -237,6 +257,9 @@ def admin_office_view(request):
         )
     ).order_by('name')
         
+    # Cada <select> leva só o funcionário atual; a escolha de outro usa a busca AJAX
+    choice_provider = CurrentEmployeeChoiceProvider()
+
     # Processa workstations em colunas para cada ilha
     # temp_forms_list = [] # Não precisamos mais guardar forms separadamente
     for room in rooms_data:
@@ -245,7 +268,7 @@ def admin_office_view(request):
              input_list_for_island = []
              if hasattr(island, 'workstations_with_forms'):
                   for ws in island.workstations_with_forms:
-                       form = WorkstationForm(instance=ws, prefix=str(ws.id))
+                       form = WorkstationForm(instance=ws, prefix=str(ws.id), choice_provider=choice_provider)
                        # Cria o dict esperado pela função
                        input_list_for_island.append({'workstation': ws, 'form': form})
                   # Chama a função refatorada (definida acima)
@@ -259,10 +282,39 @@ def admin_office_view(request):
     # The context now contains rooms, each with islands, each island with processed_columns
     context = {
         'rooms_data': rooms_data,
+        'workstation_categories': Workstation.CATEGORY_CHOICES,
+        # Modelos de layout que preenchem o modal de nova sala
+        'layout_templates': list(LayoutTemplate.objects.values('id', 'name', 'islands')),
         # 'error_message': error_message # Error message is handled by Django messages framework on redirect
     }
     return render(request, 'pam/admin_office.html', context)
 
+@require_POST
+@user_passes_test(is_admin)
+def save_workstations_ajax_view(request):
+    """Salva só as PAs alteradas: corpo JSON {"changes": [{id, status, employee_id}, ...]}.
+
+    Responde {'success': ..., 'results': [...]} com o estado final de cada PA,
+    para a página se atualizar sem redirect.
+    """
+    if not request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({'success': False, 'error': 'Requisição inválida.'}, status=400)
+
+    try:
+        changes = json.loads(request.body).get('changes')
+    except (ValueError, AttributeError):
+        changes = None
+    if not isinstance(changes, list) or not all(isinstance(change, dict) for change in changes):
+        return JsonResponse({'success': False, 'error': 'Formato inválido: esperado {"changes": [...]}.'}, status=400)
+
+    try:
+        results = save_workstation_changes(changes, user=request.user)
+    except Exception as e:
+        logger.exception("Erro inesperado salvando workstations via AJAX: %s", e)
+        return JsonResponse({'success': False, 'error': 'Erro interno ao salvar as alterações.'}, status=500)
+
+    return JsonResponse({'success': all(result['success'] for result in results), 'results': results})
+
 @require_POST # Garante que esta view só aceite POST
 @user_passes_test(is_admin) # Garante que só admin pode acessar
 def add_room_ajax_view(request):
@@ -271,141 +323,240 @@ def add_room_ajax_view(request):
         return JsonResponse({'success': False, 'errors': {'__all__': ['Requisição inválida.']}}, status=400)
 
     room_form = RoomForm(request.POST)
-    num_islands_str = request.POST.get('num_islands', '0')
-    
     errors = {}
-    num_islands = 0 # Inicializa
+
+    # Valida toda a requisição (contagens e categorias) antes de tocar no banco
+    island_specs = []
     try:
-        num_islands = int(num_islands_str)
-        if num_islands <= 0:
-             errors['counts'] = ['Número de ilhas deve ser positivo.']
-    except ValueError:
-         errors['counts'] = ['Número de ilhas inválido.']
-
-    # *** CORREÇÃO: Ler workstations e categorias usando os nomes indexados ***
-    workstations_per_island_str = []
-    island_categories_str = []
-    if not errors: # Só tenta ler se num_islands for válido
-        for i in range(num_islands):
-            ws_count_str = request.POST.get(f'island_{i+1}_workstations', '0') # Lê island_1_workstations, etc.
-            category_str = request.POST.get(f'island_{i+1}_category', '')      # Lê island_1_category, etc.
-            workstations_per_island_str.append(ws_count_str)
-            island_categories_str.append(category_str)
-
-    # A verificação de inconsistência não é mais necessária da mesma forma,
-    # pois o loop garante que temos a quantidade certa de itens se num_islands for válido.
-
-    # Validação dos valores lidos
-    workstations_per_island = []
-    if not errors:
-        for count_str in workstations_per_island_str:
-            try:
-                count = int(count_str)
-                if count <= 0:
-                    errors.setdefault('counts', []).append('Número de workstations por ilha deve ser positivo.')
-                    break # Para no primeiro erro de contagem
-                workstations_per_island.append(count)
-            except ValueError:
-                errors.setdefault('counts', []).append('Número inválido de workstations por ilha fornecido.')
-                break # Para no primeiro erro de valor
-
-    if not errors and room_form.is_valid():
-        try:
-            with transaction.atomic(): # Garante que tudo seja salvo ou nada
-                room = room_form.save() # Salva a sala
-
-                # Cria ilhas e workstations
-                for i in range(num_islands):
-                    island_num = i + 1
-                    # Valida se temos dados suficientes antes de tentar acessar o índice
-                    if i < len(workstations_per_island) and i < len(island_categories_str):
-                        num_workstations = workstations_per_island[i]
-                        island_category = island_categories_str[i] # *** NOVO: Pega a categoria da ilha ***
-
-                        island = Island.objects.create(
-                            room=room,
-                            island_number=island_num,
-                            category=island_category # *** NOVO: Salva a categoria na ilha ***
-                        )
-                        for j in range(num_workstations):
-                            # --- NOVA LÓGICA PARA CATEGORIA DA WORKSTATION ---
-                            ws_category = island_category # Default: usa a categoria da ilha (do modal)
-
-                            # Verifica o nome da sala e o número da ilha para categorias específicas
-                            if room.name == "Sala 1":
-                                if island_num == 1:
-                                    ws_category = "INSS"
-                                elif island_num == 2:
-                                    ws_category = "Estágio"
-                            elif room.name == "Sala 2":
-                                if island_num == 1:
-                                    ws_category = "SIAPE Dion"
-                                elif island_num == 2:
-                                    ws_category = "SIAPE Leo"
-                            # --- FIM DA NOVA LÓGICA ---
-
-                            # Lógica de criação da workstation (usando a categoria definida)
-                            Workstation.objects.create(
-                                island=island,
-                                status='UNOCCUPIED',
-                                sequence = j + 1, # Definindo a sequência
-                                category=ws_category, # *** Usa a categoria definida pela nova lógica ***
-                            )
-                    else:
-                        # Tratar erro: Inconsistência nos dados coletados
-                        # Isso não deveria acontecer se as leituras anteriores estiverem corretas
-                        # mas é uma salvaguarda.
-                        errors['__all__'] = ['Erro interno: Inconsistência nos dados das ilhas.']
-                        # Força a saída do loop e falha da transação
-                        raise transaction.TransactionManagementError("Dados de ilha inconsistentes.")
-
-                return JsonResponse({'success': True}) # Sucesso!
-
-        except ValueError: # Erro na conversão de números DENTRO da lógica de criação (se houver)
-            errors.setdefault('counts', []).append('Valores inválidos detectados durante a criação.')
-            # Não retorna aqui, deixa cair para o retorno de erro geral abaixo
-        except transaction.TransactionManagementError as tme:
-             # O erro já foi adicionado a errors['__all__']
-             print(f"Erro de transação: {tme}")
-             # Deixa cair para o retorno de erro geral
-             pass
-        except Exception as e: # Erro inesperado no banco ou outro DENTRO da transação
-            print(f"Erro inesperado em add_room_ajax_view durante a transação: {e}") # Log do erro
-            errors['__all__'] = ['Ocorreu um erro interno ao salvar a sala e suas estruturas.']
-            # Deixa cair para o retorno de erro geral
-
-    # --- Bloco de retorno de erro (agora fora do try/except principal da lógica de criação) ---
-    # Coleta erros do RoomForm SE o if principal falhou E room_form não for válido
+        island_specs = parse_island_specs(request.POST)
+    except ValidationError as e:
+        errors.update(e.message_dict)
+
     if not room_form.is_valid():
         for field, field_errors in room_form.errors.items():
-            # Evita sobrescrever erros já detectados
             errors.setdefault(field, []).extend(field_errors)
 
-    # Retorna JSON de erro se houver QUALQUER erro detectado
     if errors:
         return JsonResponse({'success': False, 'errors': errors})
 
-    # Se chegou aqui sem erros, algo muito estranho aconteceu.
-    # Adiciona um erro genérico por segurança.
-    print("Alerta: A view add_room_ajax chegou ao final sem sucesso ou erro definido.")
-    errors['__all__'] = ['Ocorreu uma falha inesperada no processamento.']
-    return JsonResponse({'success': False, 'errors': errors}, status=500)
+    try:
+        # Sala, ilhas e workstations em bulk_create, numa única transação
+        build_room(room_form.cleaned_data['name'], island_specs)
+    except Exception as e: # Erro inesperado no banco durante a transação
+        logger.exception("Erro inesperado em add_room_ajax_view durante a transação: %s", e)
+        errors['__all__'] = ['Ocorreu um erro interno ao salvar a sala e suas estruturas.']
+        return JsonResponse({'success': False, 'errors': errors})
+
+    return JsonResponse({'success': True}) # Sucesso!
+
+@require_POST
+@user_passes_test(is_admin)
+def clone_room_ajax_view(request, room_id):
+    """Cria uma sala nova com as ilhas e PAs (vagas, sequências novas) de uma existente."""
+    if not request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({'success': False, 'errors': {'__all__': ['Requisição inválida.']}}, status=400)
+
+    room_form = RoomForm(request.POST)
+    if not room_form.is_valid():
+        return JsonResponse({'success': False, 'errors': {field: list(field_errors) for field, field_errors in room_form.errors.items()}})
+
+    try:
+        # Inserções em lote, numa única transação (ver pam/layouts.py)
+        room = clone_room(room_id, room_form.cleaned_data['name'])
+    except Room.DoesNotExist:
+        return JsonResponse({'success': False, 'errors': {'__all__': ['Sala de origem não encontrada.']}}, status=404)
+    except Exception as e:
+        logger.exception("Erro inesperado em clone_room_ajax_view: %s", e)
+        return JsonResponse({'success': False, 'errors': {'__all__': ['Ocorreu um erro interno ao copiar a sala.']}})
+
+    return JsonResponse({'success': True, 'room_id': room.pk})
+
+def _prefix_upper_bound(prefix):
+    """Menor texto maior que todos os que começam com `prefix`, na ordem por código.
+
+    None quando não há (prefixo só com o último caractere do Unicode).
+    """
+    prefix = prefix.rstrip(chr(sys.maxunicode))
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _search_name_prefix(employees, prefix):
+    if connections[employees.db].vendor == 'postgresql':
+        # A ordem do texto segue a collation do banco, em que um intervalo
+        # pode perder ou incluir nomes; o LIKE 'prefixo%' usa os índices com
+        # varchar_pattern_ops (migração 0023)
+        return employees.filter(search_name__startswith=prefix)
+    # SQLite compara por código (BINARY): o intervalo usa os índices de
+    # search_name, e o LIKE do startswith, não
+    employees = employees.filter(search_name__gte=prefix)
+    upper = _prefix_upper_bound(prefix)
+    return employees if upper is None else employees.filter(search_name__lt=upper)
+
+
+@user_passes_test(is_admin)
+def employee_search_ajax_view(request):
+    """Busca paginada de funcionários por prefixo do nome, para o autocomplete do admin.
+
+    Parâmetros GET: q (prefixo), sector, workstation (PA que está sendo
+    editada: o funcionário dela não conta como ocupado), exclude_occupied=1 e
+    after_name/after_id, o cursor devolvido em 'next' pela página anterior.
+    A busca é um intervalo sobre o índice (sector, search_name) e cada
+    página continua do cursor (keyset), então nenhuma depende do tamanho da
+    tabela nem da profundidade da página.
+    """
+    if not request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({'error': 'Requisição inválida.'}, status=400)
+
+    try:
+        workstation_id = int(request.GET['workstation']) if request.GET.get('workstation') else None
+        after_id = int(request.GET['after_id']) if request.GET.get('after_id') else None
+    except ValueError:
+        return JsonResponse({'error': 'Parâmetros inválidos.'}, status=400)
+
+    employees = Employee.objects.all()
+    sector = request.GET.get('sector')
+    if sector:
+        employees = employees.filter(sector=sector)
+    prefix = normalize_search_text(request.GET.get('q', ''))
+    if prefix:
+        employees = _search_name_prefix(employees, prefix)
+    if after_id is not None:
+        after_name = request.GET.get('after_name', '')
+        employees = employees.filter(Q(search_name__gt=after_name) | Q(search_name=after_name, id__gt=after_id))
+
+    other_seats = Workstation.objects.filter(employee=OuterRef('pk')).exclude(pk=workstation_id)
+    employees = employees.annotate(occupied=Exists(other_seats))
+    if request.GET.get('exclude_occupied') == '1':
+        employees = employees.filter(occupied=False)
+
+    # Busca um item a mais para saber se há próxima página, sem COUNT(*)
+    rows = list(
+        employees.order_by('search_name', 'id')
+        .values('id', 'name', 'sector', 'occupied', 'search_name')[:EMPLOYEE_SEARCH_PAGE_SIZE + 1]
+    )
+    results = rows[:EMPLOYEE_SEARCH_PAGE_SIZE]
+    has_more = len(rows) > EMPLOYEE_SEARCH_PAGE_SIZE
+    next_cursor = {'after_name': results[-1]['search_name'], 'after_id': results[-1]['id']} if has_more else None
+    for row in results:
+        del row['search_name']
+    return JsonResponse({'results': results, 'has_more': has_more, 'next': next_cursor})
+
+@user_passes_test(is_admin)
+def profiling_stats_view(request):
+    """Percentis de custo por view coletados pelo QueryProfilingMiddleware (ver pam/profiling.py)."""
+    return JsonResponse({
+        'enabled': settings.PAM_PROFILING_ENABLED,
+        'views': profiling.store.summary(),
+    })
 
 # --- Views AJAX para Remoção ---
 
 @user_passes_test(is_admin) # Protege a view
+@read_from_replica
+@condition(etag_func=layout_etag)
 def list_rooms_ajax_view(request):
     if not request.headers.get('x-requested-with') == 'XMLHttpRequest':
         return JsonResponse({'error': 'Requisição inválida.'}, status=400)
 
     try:
         rooms = Room.objects.all().values('id', 'name').order_by('name') # Pega só id e nome
-        return JsonResponse({'rooms': list(rooms)})
-    except Exception as e:
-        print(f"Erro ao listar salas via AJAX: {e}")
+        response = JsonResponse({'rooms': list(rooms)})
+        patch_cache_control(response, no_cache=True, private=True)
+        return response
+    except Exception:
+        logger.exception("Erro ao listar salas via AJAX")
         return JsonResponse({'error': 'Erro ao buscar salas.'}, status=500)
 
 
+@user_passes_test(is_admin)
+@read_from_replica
+@condition(etag_func=layout_etag)
+def occupancy_dashboard_view(request):
+    """Painel de ocupação por sala/ilha/categoria, equipamentos faltando e funcionários sem PA.
+
+    HTML por padrão; ?format=json devolve os mesmos dados. O conteúdo vem de
+    consultas agregadas cacheadas sob a versão do layout (ver pam/dashboard.py).
+    """
+    dashboard = get_dashboard(request)
+    if request.GET.get('format') == 'json':
+        response = JsonResponse(dashboard)
+    else:
+        response = render(request, 'pam/occupancy_dashboard.html', {'dashboard': dashboard})
+    patch_cache_control(response, no_cache=True, private=True)
+    return response
+
+@user_passes_test(is_admin)
+def seat_history_view(request):
+    """Histórico de trocas de PA, do mais recente ao mais antigo, paginado por cursor.
+
+    ?before=<id> continua a partir da última linha da página anterior e
+    ?workstation=<id> mostra só uma PA (ver pam/audit.py).
+    """
+    def int_param(name):
+        try:
+            return int(request.GET[name])
+        except (KeyError, ValueError):
+            return None
+
+    workstation_id = int_param('workstation')
+    page = history_page(before=int_param('before'), workstation_id=workstation_id)
+    context = {
+        'rows': describe_entries(page.entries),
+        'next_before': page.next_before,
+        'workstation_id': workstation_id,
+    }
+    return render(request, 'pam/seat_history.html', context)
+
+
+@user_passes_test(is_admin)
+@read_from_replica
+def export_workstations_view(request):
+    """Download de todas as PAs em CSV (?format=csv) ou JSON Lines (?format=jsonl), em streaming."""
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return HttpResponse("Formato inválido. Use csv ou jsonl.", status=400)
+
+    # Sob ASGI, um iterador síncrono seria consumido inteiro antes do envio
+    content = aiter_export(fmt) if isinstance(request, ASGIRequest) else iter_export(fmt)
+    response = StreamingHttpResponse(content, content_type=EXPORT_FORMATS[fmt])
+    filename = f"pas_{timezone.localdate():%Y-%m-%d}.{fmt}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+@user_passes_test(is_admin)
+def allocate_seats_view(request):
+    """Alocação automática dos funcionários sem PA: prévia no GET, gravação no POST.
+
+    O POST só grava se o layout ainda estiver na versão mostrada na prévia;
+    senão, mostra a prévia atualizada para nova confirmação.
+    """
+    valid_sectors = [key for key, _ in Employee.SECTOR_CHOICES]
+    sectors = [sector for sector in request.POST.getlist('sector') or request.GET.getlist('sector') if sector in valid_sectors] or None
+
+    if request.method == 'POST':
+        if request.POST.get('layout_version') == get_layout_version(request).etag:
+            seated, skipped = apply_allocation(plan_allocation(sectors), user=request.user)
+            messages.success(request, f"{len(seated)} funcionário(s) alocado(s) automaticamente.")
+            if skipped:
+                messages.warning(request, f"{len(skipped)} alocação(ões) descartada(s): a PA ou o funcionário mudou durante a gravação.")
+            return redirect('pam:admin_office_view')
+        messages.warning(request, "O layout mudou desde a prévia. Confira a nova prévia antes de confirmar.")
+
+    plan = plan_allocation(sectors)
+    context = {
+        'plan': plan,
+        'by_sector': plan.by_sector(),
+        'unplaced': plan.unplaced[:ALLOCATION_UNPLACED_SHOWN],
+        'sector_choices': Employee.SECTOR_CHOICES,
+        'selected_sectors': sectors or [],
+        'layout_version': get_layout_version(request).etag,
+    }
+    return render(request, 'pam/allocate_seats.html', context)
+
+
 @require_POST # Garante que só aceite POST (ou DELETE, se preferir mudar)
 @user_passes_test(is_admin)
 def remove_room_ajax_view(request, room_id):
@@ -413,15 +564,13 @@ def remove_room_ajax_view(request, room_id):
         return JsonResponse({'success': False, 'error': 'Requisição inválida.'}, status=400)
 
     try:
-        room = get_object_or_404(Room, pk=room_id)
-        room_name = room.name # Guarda o nome para log ou mensagem futura
-        room.delete() # CASCADE configurado no modelo deve remover Ilhas e Workstations
-        # print(f"Sala '{room_name}' removida com sucesso.") # Log opcional
+        # DELETEs por conjunto (PAs, ilhas e sala), sem carregar nada em memória
+        delete_room(room_id)
         return JsonResponse({'success': True})
-    except Http404:
+    except Room.DoesNotExist:
          return JsonResponse({'success': False, 'error': 'Sala não encontrada.'}, status=404)
-    except Exception as e:
-        print(f"Erro ao remover sala {room_id} via AJAX: {e}")
+    except Exception:
+        logger.exception("Erro ao remover sala %s", room_id)
         return JsonResponse({'success': False, 'error': 'Erro interno ao remover a sala.'}, status=500)
 
 # --- View para Gerenciar Funcionários ---
@@ -452,9 +601,8 @@ def manage_employees_view(request):
                 try:
                     employee = get_object_or_404(Employee, pk=employee_id)
                     employee_name = employee.name # Guarda nome para mensagem
-                    # Antes de deletar, desassociar de qualquer Workstation
-                    # Workstation.objects.filter(employee=employee).update(employee=None, status='UNOCCUPIED') # O SET_NULL já faz isso
-                    employee.delete()
+                    # Libera as PAs do funcionário (com histórico) antes de remover
+                    delete_employees(Employee.objects.filter(pk=employee.pk), user=request.user)
                     messages.success(request, f"Funcionário '{employee_name}' removido com sucesso!")
                 except Http404:
                     messages.error(request, "Erro: Funcionário não encontrado.")
@@ -464,6 +612,26 @@ def manage_employees_view(request):
                 messages.error(request, "ID do funcionário não fornecido para remoção.")
             return redirect('pam:manage_employees') # Redireciona após remover (ou tentar)
 
+        elif action == 'import':
+            import_form = EmployeeImportForm(request.POST, request.FILES)
+            if import_form.is_valid():
+                # Lido em streaming direto do upload, em lotes (ver pam/importers.py)
+                try:
+                    report = import_employees(import_form.cleaned_data['file'].file, dry_run=import_form.cleaned_data['dry_run'])
+                except (EmployeeImportError, UnicodeDecodeError, DatabaseError) as e:
+                    # Lotes já gravados ficam; o relatório do lote com erro se perde
+                    messages.error(request, f"Erro ao importar: {e}")
+                else:
+                    level = messages.warning if report.error_count else messages.success
+                    level(request, report.summary())
+                    for error in report.errors[:IMPORT_ERRORS_SHOWN]:
+                        messages.error(request, f"Linha {error.line} (CPF {error.cpf or '-'}): {error.message}")
+                    if report.error_count > IMPORT_ERRORS_SHOWN:
+                        messages.error(request, f"... e mais {report.error_count - IMPORT_ERRORS_SHOWN} linha(s) com erro.")
+            else:
+                messages.error(request, "Selecione um arquivo CSV para importar.")
+            return redirect('pam:manage_employees')
+
     # Lógica GET (ou se o POST falhou a validação no 'add')
     employees = Employee.objects.all().order_by('name')
     # Se a requisição foi POST e o form falhou, usa o form com erros
@@ -473,5 +641,6 @@ def manage_employees_view(request):
     context = {
         'employees': employees,
         'form': form_to_render,
+        'import_form': EmployeeImportForm(),
     }
     return render(request, 'pam/manage_employees.html', context)
@@ -5,6 +5,10 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+The live seat-status stream (pam.views.seat_events_view) needs ASGI, e.g.:
+    uvicorn sistema_pas.asgi:application
+Its pub/sub lives in memory, so run a single worker process.
 """
 
 import os
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 import os
 from dotenv import load_dotenv
+from django.core.exceptions import ImproperlyConfigured
 
 load_dotenv()
 
@@ -52,6 +53,10 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Desligado (MiddlewareNotUsed) a menos que PAM_PROFILING=True
+    'pam.profiling.QueryProfilingMiddleware',
+    # Desligado (MiddlewareNotUsed) sem réplica de leitura configurada
+    'pam.routers.ReplicaPinningMiddleware',
 ]
 
 ROOT_URLCONF = 'sistema_pas.urls'
@@ -77,13 +82,114 @@ WSGI_APPLICATION = 'sistema_pas.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# DB_ENGINE escolhe o banco: 'sqlite' (padrão, arquivo SQLITE_PATH) ou
+# 'postgresql' (DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT; requer psycopg).
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+
+# Ajustes do SQLite para leituras (quadros) e escritas (admin) concorrentes.
+# Os PRAGMAs rodam a cada conexão nova (init_command):
+# - journal_mode=WAL: leitores não bloqueiam o escritor nem são bloqueados por ele;
+# - synchronous=NORMAL: seguro com WAL e bem mais barato que FULL;
+# - mmap_size e cache_size (negativo = KiB): menos leituras de disco.
+# transaction_mode=IMMEDIATE pega a trava de escrita no início do atomic().
+# Assim, uma transação que leu e depois tenta escrever não falha na hora com
+# "database is locked"; ela espera até o timeout (busy timeout, em segundos).
+# Não é ganho puro. No benchmark_concurrency (4 leitores, 2 escritores em
+# lotes de 20 PAs, 15 s, 1 CPU), contra DEFERRED com o mesmo busy timeout:
+# - IMMEDIATE: ~220 leituras/s, ~7 escritas/s, p95 de escrita ~0,7 s, 0 travas;
+# - DEFERRED: ~180 leituras/s, ~12 escritas/s, p95 de escrita ~0,24 s, mas
+#   ~110 saves recusados com "database is locked" (quase 1 a cada 2 tentativas).
+# No DEFERRED o save lê antes de escrever e, se outro escritor gravou nesse
+# meio-tempo, o SQLite recusa na hora, sem esperar o timeout. IMMEDIATE fica
+# como padrão porque um save recusado é um erro para quem está no admin;
+# com escritores que toleram repetir a operação, SQLITE_TRANSACTION_MODE=DEFERRED
+# dá mais vazão de escrita.
+# Compare configurações com: python manage.py benchmark_concurrency
+SQLITE_PRAGMAS = {
+    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', -64 * 1024)),
+}
+
+if DB_ENGINE == 'sqlite':
+    DATABASE_ENGINE = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            'transaction_mode': os.getenv('SQLITE_TRANSACTION_MODE', 'IMMEDIATE'),
+            'timeout': float(os.getenv('SQLITE_BUSY_TIMEOUT', 20)),
+        },
+    }
+    PRIMARY_DATABASE = {'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3')}
+    REPLICA_DATABASE = {'NAME': os.environ['SQLITE_REPLICA_PATH']} if os.getenv('SQLITE_REPLICA_PATH') else None
+elif DB_ENGINE == 'postgresql':
+    DATABASE_ENGINE = {'ENGINE': 'django.db.backends.postgresql'}
+    PRIMARY_DATABASE = {
+        'NAME': os.getenv('DB_NAME', 'sistema_pas'),
+        'USER': os.getenv('DB_USER', ''),
+        'PASSWORD': os.getenv('DB_PASSWORD', ''),
+        'HOST': os.getenv('DB_HOST', ''),
+        'PORT': os.getenv('DB_PORT', ''),
+    }
+    # A réplica usa as credenciais do principal, salvo DB_REPLICA_USER/DB_REPLICA_PASSWORD
+    REPLICA_DATABASE = {
+        **PRIMARY_DATABASE,
+        'HOST': os.environ['DB_REPLICA_HOST'],
+        'PORT': os.getenv('DB_REPLICA_PORT', PRIMARY_DATABASE['PORT']),
+        'USER': os.getenv('DB_REPLICA_USER', PRIMARY_DATABASE['USER']),
+        'PASSWORD': os.getenv('DB_REPLICA_PASSWORD', PRIMARY_DATABASE['PASSWORD']),
+    } if os.getenv('DB_REPLICA_HOST') else None
+else:
+    raise ImproperlyConfigured(f"DB_ENGINE inválido: {DB_ENGINE!r} (use 'sqlite' ou 'postgresql').")
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        **DATABASE_ENGINE,
+        **PRIMARY_DATABASE,
+        # Conexões persistentes, em segundos (0 fecha a conexão ao fim de cada
+        # requisição). Fica desligado por padrão: sob ASGI (uvicorn, necessário
+        # para o stream de eventos) as conexões abertas nas threads do pool não
+        # são fechadas ao fim da requisição. Só ligue (ex.: DB_CONN_MAX_AGE=300)
+        # em implantações apenas WSGI.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+# Réplica de leitura (opcional): as views somente leitura leem dela (ver
+# pam/routers.py). Nos testes, ela aponta para o banco de teste do principal.
+if REPLICA_DATABASE:
+    DATABASES['replica'] = {**DATABASES['default'], **REPLICA_DATABASE, 'TEST': {'MIRROR': 'default'}}
+PAM_READ_REPLICA = 'replica' if REPLICA_DATABASE else None
+DATABASE_ROUTERS = ['pam.routers.ReplicaRouter']
+
+# Atraso máximo esperado da réplica, em segundos: depois de uma escrita, o
+# navegador lê do principal por esse tempo, e o quadro lido da réplica não
+# cacheia fragmentos de ilhas alteradas há menos tempo que isso
+PAM_REPLICA_MAX_LAG_SECONDS = int(os.getenv('DB_REPLICA_MAX_LAG', 5))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# O office_view cacheia os fragmentos de cada ilha (ver pam/cache.py). O padrão é
+# o cache em memória local; com vários processos, aponte para um backend compartilhado.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'sistema-pas'),
     }
 }
 
+# Tempo de vida (segundos) dos fragmentos de ilha renderizados
+PAM_FRAGMENT_CACHE_TIMEOUT = int(os.getenv('PAM_FRAGMENT_CACHE_TIMEOUT', 60 * 60 * 24))
+
+# Tamanho máximo de uma sala criada pelo admin, por modelo ou cópia (ver
+# pam/layouts.py): limita o que uma única transação de escrita insere
+PAM_MAX_ISLANDS_PER_ROOM = int(os.getenv('PAM_MAX_ISLANDS_PER_ROOM', 100))
+PAM_MAX_WORKSTATIONS_PER_ISLAND = int(os.getenv('PAM_MAX_WORKSTATIONS_PER_ISLAND', 200))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -129,6 +235,12 @@ LOGGING = {
     },
 }
 
+# Medição de custo das views do pam (ver pam/profiling.py)
+PAM_PROFILING_ENABLED = os.getenv('PAM_PROFILING', 'False') == 'True'
+PAM_PROFILING_SLOW_MS = int(os.getenv('PAM_PROFILING_SLOW_MS', 500))
+PAM_PROFILING_DUPLICATE_THRESHOLD = int(os.getenv('PAM_PROFILING_DUPLICATE_THRESHOLD', 5))
+PAM_PROFILING_MAX_SAMPLES = int(os.getenv('PAM_PROFILING_MAX_SAMPLES', 1000))
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 